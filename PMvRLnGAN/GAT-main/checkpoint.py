@@ -0,0 +1,98 @@
+import os
+import glob
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+##################################
+###  ATTENTION CHECKPOINTING   ###
+##################################
+
+CHECKPOINT_FORMATS = ('npy', 'npz', 'csv')
+
+
+def attention_path(F_date, output_dir='.', fmt='npy'):
+    return os.path.join(output_dir, f'tensor_epoch_{F_date}.{fmt}')
+
+
+def write_attention(path, array):
+    """Writes one (n_nodes, n_nodes) attention matrix; the format is taken from the file extension."""
+    tmp = path + '.tmp'
+    if path.endswith('.npy'):
+        with open(tmp, 'wb') as f:
+            np.save(f, array)
+    elif path.endswith('.npz'):
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(f, attention=array)
+    else:
+        # 與舊版 train.py 相同的 CSV 格式（第一行為列號）
+        pd.DataFrame(array).to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def read_attention(path):
+    """Reads an attention matrix written by write_attention (or by older versions of train.py)."""
+    if path.endswith('.npy'):
+        return np.load(path)
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return data['attention']
+    return pd.read_csv(path).to_numpy(dtype=np.float32)
+
+
+class AttentionCheckpoint:
+    """
+    Keeps the best-epoch attention tensor of every date in memory and writes it without blocking training.
+
+    update() only stores a detached copy of the tensor (on the training device, no host transfer); flush() moves the
+    best tensor of a date to the host and writes it on a background thread.
+
+    Args:
+        output_dir (str): directory of the tensor_epoch_{date} files.
+        fmt (str): 'npy', 'npz' (compressed) or 'csv' (the format of older versions).
+    """
+    def __init__(self, output_dir='.', fmt='npy'):
+        if fmt not in CHECKPOINT_FORMATS:
+            raise ValueError(f'unknown checkpoint format {fmt}, expected one of {CHECKPOINT_FORMATS}')
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self._best = {}
+        self._pending = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='attention-checkpoint')
+        os.makedirs(output_dir, exist_ok=True)
+
+    def update(self, F_date, edge):
+        self._best[F_date] = edge.detach().clone()
+
+    def flush(self, F_date):
+        edge = self._best.pop(F_date, None)
+        if edge is None:
+            return
+        numpy_array = edge.cpu().numpy()
+        # 重塑為二維數組 (n_nodes, n_nodes)
+        array = numpy_array.reshape(-1, numpy_array.shape[-1])
+        self._pending.append(self._executor.submit(write_attention, attention_path(F_date, self.output_dir, self.fmt), array))
+
+    def close(self):
+        """Flushes the remaining dates and waits until every file is written."""
+        for F_date in list(self._best):
+            self.flush(F_date)
+        for future in self._pending:
+            future.result()
+        self._pending = []
+        self._executor.shutdown()
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Convert binary attention checkpoints to CSV (the format of older versions)')
+    parser.add_argument('paths', nargs='*',
+                        help='tensor_epoch_{date}.npy/.npz files to convert (default: all in the current directory)')
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob('tensor_epoch_*.npy') + glob.glob('tensor_epoch_*.npz'))
+    for path in paths:
+        target = os.path.splitext(path)[0] + '.csv'
+        write_attention(target, read_attention(path))
+        print(f'{path} -> {target}')
@@ -1,63 +1,129 @@
 import os
-import time
-import requests
-import tarfile
-import numpy as np
-import argparse
-import pandas as pd
 import glob
+import json
+import argparse
+import numpy as np
+import networkx as nx
 
-from models import GAT
-from utils import load_cora
+from checkpoint import read_attention
+from edge_store import ATTENTION_PATTERNS, load_stock_ids
 
-import torch
-from torch import nn
-import torch.nn.functional as F
-from torch.optim import Adam
-import matplotlib.pyplot as plt
-import networkx as nx
+GRAPH_FORMATS = ('json', 'graphml')
+
+
+def top_edges(edge_weights_matrix, fraction=1.0):
+    """
+    Selects the strongest non-zero edges of one attention matrix.
+
+    Args:
+        edge_weights_matrix (np.ndarray): (n_nodes, n_nodes) attention weights; entry (i, j) is the edge i -> j.
+        fraction (float): fraction of the non-zero edges to keep (1.0 keeps all of them).
+
+    Returns:
+        tuple: (sources, targets, weights) sorted by descending weight.
+    """
+    sources, targets = np.nonzero(edge_weights_matrix)
+    weights = edge_weights_matrix[sources, targets]
+    k = int(fraction * len(weights))
+    if k <= 0:
+        return sources[:0], targets[:0], weights[:0]
+
+    # 只對前 k 大的邊排序，不必排序全部邊
+    if k < len(weights):
+        top = np.argpartition(-weights, k - 1)[:k]
+        sources, targets, weights = sources[top], targets[top], weights[top]
+    order = np.argsort(-weights, kind='stable')  # 保证是从大到小排序
+    return sources[order], targets[order], weights[order]
+
+
+def build_graph(edge_weights_matrix, fraction=1.0, stock_ids=None):
+    """
+    Builds the directed attention graph of one date.
+
+    Args:
+        edge_weights_matrix (np.ndarray): (n_nodes, n_nodes) attention weights.
+        fraction (float): fraction of the non-zero edges to keep.
+        stock_ids (np.ndarray, optional): stock id of every node, stored as the 'stock_id' node attribute.
+
+    Returns:
+        nx.DiGraph: graph with all nodes and the selected weighted edges.
+    """
+    sources, targets, weights = top_edges(edge_weights_matrix, fraction)
+
+    G = nx.DiGraph()
+    n_nodes = edge_weights_matrix.shape[0]
+    if stock_ids is not None and len(stock_ids) == n_nodes:
+        G.add_nodes_from((i, {'stock_id': str(s)}) for i, s in enumerate(stock_ids))
+    else:
+        G.add_nodes_from(range(n_nodes))
+    # tolist() 轉為 Python 數值，導出 JSON/GraphML 時不需要額外轉換
+    G.add_weighted_edges_from(zip(sources.tolist(), targets.tolist(), weights.tolist()))
+    return G
+
+
+def export_graph(G, path):
+    """Writes the graph as node-link JSON or GraphML; the format is taken from the file extension."""
+    if path.endswith('.graphml'):
+        nx.write_graphml(G, path)
+    else:
+        with open(path, 'w') as f:
+            json.dump(nx.node_link_data(G), f)
 
 
-# 假设CSV文件的路径
-csv_file_path = 'tensor_epoch_2579.csv'
-# 从CSV文件中读取边权重数据
-edge_weights_matrix = pd.read_csv(csv_file_path, header=None).values
+def draw_graph(G, title=None):
+    import matplotlib.pyplot as plt
 
-print(edge_weights_matrix.shape[0])
+    # 绘制图形，其中节点大小为5000，边的宽度为2
+    pos = nx.spring_layout(G)  # 使用spring布局
+    plt.figure(figsize=(15, 15))  # 图形尺寸更大
+    if title:
+        plt.title(title)
+    nx.draw(G, pos, with_labels=True, node_size=5000, node_color='skyblue', font_size=20, width=2)
 
-# 创建有向图
-G = nx.DiGraph()
+    # 绘制边权重
+    edge_labels = nx.get_edge_attributes(G, 'weight')
+    nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, font_size=7)
 
-# 添加节点
-for i in range(edge_weights_matrix.shape[0]):
-    G.add_node(i)
 
-# 添加带权重的边
-all_edges = []
-for i in range(edge_weights_matrix.shape[0]):
-    for j in range(edge_weights_matrix.shape[1]):
-        weight = edge_weights_matrix[i, j]
-        if weight != 0:
-            all_edges.append((i, j, weight))
+if __name__ == '__main__':
 
-# 根据权重对边进行排序
-all_edges.sort(key=lambda x: x[2], reverse=True)  # 保证是从大到小排序
+    parser = argparse.ArgumentParser(description='Build the stock graph from GAT attention matrices')
+    parser.add_argument('paths', nargs='*',
+                        help='tensor_epoch_{date} .npy/.npz/.csv files (default: all in the current directory)')
+    parser.add_argument('--fraction', type=float, default=1.0,
+                        help='fraction of the strongest non-zero edges to keep (default: 1.0)')
+    parser.add_argument('--data-dir', type=str, default='./data',
+                        help='directory of the per-stock CSV files, used to label the nodes (default: ./data)')
+    parser.add_argument('--headless', action='store_true', default=False,
+                        help='export the graphs instead of drawing them')
+    parser.add_argument('--format', type=str, default='json', choices=GRAPH_FORMATS,
+                        help='export format in headless mode: node-link JSON or GraphML (default: json)')
+    parser.add_argument('--output-dir', type=str, default='.',
+                        help='directory of the exported graphs (default: .)')
+    args = parser.parse_args()
 
-# 获取前1%的边
-top_edges = all_edges[:int(1 * len(all_edges))]
+    paths = args.paths or sorted(p for pattern in ATTENTION_PATTERNS for p in glob.glob(pattern))
+    if not paths:
+        raise SystemExit('no attention files given or found')
+    stock_ids = load_stock_ids(args.data_dir)
+    if args.headless:
+        os.makedirs(args.output_dir, exist_ok=True)
 
-# 添加前1%的边
-for edge in top_edges:
-    G.add_edge(edge[0], edge[1], weight=edge[2])
+    for path in paths:
+        # 从注意力文件中读取边权重数据
+        edge_weights_matrix = read_attention(path)
+        G = build_graph(edge_weights_matrix, args.fraction, stock_ids)
+        print(f'{path}: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges')
 
-# 绘制图形，其中节点大小为1000，边的宽度为3
-pos = nx.spring_layout(G)  # 使用spring布局
-plt.figure(figsize=(15, 15))  # 图形尺寸更大
-nx.draw(G, pos, with_labels=True, node_size=5000, node_color='skyblue', font_size=20, width=2)
+        if args.headless:
+            target = os.path.join(args.output_dir, os.path.splitext(os.path.basename(path))[0] + '.' + args.format)
+            export_graph(G, target)
+            print(f'  -> {target}')
+        else:
+            draw_graph(G, title=os.path.basename(path))
 
-# 绘制边权重
-edge_labels = nx.get_edge_attributes(G, 'weight')
-nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, font_size=7)
+    if not args.headless:
+        import matplotlib.pyplot as plt
 
-# 显示图形
-plt.show()
\ No newline at end of file
+        # 显示图形
+        plt.show()
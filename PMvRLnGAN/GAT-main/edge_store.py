@@ -0,0 +1,141 @@
+import os
+import re
+import glob
+import argparse
+import numpy as np
+
+from checkpoint import read_attention
+
+################################
+###   SPARSE TOP-K EDGE STORE ###
+################################
+
+# 邊存儲文件（由網站的 gat_adapter 讀取）
+EDGE_STORE_FILE = 'relationships.npz'
+# train.py 輸出的注意力矩陣文件（同一日期有多種格式時優先使用排在前面的格式）
+ATTENTION_PATTERNS = ('tensor_epoch_*.npy', 'tensor_epoch_*.npz', 'tensor_epoch_*.csv')
+
+
+def load_stock_ids(data_dir='./data'):
+    """Returns the stock ids in node order.
+
+    train.py reads ./data/*.csv in sorted order, so node i of every attention matrix is the i-th file.
+
+    Args:
+        data_dir (str): directory of the per-stock financial statement CSV files.
+
+    Returns:
+        np.ndarray: stock ids (file names without extension).
+    """
+    paths = sorted(glob.glob(os.path.join(data_dir, '*.csv')))
+    return np.array([os.path.splitext(os.path.basename(p))[0] for p in paths])
+
+
+def load_attention_files(attention_dir='.', patterns=ATTENTION_PATTERNS):
+    """Reads the dense per-date attention matrices written by train.py.
+
+    Args:
+        attention_dir (str): directory containing the tensor_epoch_{date}.npy/.npz/.csv files.
+        patterns (tuple): glob patterns of the attention files, in order of preference.
+
+    Returns:
+        tuple: (dates, attention) where dates is a sorted datetime64[D] array and attention has shape
+            (n_dates, n_nodes, n_nodes). Files whose name does not contain a YYYY-MM-DD date are skipped.
+    """
+    found = {}
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(attention_dir, pattern)):
+            match = re.search(r'(\d{4}-\d{2}-\d{2})', os.path.basename(path))
+            if match:
+                found.setdefault(match.group(1), path)
+
+    dates = sorted(found)
+    attention = np.stack([read_attention(found[d]).astype(np.float32) for d in dates]) if dates else None
+    return np.array(dates, dtype='datetime64[D]'), attention
+
+
+def build_topk_csr(attention, top_k, self_loops=False):
+    """Keeps the top_k strongest outgoing edges of every node, for all dates at once.
+
+    Args:
+        attention (np.ndarray): attention weights with shape (n_dates, n_nodes, n_nodes); row i holds the
+            attention node i pays to every node j.
+        top_k (int): number of neighbours kept per node.
+        self_loops (bool): whether an edge i -> i may be kept.
+
+    Returns:
+        tuple: (indptr, indices, weights) of a CSR matrix with n_dates * n_nodes rows (row d * n_nodes + i is
+            node i on date d). Neighbours in each row are sorted by descending weight; zero weights are dropped.
+    """
+    n_dates, n_nodes, _ = attention.shape
+    attention = np.array(attention, dtype=np.float32)
+    if not self_loops:
+        diagonal = np.arange(n_nodes)
+        attention[:, diagonal, diagonal] = 0
+    rows = attention.reshape(n_dates * n_nodes, n_nodes)
+    top_k = min(top_k, n_nodes)
+
+    # 先用 argpartition 取出每行前 k 大的列，再只對這 k 個元素排序
+    cols = np.argpartition(-rows, top_k - 1, axis=1)[:, :top_k]
+    weights = np.take_along_axis(rows, cols, axis=1)
+    order = np.argsort(-weights, axis=1, kind='stable')
+    cols = np.take_along_axis(cols, order, axis=1)
+    weights = np.take_along_axis(weights, order, axis=1)
+
+    keep = weights > 0
+    indptr = np.concatenate(([0], np.cumsum(keep.sum(axis=1)))).astype(np.int64)
+    return indptr, cols[keep].astype(np.int16), weights[keep].astype(np.float32)
+
+
+def write_edge_store(path, dates, stock_ids, attention, top_k):
+    """Builds the sparse top-k index and saves it as an uncompressed .npz file.
+
+    Args:
+        path (str): output file.
+        dates (np.ndarray): datetime64[D] date of every attention matrix.
+        stock_ids (np.ndarray): stock id of every node.
+        attention (np.ndarray): attention weights with shape (n_dates, n_nodes, n_nodes).
+        top_k (int): number of neighbours kept per node.
+
+    Returns:
+        int: number of stored edges.
+    """
+    if attention.shape[1:] != (len(stock_ids), len(stock_ids)):
+        raise ValueError(f'attention shape {attention.shape} does not match {len(stock_ids)} stocks')
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    if len(np.unique(dates)) != len(dates):
+        raise ValueError('duplicate dates in the attention matrices')
+    # 網站按日期二分查找，行必須按日期排序
+    order = np.argsort(dates)
+    dates, attention = dates[order], attention[order]
+    indptr, indices, weights = build_topk_csr(attention, top_k)
+
+    # 先寫入臨時文件再替換，讀取中的進程不受影響
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, dates=dates, stock_ids=np.asarray(stock_ids, dtype=str),
+                 indptr=indptr, indices=indices, weights=weights, top_k=np.int64(top_k))
+    os.replace(tmp, path)
+    return len(indices)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Convert GAT attention matrices into a sparse top-k edge store')
+    parser.add_argument('--attention-dir', type=str, default='.',
+                        help='directory containing the tensor_epoch_{date} files (default: .)')
+    parser.add_argument('--data-dir', type=str, default='./data',
+                        help='directory of the per-stock CSV files used for training (default: ./data)')
+    parser.add_argument('--top-k', type=int, default=10,
+                        help='number of neighbours kept per stock (default: 10)')
+    parser.add_argument('--output', type=str, default=EDGE_STORE_FILE,
+                        help=f'output file (default: {EDGE_STORE_FILE})')
+    args = parser.parse_args()
+
+    stock_ids = load_stock_ids(args.data_dir)
+    dates, attention = load_attention_files(args.attention_dir)
+    if attention is None:
+        raise SystemExit(f'no tensor_epoch_{{date}} files found in {args.attention_dir}')
+
+    n_edges = write_edge_store(args.output, dates, stock_ids, attention, args.top_k)
+    print(f'{len(dates)} dates x {len(stock_ids)} stocks -> {n_edges} edges written to {args.output}')
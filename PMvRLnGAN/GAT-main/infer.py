@@ -0,0 +1,142 @@
+import os
+import time
+import argparse
+import numpy as np
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import torch
+
+from models import GAT
+from utils import load_statements, zscore
+from edge_store import write_edge_store, EDGE_STORE_FILE
+from checkpoint import write_attention, attention_path
+
+#################################
+###  INFERENCE WITH SAVED GAT ###
+#################################
+
+# 每個進程只加載一次模型，並重複使用同一個輸入緩衝區
+_model = None
+_buffer = None
+
+
+def load_model(path='gat_model.pth'):
+    """
+    Loads the saved GAT weights for inference. The layer sizes are read from the state dict, so the model does not
+    depend on the command line used for training.
+    """
+    state_dict = torch.load(path, map_location='cpu', weights_only=True)
+    n_heads = state_dict['gat1.a'].shape[0]
+    n_hidden = state_dict['gat1.a'].shape[1] // 2
+    in_features = state_dict['gat1.W'].shape[0]
+    out_features = state_dict['gat2.W'].shape[0]   # output size of the first layer
+
+    model = GAT(
+        in_features=in_features,
+        n_hidden=out_features,
+        n_heads=n_heads,
+        num_classes=1,
+        concat=out_features != n_hidden,          # concatenated heads split out_features across the heads
+    )
+    model.load_state_dict(state_dict)
+    model.eval()
+    return model
+
+
+def init_worker(model_path, num_threads=None):
+    global _model
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+    _model = load_model(model_path)
+
+
+def infer_batch(inputs):
+    """
+    Runs one forward pass for a batch of dates.
+
+    Args:
+        inputs (np.ndarray): (n_dates, n_nodes, in_features) standardized node features.
+
+    Returns:
+        np.ndarray: (n_dates, n_nodes, n_nodes) attention of the last layer.
+    """
+    global _buffer
+    if _buffer is None or _buffer.shape[0] < len(inputs) or _buffer.shape[1:] != inputs.shape[1:]:
+        _buffer = torch.empty(inputs.shape, dtype=torch.float)
+    batch = _buffer[:len(inputs)]
+    batch.copy_(torch.from_numpy(inputs))
+
+    with torch.inference_mode():
+        # 全連接圖，不需要鄰接矩陣
+        _, attention = _model(batch)
+    return attention[:, 0].numpy().copy()
+
+
+def infer_attention(model_path, inputs, workers=1):
+    """
+    Computes the attention matrices of all dates, splitting the dates across worker processes.
+
+    Args:
+        model_path (str): path of gat_model.pth.
+        inputs (np.ndarray): (n_dates, n_nodes, in_features) standardized node features.
+        workers (int): number of processes; each one loads the model once and uses a single thread.
+
+    Returns:
+        np.ndarray: (n_dates, n_nodes, n_nodes) attention matrices.
+    """
+    workers = max(1, min(workers, len(inputs)))
+    if workers == 1:
+        init_worker(model_path)
+        return infer_batch(inputs)
+
+    chunks = np.array_split(inputs, workers)
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context('spawn'),
+                             initializer=init_worker, initargs=(model_path, 1)) as pool:
+        return np.concatenate(list(pool.map(infer_batch, chunks)))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Generate GAT attention matrices with the saved gat_model.pth')
+    parser.add_argument('--model', type=str, default='gat_model.pth',
+                        help='saved model weights (default: gat_model.pth)')
+    parser.add_argument('--data-dir', type=str, default='./data',
+                        help='directory of the per-stock financial statement CSV files (default: ./data)')
+    parser.add_argument('--dates', type=str, nargs='*', default=None,
+                        help='statement dates (YYYY-MM-DD) to run (default: every date in date.txt)')
+    parser.add_argument('--top-k', type=int, default=10,
+                        help='number of neighbours kept per stock in the edge store (default: 10)')
+    parser.add_argument('--output', type=str, default=EDGE_STORE_FILE,
+                        help=f'edge store file (default: {EDGE_STORE_FILE})')
+    parser.add_argument('--attention-dir', type=str, default=None,
+                        help='also write every dense attention matrix as tensor_epoch_{date}.npy to this directory')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='number of worker processes (default: number of CPU cores)')
+    args = parser.parse_args()
+
+    start_t = time.time()
+
+    with open('date.txt', 'r') as file:
+        statement_dates = [line.strip() for line in file if line.strip()]  # 第 i 行是財報文件第 i 行的日期
+
+    dates = sorted(set(args.dates or statement_dates))
+    unknown = [d for d in dates if d not in statement_dates]
+    if unknown:
+        raise SystemExit(f'unknown statement dates: {unknown}')
+    rows = [statement_dates.index(d) for d in dates]
+
+    # 所有日期的特徵一次讀取並按股票標準化: (n_dates, n_stocks, n_features)
+    stock_ids, statement_features, _ = load_statements(args.data_dir)
+    inputs = zscore(statement_features[:, rows], axis=0).transpose(1, 0, 2).astype(np.float32)
+
+    attention = infer_attention(args.model, np.ascontiguousarray(inputs), args.workers)
+
+    if args.attention_dir:
+        os.makedirs(args.attention_dir, exist_ok=True)
+        for F_date, matrix in zip(dates, attention):
+            write_attention(attention_path(F_date, args.attention_dir), matrix)
+
+    n_edges = write_edge_store(args.output, np.array(dates, dtype='datetime64[D]'), stock_ids, attention, args.top_k)
+    print(f'{len(dates)} dates x {len(stock_ids)} stocks -> {n_edges} edges written to {args.output} '
+          f'({(time.time() - start_t):.2f}s)')
@@ -66,69 +66,132 @@ class GraphAttentionLayer(nn.Module):
             where || denotes the concatenation operation, and a and W are the learnable parameters.
 
         Args:
-            h_transformed (torch.Tensor): Transformed feature matrix with shape (n_nodes, n_heads, n_hidden),
+            h_transformed (torch.Tensor): Transformed feature matrix with shape (..., n_heads, n_nodes, n_hidden),
                 where n_nodes is the number of nodes and out_features is the number of output features per node.
 
         Returns:
-            torch.Tensor: Attention score matrix with shape (n_heads, n_nodes, n_nodes), where n_nodes is the number of nodes.
+            torch.Tensor: Attention score matrix with shape (..., n_heads, n_nodes, n_nodes), where n_nodes is the number of nodes.
         """
         
         source_scores = torch.matmul(h_transformed, self.a[:, :self.n_hidden, :])
         target_scores = torch.matmul(h_transformed, self.a[:, self.n_hidden:, :])
 
         # broadcast add 
-        # (n_heads, n_nodes, 1) + (n_heads, 1, n_nodes) = (n_heads, n_nodes, n_nodes)
+        # (..., n_heads, n_nodes, 1) + (..., n_heads, 1, n_nodes) = (..., n_heads, n_nodes, n_nodes)
         e = source_scores + target_scores.mT
         return self.leakyrelu(e)
 
-    def forward(self,  h: torch.Tensor, adj_mat: torch.Tensor, return_attention_weights=False):
+    def _get_edge_attention(self, h_transformed: torch.Tensor, edge_index: torch.Tensor):
+        """calculates attention only for the given edges and aggregates the neighbours with a segment softmax,
+        so memory grows with the number of edges instead of n_nodes^2:
+
+            e_ij = LeakyReLU(a^T [Wh_i || Wh_j])            for every edge (i, j)
+            α_ij = exp(e_ij - max_k e_ik) / Σ_k exp(e_ik - max_k e_ik)   over the edges (i, k) of row i
+            h_i' = Σ_j α_ij W h_j
+
+        Args:
+            h_transformed (torch.Tensor): Transformed feature matrix with shape (..., n_heads, n_nodes, n_hidden).
+            edge_index (torch.Tensor): (2, n_edges) long tensor of (i, j) node pairs.
+
+        Returns:
+            tuple: (h_prime, attention) with shapes (..., n_heads, n_nodes, n_hidden) and (..., n_heads, n_edges).
+        """
+        rows, cols = edge_index[0], edge_index[1]
+        node_dim = h_transformed.dim() - 2
+
+        # per-node halves of the attention score, then one score per edge
+        # output shape (..., n_heads, n_nodes) and (..., n_heads, n_edges)
+        source_scores = torch.matmul(h_transformed, self.a[:, :self.n_hidden, :]).squeeze(-1)
+        target_scores = torch.matmul(h_transformed, self.a[:, self.n_hidden:, :]).squeeze(-1)
+        e = self.leakyrelu(source_scores[..., rows] + target_scores[..., cols])
+
+        # segment softmax over the edges of every row; the row maximum only stabilizes exp() and needs no gradient
+        index = rows.expand_as(e)
+        e_max = torch.full_like(source_scores, float('-inf')).scatter_reduce(-1, index, e.detach(), reduce='amax')
+        exp = torch.exp(e - e_max.gather(-1, index))
+        denominator = torch.zeros_like(source_scores).scatter_add(-1, index, exp)
+        attention = exp / denominator.gather(-1, index)
+        attention = F.dropout(attention, self.dropout, training=self.training)
+
+        # weighted sum of the neighbour features of every row
+        messages = attention.unsqueeze(-1) * h_transformed[..., cols, :]
+        h_prime = torch.zeros_like(h_transformed).index_add(node_dim, rows, messages)
+        return h_prime, attention
+
+    def forward(self,  h: torch.Tensor, adj_mat: torch.Tensor = None, return_attention_weights=False, edge_index: torch.Tensor = None):
         """
         Performs a graph attention layer operation.
 
         Args:
-            h (torch.Tensor): Input tensor representing node features.
-            adj_mat (torch.Tensor): Adjacency matrix representing graph structure.
+            h (torch.Tensor): Input tensor representing node features, with shape (n_nodes, in_features) or
+                (batch, n_nodes, in_features) for a batch of graphs (e.g. one per date) sharing the same adjacency.
+            adj_mat (torch.Tensor, optional): Adjacency matrix representing graph structure. A dense matrix masks
+                non-existent edges, a sparse (COO/CSR) matrix uses the edge-list path, and None means a complete
+                graph, for which no mask is built at all.
+            edge_index (torch.Tensor, optional): (2, n_edges) long tensor of (i, j) node pairs. When given, attention
+                is only computed for these edges (node i attends to node j), with memory linear in n_edges.
 
         Returns:
-            torch.Tensor: Output tensor after the graph convolution operation.
+            torch.Tensor: Output tensor after the graph convolution operation. With return_attention_weights, also the
+                attention: a dense (..., n_heads, n_nodes, n_nodes) tensor, or (edge_index, attention) with attention of
+                shape (..., n_heads, n_edges) on the edge-list path.
         """
-        n_nodes = h.shape[0]
+        batch_shape, n_nodes = h.shape[:-2], h.shape[-2]
 
         # Apply linear transformation to node feature -> W h
-        # output shape (n_nodes, n_hidden * n_heads)
+        # output shape (..., n_nodes, n_hidden * n_heads)
         h = h.float()
 
-        h_transformed = torch.mm(h, self.W)
+        h_transformed = torch.matmul(h, self.W)
         h_transformed = F.dropout(h_transformed, self.dropout, training=self.training)
 
-        # splitting the heads by reshaping the tensor and putting heads dim first
-        # output shape (n_heads, n_nodes, n_hidden)
-        h_transformed = h_transformed.view(n_nodes, self.n_heads, self.n_hidden).permute(1, 0, 2)
-        
-        # getting the attention scores
-        # output shape (n_heads, n_nodes, n_nodes)
-        e = self._get_attention_scores(h_transformed)
+        # splitting the heads by reshaping the tensor and putting heads dim before the nodes
+        # output shape (..., n_heads, n_nodes, n_hidden)
+        h_transformed = h_transformed.view(*batch_shape, n_nodes, self.n_heads, self.n_hidden).transpose(-3, -2)
 
-        # Set the attention score for non-existent edges to -9e15 (MASKING NON-EXISTENT EDGES)
-        connectivity_mask = -9e16 * torch.ones_like(e)
-        e = torch.where(adj_mat > 0, e, connectivity_mask) # masked attention scores
-        
-        # attention coefficients are computed as a softmax over the rows
-        # for each column j in the attention score matrix e
-        attention = F.softmax(e, dim=-1)
-        attention = F.dropout(attention, self.dropout, training=self.training)
+        if edge_index is None and adj_mat is not None and adj_mat.layout != torch.strided:
+            edge_index = edge_index_from_adjacency(adj_mat)
+
+        if edge_index is not None:
+            # sparse path: only existing edges get scores
+            h_prime, attention = self._get_edge_attention(h_transformed, edge_index)
+            attention = (edge_index, attention)
+        else:
+            # getting the attention scores
+            # output shape (..., n_heads, n_nodes, n_nodes)
+            e = self._get_attention_scores(h_transformed)
+
+            # Set the attention score for non-existent edges to -9e16 (MASKING NON-EXISTENT EDGES)
+            # a complete graph (adj_mat is None) needs no mask
+            if adj_mat is not None:
+                e = e.masked_fill(adj_mat <= 0, -9e16) # masked attention scores
+            
+            # attention coefficients are computed as a softmax over the rows
+            # for each column j in the attention score matrix e
+            attention = F.softmax(e, dim=-1)
+            attention = F.dropout(attention, self.dropout, training=self.training)
 
-        # final node embeddings are computed as a weighted average of the features of its neighbors
-        h_prime = torch.matmul(attention, h_transformed)
+            # final node embeddings are computed as a weighted average of the features of its neighbors
+            h_prime = torch.matmul(attention, h_transformed)
 
         # concatenating/averaging the attention heads
-        # output shape (n_nodes, out_features)
+        # output shape (..., n_nodes, out_features)
         if self.concat:
-            h_prime = h_prime.permute(1, 0, 2).contiguous().view(n_nodes, self.out_features)
+            h_prime = h_prime.transpose(-3, -2).contiguous().view(*batch_shape, n_nodes, self.out_features)
         else:
-            h_prime = h_prime.mean(dim=0)
+            h_prime = h_prime.mean(dim=-3)
 
         if return_attention_weights:
             return h_prime, attention
         else:
-            return h_prime
\ No newline at end of file
+            return h_prime
+
+
+def edge_index_from_adjacency(adj_mat: torch.Tensor):
+    """
+    Converts a dense or sparse (COO/CSR) adjacency matrix into a (2, n_edges) edge list of its positive entries.
+    """
+    if adj_mat.layout == torch.strided:
+        return (adj_mat > 0).nonzero().t()
+    adj_mat = adj_mat.to_sparse_coo().coalesce()
+    return adj_mat.indices()[:, adj_mat.values() > 0]
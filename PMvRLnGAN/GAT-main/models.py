@@ -54,23 +54,26 @@ class GAT(nn.Module):
             )
         
 
-    def forward(self, input_tensor: torch.Tensor , adj_mat: torch.Tensor):
+    def forward(self, input_tensor: torch.Tensor , adj_mat: torch.Tensor = None, edge_index: torch.Tensor = None):
         """
         Performs a forward pass through the network.
 
         Args:
-            input_tensor (torch.Tensor): Input tensor representing node features.
-            adj_mat (torch.Tensor): Adjacency matrix representing graph structure.
+            input_tensor (torch.Tensor): Input tensor representing node features, with shape (n_nodes, in_features)
+                or (batch, n_nodes, in_features) to run several graphs (dates) in one pass.
+            adj_mat (torch.Tensor, optional): Adjacency matrix representing graph structure (dense or sparse);
+                None for a complete graph.
+            edge_index (torch.Tensor, optional): (2, n_edges) edge list, used instead of adj_mat for sparse graphs.
 
         Returns:
             torch.Tensor: Output tensor after the forward pass.
         """
         # Apply the first Graph Attention layer
-        x = self.gat1(input_tensor, adj_mat)
+        x = self.gat1(input_tensor, adj_mat, edge_index=edge_index)
         x = F.elu(x) # Apply ELU activation function to the output of the first layer
 
         # Apply the second Graph Attention layer
-        x,attn_weights  = self.gat2(x, adj_mat, return_attention_weights=True)
+        x,attn_weights  = self.gat2(x, adj_mat, return_attention_weights=True, edge_index=edge_index)
 
         #return F.log_softmax(x, dim=1),attn_weights # Apply log softmax activation function
         return x , attn_weights # Apply log softmax activation function
@@ -1,4 +1,5 @@
 import os
+import copy
 import time
 import requests
 import tarfile
@@ -6,9 +7,12 @@ import numpy as np
 import argparse
 import pandas as pd
 import glob
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 
 from models import GAT
-from utils import load_cora
+from utils import load_cora, load_statements, graph_inputs
+from checkpoint import AttentionCheckpoint, CHECKPOINT_FORMATS
 import matplotlib.pyplot as plt
 import torch
 from torch import nn
@@ -19,22 +23,31 @@ from torch.optim import Adam
 ### TRAIN AND TEST FUNCTIONS  ###
 #################################
 
-min_loss_val = 0
-
-def test(model, criterion, input, target, mask):
+def evaluate(model, criterion, input, target, masks):
+    # 一次不計算梯度的前向傳播，同時得到多個節點子集（訓練、驗證）的損失
     model.eval()
     with torch.no_grad():
         output , edge= model(*input)
-        output, target = output[mask], target[mask]
         output = output.squeeze(1)
 
-        loss = criterion(output, target)
-    return loss.item()
-    
-def train_iter(epoch, model, optimizer, criterion, input, target, mask_train, mask_val, F_date, print_every=10):
+        losses = [criterion(output[mask], target[mask]).item() for mask in masks]
+    return losses
 
-    global min_loss_val
+def test(model, criterion, input, target, mask):
+    return evaluate(model, criterion, input, target, (mask,))[0]
+
+def is_eval_epoch(epoch, eval_every, epochs=None):
+    # 第一個 epoch 總是評估，用於初始化最小驗證損失；最後一個 epoch 也總是評估，最後的梯度更新才可能成為最佳注意力
+    return epoch == 1 or epoch % eval_every == 0 or epoch == epochs
+
+def is_print_epoch(epoch, prev_eval_epoch, print_every):
+    # 在每個 print_every*10 邊界之後的第一個評估 epoch 打印，eval_every 不整除該間隔時也不會漏掉
+    interval = print_every * 10
+    return epoch // interval > prev_eval_epoch // interval
     
+def train_iter(epoch, model, optimizer, criterion, input, target, mask_train, mask_val, print_every=10, eval_every=1,
+               epochs=None, prev_eval_epoch=0):
+
     start_t = time.time()
     model.train()
     optimizer.zero_grad()
@@ -49,29 +62,246 @@ def train_iter(epoch, model, optimizer, criterion, input, target, mask_train, ma
     loss.backward()
     optimizer.step()
 
+    # 不需要評估的 epoch 只做梯度更新
+    if not is_eval_epoch(epoch, eval_every, epochs):
+        return None, None, edge
+
     # Evaluate the model performance on training and validation sets
-    loss_train = test(model, criterion, input, target, mask_train)
-    loss_val = test(model, criterion, input, target, mask_val)
+    loss_train, loss_val = evaluate(model, criterion, input, target, (mask_train, mask_val))
 
     
-    if epoch % (print_every*10) == 0:
+    if is_print_epoch(epoch, prev_eval_epoch, print_every):
         # Print the training progress at specified intervals
         print(f'Epoch: {epoch:04d} ({(time.time() - start_t):.4f}s) loss_train: {loss_train:.4f}  loss_val: {loss_val:.4f} ')
 
-    if epoch ==1:
-        min_loss_val = loss_val
-        
-    if loss_val <  min_loss_val or epoch == 1:
-        min_loss_val = loss_val
-        numpy_array = edge.detach().numpy()
-        # 重塑numpy_array為二維數組
-        reshaped_array = numpy_array.reshape(-1, numpy_array.shape[2])
-        df = pd.DataFrame(reshaped_array)
-        
-        file_name = f'tensor_epoch_{F_date}.csv'
-        df.to_csv(file_name, index=False)
-        
-    return loss_train, loss_val
+    return loss_train, loss_val, edge
+
+
+def train_graph(model, optimizer, criterion, input, target, masks, F_date, checkpoint, epochs,
+                print_every=10, eval_every=1, dry_run=False):
+    """
+    Trains one statement date and keeps the attention matrix of the epoch with the lowest validation loss.
+
+    Args:
+        masks (tuple): (idx_train, idx_val, idx_test) node indices.
+        F_date (str): statement date, used to name the attention snapshot.
+        checkpoint (AttentionCheckpoint): writer of the best-epoch attention.
+
+    Returns:
+        tuple: (eval_epochs, train_losses, val_losses, loss_test) where the loss lists are aligned with eval_epochs.
+    """
+    idx_train, idx_val, idx_test = masks
+
+    # Initialize lists to store loss values
+    eval_epochs, train_losses, val_losses = [], [], []
+    # 最小驗證損失只屬於當前日期，不再使用全局變量
+    min_loss_val = None
+
+    # Train and evaluate the model
+    for epoch in range(1, epochs + 1):
+        loss_train, loss_val, edge = train_iter(epoch, model, optimizer, criterion, input, target, idx_train, idx_val, print_every, eval_every,
+                                                epochs, eval_epochs[-1] if eval_epochs else 0)
+        if loss_val is not None:
+            eval_epochs.append(epoch)
+            train_losses.append(loss_train)
+            val_losses.append(loss_val)
+
+            if min_loss_val is None or loss_val < min_loss_val:
+                min_loss_val = loss_val
+                # 只在內存中保留最佳的注意力矩陣，該日期訓練結束後再寫入文件
+                checkpoint.update(F_date, edge)
+        if dry_run:
+            break
+
+    # 在背景線程中寫入該日期的最佳注意力矩陣，不阻塞下一個日期的訓練
+    checkpoint.flush(F_date)
+
+    loss_test = test(model, criterion, input, target, idx_test)
+    return eval_epochs, train_losses, val_losses, loss_test
+
+
+def report(F_date, eval_epochs, train_losses, val_losses, loss_test):
+    print(f'{F_date} test set results: loss {loss_test:.4f}')
+
+    # 獲得最小訓練損失及其對應的epoch
+    min_train_loss_epoch = eval_epochs[train_losses.index(min(train_losses))]
+    min_train_loss = min(train_losses)
+
+    # 獲得最小驗證損失及其對應的epoch
+    min_val_loss_epoch = eval_epochs[val_losses.index(min(val_losses))]
+    min_val_loss = min(val_losses)
+
+    print(f"Minimum training loss of {min_train_loss} occurred at epoch {min_train_loss_epoch}.")
+    print(f"Minimum validation loss of {min_val_loss} occurred at epoch {min_val_loss_epoch}.")
+    return {'date': F_date, 'loss_test': loss_test,
+            'min_train_loss': min_train_loss, 'min_train_loss_epoch': min_train_loss_epoch,
+            'min_val_loss': min_val_loss, 'min_val_loss_epoch': min_val_loss_epoch}
+
+
+def graph_losses(output, target, idx):
+    """MSE of every graph in a batch over its own node subset. output: (batch, n_nodes, 1), idx: (batch, k)"""
+    output = torch.gather(output.squeeze(-1), 1, idx)
+    target = torch.gather(target, 1, idx)
+    return ((output - target) ** 2).mean(dim=1)
+
+
+def train_batched(make_model, features, labels, adj_mat, masks, F_dates, epochs, lr, l2, checkpoint,
+                  shared_weights=False, print_every=10, eval_every=1, dry_run=False):
+    """
+    Trains the graphs of all statement dates together, one forward pass per epoch for the whole batch.
+
+    Args:
+        make_model (callable): returns a new GAT on the training device.
+        features (torch.Tensor): (n_graphs, n_nodes, in_features) node features of every date.
+        labels (torch.Tensor): (n_graphs, n_nodes) labels of every date.
+        adj_mat (torch.Tensor): (n_nodes, n_nodes) adjacency matrix shared by all dates, None for a complete graph.
+        masks (tuple): (idx_train, idx_val, idx_test), each a (n_graphs, k) tensor of node indices.
+        F_dates (list): statement date of every graph, used to name the attention snapshots.
+        checkpoint (AttentionCheckpoint): writer of the best-epoch attention of every date.
+        shared_weights (bool): train one model on all dates instead of an independent model per date.
+        eval_every (int): evaluate every eval_every epochs (and on the first and the last one).
+
+    Returns:
+        tuple: (eval_epochs, train_losses, val_losses, test_losses) where eval_epochs lists the evaluated epochs,
+            train_losses and val_losses have shape (len(eval_epochs), n_graphs) and test_losses (n_graphs,).
+    """
+    # torch.func 需要 torch >= 2.0，只在批量模式中導入，其他模式仍可在 torch 1.13 上運行
+    from torch.func import stack_module_state, functional_call, vmap
+
+    n_graphs = len(F_dates)
+    idx_train, idx_val, idx_test = masks
+
+    if shared_weights:
+        model = make_model()
+        parameters = list(model.parameters())
+        forward = model
+    else:
+        # 每個日期一個獨立的模型，參數沿第一維堆疊後以 vmap 一次計算所有日期
+        models = [make_model() for _ in range(n_graphs)]
+        params, buffers = stack_module_state(models)
+        model = copy.deepcopy(models[0]).to('meta')
+        batched = vmap(lambda p, b, x, adj: functional_call(model, (p, b), (x, adj)),
+                       in_dims=(0, 0, 0, None), randomness='different')
+        parameters = list(params.values())
+        forward = lambda x, adj: batched(params, buffers, x, adj)
+
+    # Adam 和 weight decay 都是逐元素的，堆疊後的參數與分別訓練每個模型等價
+    optimizer = Adam(parameters, lr=lr, weight_decay=l2)
+
+    def evaluate():
+        model.eval()
+        with torch.no_grad():
+            output, edge = forward(features, adj_mat)
+        return output, edge
+
+    eval_epochs, train_losses, val_losses = [], [], []
+    min_loss_val = torch.full((n_graphs,), float('inf'), device=features.device)
+    best_edge = None
+
+    for epoch in range(1, epochs + 1):
+        start_t = time.time()
+        model.train()
+        optimizer.zero_grad()
+
+        output, _ = forward(features, adj_mat)
+        losses = graph_losses(output, labels, idx_train)
+        # 獨立模型時對各日期的損失求和，使每個模型只得到自己日期的梯度
+        loss = losses.mean() if shared_weights else losses.sum()
+        loss.backward()
+        optimizer.step()
+
+        if not is_eval_epoch(epoch, eval_every, epochs):
+            continue
+
+        output, edge = evaluate()
+        loss_train = graph_losses(output, labels, idx_train)
+        loss_val = graph_losses(output, labels, idx_val)
+        prev_eval_epoch = eval_epochs[-1] if eval_epochs else 0
+        eval_epochs.append(epoch)
+        train_losses.append(loss_train)
+        val_losses.append(loss_val)
+
+        if is_print_epoch(epoch, prev_eval_epoch, print_every):
+            print(f'Epoch: {epoch:04d} ({(time.time() - start_t):.4f}s) loss_train: {loss_train.mean():.4f}  loss_val: {loss_val.mean():.4f} (mean of {n_graphs} dates)')
+
+        # 每個日期分別保留驗證損失最小時的注意力矩陣
+        improved = loss_val < min_loss_val
+        min_loss_val = torch.where(improved, loss_val, min_loss_val)
+        best_edge = edge.clone() if best_edge is None else torch.where(improved.view(-1, 1, 1, 1), edge, best_edge)
+
+        if dry_run:
+            break
+
+    output, _ = evaluate()
+    test_losses = graph_losses(output, labels, idx_test)
+
+    for b, F_date in enumerate(F_dates):
+        checkpoint.update(F_date, best_edge[b])
+        checkpoint.flush(F_date)
+
+    return eval_epochs, torch.stack(train_losses).cpu(), torch.stack(val_losses).cpu(), test_losses.cpu()
+
+
+#################################
+###   PARALLEL PER-DATE MODE  ###
+#################################
+
+def build_model(args, device):
+    # The model consists of a 2-layer stack of Graph Attention Layers (GATs).
+    return GAT(
+        in_features=25,#features.shape[1],          # Number of input features per node
+        n_hidden=args.hidden_dim,               # Output size of the first Graph Attention Layer
+        n_heads=args.num_heads,                 # Number of attention heads in the first Graph Attention Layer
+        num_classes=1,#labels.max().item() + 1,    # Number of classes to predict for each node
+        concat=args.concat_heads,               # Wether to concatinate attention heads
+        dropout=args.dropout_p,                 # Dropout rate
+        leaky_relu_slope=0.2                    # Alpha (slope) of the leaky relu activation
+    ).to(device)
+
+
+def date_seed(seed, F_date):
+    """Derives the seed of one date from --seed, so a date trains identically whatever the worker and run order."""
+    return int(np.random.SeedSequence([seed, int(np.datetime64(F_date, 'D').astype(np.int64))]).generate_state(1)[0])
+
+
+# 每個工作進程只讀取一次財報數據
+_worker_statements = None
+
+
+def init_worker(data_dir, num_threads):
+    global _worker_statements
+    # 限制每個進程的線程數，避免多個進程爭搶 CPU 核心
+    torch.set_num_threads(num_threads)
+    _worker_statements = load_statements(data_dir)
+
+
+def train_date(args, graph, F_date):
+    """
+    Trains one statement date from scratch in a worker process, on the CPU.
+
+    The date gets its own model, optimizer and node split, all drawn from date_seed(args.seed, F_date), and its best
+    attention matrix is written to args.output_dir.
+
+    Returns:
+        tuple: (eval_epochs, train_losses, val_losses, loss_test) as returned by train_graph.
+    """
+    _, statement_features, statement_labels = _worker_statements
+    device = torch.device('cpu')
+    torch.manual_seed(date_seed(args.seed, F_date))
+
+    features, labels, _ = graph_inputs(statement_features, statement_labels, graph, device)
+    idx = torch.randperm(len(labels))
+    masks = idx[:60], idx[60:68], idx[68:]
+
+    model = build_model(args, device)
+    optimizer = Adam(model.parameters(), lr=args.lr, weight_decay=args.l2)
+    checkpoint = AttentionCheckpoint(args.output_dir, args.checkpoint_format)
+    try:
+        # 所有股票之間都有邊（全連接圖），不傳鄰接矩陣以跳過注意力遮罩
+        return train_graph(model, optimizer, nn.MSELoss(), (features, None), labels, masks, F_date, checkpoint,
+                           args.epochs, args.val_every, args.eval_every, args.dry_run)
+    finally:
+        checkpoint.close()
 
 
 if __name__ == '__main__':
@@ -96,6 +326,8 @@ if __name__ == '__main__':
                         help='wether to concatinate attention heads, or average over them (default: False)')
     parser.add_argument('--val-every', type=int, default=20,
                         help='epochs to wait for print training and validation evaluation (default: 20)')
+    parser.add_argument('--eval-every', type=int, default=1,
+                        help='evaluate training and validation loss (and keep the best attention) every N epochs and on the last one (default: 1)')
     parser.add_argument('--no-cuda', action='store_true', default=False,
                         help='disables CUDA training')
     parser.add_argument('--no-mps', action='store_true', default=False,
@@ -104,6 +336,18 @@ if __name__ == '__main__':
                         help='quickly check a single pass')
     parser.add_argument('--seed', type=int, default=13, metavar='S',
                         help='random seed (default: 13)')
+    parser.add_argument('--checkpoint-format', type=str, default='npy', choices=CHECKPOINT_FORMATS,
+                        help='file format of the best-epoch attention matrices (default: npy)')
+    parser.add_argument('--output-dir', type=str, default='.',
+                        help='directory of the tensor_epoch_{date} files (default: .)')
+    parser.add_argument('--batched', action='store_true', default=False,
+                        help='train the graphs of all dates together in one forward pass per epoch (requires torch >= 2.0)')
+    parser.add_argument('--shared-weights', action='store_true', default=False,
+                        help='with --batched, train one model on all dates instead of one model per date')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='train every date with its own model in N CPU worker processes, seeded from --seed and the date (default: 0, train one shared model sequentially)')
+    parser.add_argument('--threads-per-worker', type=int, default=None,
+                        help='torch threads of every worker process (default: CPU cores / workers)')
     args = parser.parse_args()
 
     torch.manual_seed(args.seed)
@@ -119,138 +363,83 @@ if __name__ == '__main__':
         device = torch.device('cpu')
     print(f'Using {device} device')
 
-    def read_data(file_paths,index):
-        feature_cols = ["CostOfGoodsSold",	
-                        "EPS",
-                        "IncomeAfterTaxes",
-                        "IncomeFromContinuingOperations",
-                        "OtherComprehensiveIncome",
-                        "Revenue",	
-                        "TAX",
-                        "TotalConsolidatedProfitForThePeriod",
-                        "CapitalStock",		
-                        "CapitalSurplus",		
-                        "CashAndCashEquivalents",	
-                        "CurrentAssets",	
-                        "Equity",	
-                        "NoncurrentAssets",	
-                        "NoncurrentLiabilities",	
-                        "OrdinaryShare",	
-                        "OtherCurrentLiabilities",	
-                        "OtherEquityInterest",	
-                        "RetainedEarnings",	
-                        "TotalAssets",	
-                        "CashBalancesBeginningOfPeriod",	
-                        "CashBalancesEndOfPeriod",	
-                        "Depreciation",	
-                        "PayTheInterest",	
-                        "PropertyAndPlantAndEquipment" ]
-                        
-        label_cols = ["sharpe_ratio"]
-        
-        feature = pd.DataFrame()
-        label = pd.DataFrame()
-        
-        file_paths.sort()  # 确保文件按字母顺序读取
-        
-        feature_tensor = torch.tensor([], dtype=torch.float)  # 初始化为空Tensor
-        label_tensor = torch.tensor([], dtype=torch.float)  # 初始化为空Tensor
-        adj_mat = torch.tensor([], dtype=torch.float)  # 如果你需要重新初始化adj_mat
-    
-    
-        for files in file_paths:
-            for f in files:
-                feature_csv = pd.read_csv(f, usecols=feature_cols).iloc[index:index+1]
-                feature = pd.concat([feature, feature_csv], ignore_index=True)
-                
-                label_csv = pd.read_csv(f, usecols=label_cols).iloc[index:index+1]
-                label = pd.concat([label, label_csv], ignore_index=True)
-        
-        #for col in feature_cols:
-        #    feature[col] = (feature[col] - feature[col].min()) / (feature[col].max() - feature[col].min())
-        #for col in label_cols:
-        #    label[col] = (label[col] - label[col].min()) / (label[col].max() - label[col].min())
-    
-        for col in feature_cols:
-            feature[col] = (feature[col] - feature[col].mean()) / feature[col].std()
-        for col in label_cols:
-            label[col] = (label[col] - label[col].mean()) / label[col].std()
-    
-        feature_tensor = torch.tensor(feature.values.astype(float))
-        
-        label_tensor = torch.tensor(label.values.astype(float)).squeeze()
-        
-        adj_mat = torch.ones((74, 74))
-    
-        return feature_tensor,label_tensor,adj_mat
- 
-
-    file_paths = [glob.glob("./data/*.csv")]
+    # 每個股票的財報文件只讀取一次，之後每個圖只是張量的一個切片
+    stock_ids, statement_features, statement_labels = load_statements('./data')
+    print(f'Loaded {len(stock_ids)} stocks x {statement_features.shape[1]} statement dates')
     
     with open('date.txt', 'r') as file:
         date = file.readlines()  # 读取所有行到一个列表中
 
     # Create the model
-    # The model consists of a 2-layer stack of Graph Attention Layers (GATs).
-    gat_net = GAT(
-        in_features=25,#features.shape[1],          # Number of input features per node  
-        n_hidden=args.hidden_dim,               # Output size of the first Graph Attention Layer
-    	n_heads=args.num_heads,                 # Number of attention heads in the first Graph Attention Layer
-    	num_classes=1,#labels.max().item() + 1,    # Number of classes to predict for each node
-    	concat=args.concat_heads,               # Wether to concatinate attention heads
-    	dropout=args.dropout_p,                 # Dropout rate
-    	leaky_relu_slope=0.2                    # Alpha (slope) of the leaky relu activation
-    ).to(device)
-    
-    # configure the optimizer and loss function
-    optimizer = Adam(gat_net.parameters(), lr=args.lr, weight_decay=args.l2)
-    criterion = nn.MSELoss()
-    
-    for graph in range(1,45):
-    
+    def make_model():
+        return build_model(args, device)
+
+    def graph_date(graph):
         if graph <= len(date):
             F_date = date[graph].strip()  # 使用strip()去除可能的前后空白字符，包括换行符
             print(f"第{graph}筆的資料: {F_date}")
         else:
             F_date=''
             print(f"第{graph}筆的資料不存在。")
+        return F_date
 
-        features, labels, adj_mat = read_data(file_paths,graph)#2
-        
-        idx = torch.randperm(len(labels)).to(device)
-        #idx_train, idx_val, idx_test = idx[:3], idx[3:4], idx[4:]
-        idx_train, idx_val, idx_test = idx[:60], idx[60:68], idx[68:]
-        
-        features = features.float()
-        adj_mat = adj_mat.float()
-        labels = labels.float()
-        
-        # Initialize lists to store loss values
-        train_losses = []
-        val_losses = []
-        
-        min_loss_val = 0
+    graphs = range(1,45)
+    checkpoint = AttentionCheckpoint(args.output_dir, args.checkpoint_format)
 
-        # Train and evaluate the model
-        for epoch in range(args.epochs):
-            loss_train, loss_val = train_iter(epoch + 1, gat_net, optimizer, criterion, (features, adj_mat), labels, idx_train, idx_val, F_date , args.val_every)
-            train_losses.append(loss_train)
-            val_losses.append(loss_val)
-            if args.dry_run:
-                break
-        
-        
-        loss_test = test(gat_net, criterion, (features, adj_mat), labels, idx_test)
-        #print(gat_net)
-        print(f'Test set results: loss {loss_test:.4f}')
-        
-        # 獲得最小訓練損失及其對應的epoch
-        min_train_loss_epoch = train_losses.index(min(train_losses)) + 1  # 索引+1，因為epoch從1開始
-        min_train_loss = min(train_losses)
-        
-        # 獲得最小驗證損失及其對應的epoch
-        min_val_loss_epoch = val_losses.index(min(val_losses)) + 1  # 索引+1，因為epoch從1開始
-        min_val_loss = min(val_losses)
+    if args.batched:
+        # 所有日期的圖一起訓練：節點特徵堆疊為 (日期數, 節點數, 特徵數)，共享全連接的鄰接矩陣
+        F_dates = [graph_date(graph) for graph in graphs]
+        inputs = [graph_inputs(statement_features, statement_labels, graph, device) for graph in graphs]
+        features = torch.stack([f for f, _, _ in inputs])
+        labels = torch.stack([l for _, l, _ in inputs])
+        # 所有股票之間都有邊（全連接圖），不傳鄰接矩陣以跳過注意力遮罩
+        adj_mat = None
+
+        idx = torch.stack([torch.randperm(labels.shape[1]) for _ in graphs]).to(device)
+        masks = idx[:, :60], idx[:, 60:68], idx[:, 68:]
+
+        eval_epochs, train_losses, val_losses, test_losses = train_batched(
+            make_model, features, labels, adj_mat, masks, F_dates, args.epochs, args.lr, args.l2, checkpoint,
+            args.shared_weights, args.val_every, args.eval_every, args.dry_run)
+
+        for b, F_date in enumerate(F_dates):
+            print(f"{F_date}: test loss {test_losses[b]:.4f}, "
+                  f"minimum training loss of {train_losses[:, b].min():.4f} occurred at epoch {eval_epochs[train_losses[:, b].argmin()]}, "
+                  f"minimum validation loss of {val_losses[:, b].min():.4f} occurred at epoch {eval_epochs[val_losses[:, b].argmin()]}.")
+    elif args.workers > 0:
+        # 每個日期在工作進程中用自己的模型和種子獨立訓練，結果與進程數和完成順序無關
+        threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+        F_dates = [graph_date(graph) for graph in graphs]
+        summary = []
+        with ProcessPoolExecutor(args.workers, mp_context=mp.get_context('spawn'),
+                                 initializer=init_worker, initargs=('./data', threads)) as pool:
+            futures = [pool.submit(train_date, args, graph, F_date) for graph, F_date in zip(graphs, F_dates)]
+            for F_date, future in zip(F_dates, futures):
+                summary.append(report(F_date, *future.result()))
+
+        summary_path = os.path.join(args.output_dir, 'train_summary.csv')
+        pd.DataFrame(summary).to_csv(summary_path, index=False)
+        print(f'Summary of {len(summary)} dates written to {summary_path}')
+    else:
+        gat_net = make_model()
+    
+        # configure the optimizer and loss function
+        optimizer = Adam(gat_net.parameters(), lr=args.lr, weight_decay=args.l2)
+        criterion = nn.MSELoss()
+    
+        for graph in graphs:
+    
+            F_date = graph_date(graph)
+
+            features, labels, _ = graph_inputs(statement_features, statement_labels, graph, device)
+            # 所有股票之間都有邊（全連接圖），不傳鄰接矩陣以跳過注意力遮罩
+            adj_mat = None
         
-        print(f"Minimum training loss of {min_train_loss} occurred at epoch {min_train_loss_epoch}.")
-        print(f"Minimum validation loss of {min_val_loss} occurred at epoch {min_val_loss_epoch}.")
\ No newline at end of file
+            idx = torch.randperm(len(labels)).to(device)
+            #idx_train, idx_val, idx_test = idx[:3], idx[3:4], idx[4:]
+            masks = idx[:60], idx[60:68], idx[68:]
+
+            report(F_date, *train_graph(gat_net, optimizer, criterion, (features, adj_mat), labels, masks, F_date, checkpoint,
+                                        args.epochs, args.val_every, args.eval_every, args.dry_run))
+
+    checkpoint.close()
@@ -1,8 +1,10 @@
 import os
+import glob
 import time
 import requests
 import tarfile
 import numpy as np
+import pandas as pd
 import argparse
 
 import torch
@@ -52,4 +54,99 @@ def load_cora(path='./cora', device='cpu'):
     adj_mat = torch.eye(V) + adj_mat # Add self-loops to the adjacency matrix
 
     # return features.to_sparse().to(device), labels.to(device), adj_mat.to_sparse().to(device)
-    return features.to(device), labels.to(device), adj_mat.to(device)
\ No newline at end of file
+    return features.to(device), labels.to(device), adj_mat.to(device)
+
+#######################################
+### LOADING THE FINANCIAL STATEMENTS ###
+#######################################
+
+FEATURE_COLS = ["CostOfGoodsSold",
+                "EPS",
+                "IncomeAfterTaxes",
+                "IncomeFromContinuingOperations",
+                "OtherComprehensiveIncome",
+                "Revenue",
+                "TAX",
+                "TotalConsolidatedProfitForThePeriod",
+                "CapitalStock",
+                "CapitalSurplus",
+                "CashAndCashEquivalents",
+                "CurrentAssets",
+                "Equity",
+                "NoncurrentAssets",
+                "NoncurrentLiabilities",
+                "OrdinaryShare",
+                "OtherCurrentLiabilities",
+                "OtherEquityInterest",
+                "RetainedEarnings",
+                "TotalAssets",
+                "CashBalancesBeginningOfPeriod",
+                "CashBalancesEndOfPeriod",
+                "Depreciation",
+                "PayTheInterest",
+                "PropertyAndPlantAndEquipment"]
+
+LABEL_COLS = ["sharpe_ratio"]
+
+# 緩存已讀取的財報張量，鍵為數據目錄
+_statements = {}
+
+
+def load_statements(path='./data'):
+    """
+    Reads every per-stock financial statement CSV exactly once.
+
+    Files are read in sorted order, so stock i is node i of every graph (the same order train.py has always used).
+    Stocks with fewer rows than the longest file are padded with NaN.
+
+    Returns:
+        tuple: (stock_ids, features, labels) where features is a float32 array of shape
+            (n_stocks, n_dates, n_features) and labels has shape (n_stocks, n_dates).
+    """
+    if path in _statements:
+        return _statements[path]
+
+    file_paths = sorted(glob.glob(os.path.join(path, '*.csv')))
+    frames = [pd.read_csv(f, usecols=FEATURE_COLS + LABEL_COLS) for f in file_paths]
+    n_dates = max(len(df) for df in frames)
+
+    features = np.full((len(frames), n_dates, len(FEATURE_COLS)), np.nan, dtype=np.float32)
+    labels = np.full((len(frames), n_dates), np.nan, dtype=np.float32)
+    for i, df in enumerate(frames):
+        features[i, :len(df)] = df[FEATURE_COLS].to_numpy(dtype=np.float32)
+        labels[i, :len(df)] = df[LABEL_COLS[0]].to_numpy(dtype=np.float32)
+
+    stock_ids = np.array([os.path.splitext(os.path.basename(f))[0] for f in file_paths])
+    _statements[path] = (stock_ids, features, labels)
+    return _statements[path]
+
+
+def zscore(values, axis=0):
+    """
+    Standardizes values along `axis` ignoring NaN, with the sample standard deviation (same as pandas' std).
+    """
+    values = values.astype(np.float64)
+    mean = np.nanmean(values, axis=axis, keepdims=True)
+    std = np.nanstd(values, axis=axis, ddof=1, keepdims=True)
+    return (values - mean) / std
+
+
+def graph_inputs(features, labels, index, device='cpu'):
+    """
+    Builds the inputs of one graph (one statement date): every stock's features and label on that date,
+    standardized across stocks, with a fully connected adjacency matrix.
+
+    Args:
+        features (np.ndarray): (n_stocks, n_dates, n_features) array from load_statements.
+        labels (np.ndarray): (n_stocks, n_dates) array from load_statements.
+        index (int): date index (row of the statement CSV files).
+
+    Returns:
+        tuple: (features, labels, adj_mat) float tensors of shape (n_stocks, n_features), (n_stocks,)
+            and (n_stocks, n_stocks).
+    """
+    n_stocks = features.shape[0]
+    feature_tensor = torch.tensor(zscore(features[:, index]), dtype=torch.float, device=device)
+    label_tensor = torch.tensor(zscore(labels[:, index]), dtype=torch.float, device=device)
+    adj_mat = torch.ones((n_stocks, n_stocks), device=device)
+    return feature_tensor, label_tensor, adj_mat
@@ -0,0 +1,56 @@
+import time
+import argparse
+import numpy
+
+from tcnae import TCNAE
+
+
+class DuplicatedEncoderTCNAE(TCNAE):
+    """The TCN-AE as built by older versions: a second 'tcn-enc' block on the input whose output is thrown away."""
+
+    def build_encoder(self, i):
+        self.tcn_block('tcn-enc')(i)
+        return super().build_encoder(i)
+
+
+def benchmark(model_class, X, epochs=2, batch_size=256, **kwargs):
+    """Returns (build seconds, parameters, fit windows/s) of one TCN-AE configuration."""
+    start = time.time()
+    tcn_ae = model_class(ts_dimension=X.shape[-1], verbose=0, **kwargs)
+    build_time = time.time() - start
+
+    # 第一個 epoch 包含圖追蹤（和 XLA 編譯）的時間，只計算之後的 epoch
+    tcn_ae.model.fit(X, X, batch_size=batch_size, epochs=1, verbose=0)
+    start = time.time()
+    tcn_ae.model.fit(X, X, batch_size=batch_size, epochs=epochs, verbose=0)
+    throughput = epochs * len(X) / (time.time() - start)
+    return build_time, tcn_ae.model.count_params(), throughput
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Build time and fit throughput of TCN-AE configurations on random windows')
+    parser.add_argument('--windows', type=int, default=4096,
+                        help='number of random (20, 117) windows (default: 4096)')
+    parser.add_argument('--epochs', type=int, default=2,
+                        help='timed epochs per configuration (default: 2)')
+    parser.add_argument('--batch-size', type=int, default=256,
+                        help='training batch size (default: 256)')
+    parser.add_argument('--filters', type=int, default=20,
+                        help='number of encoded features (default: 20)')
+    args = parser.parse_args()
+
+    X = numpy.random.default_rng(0).random((args.windows, 20, 117), dtype=numpy.float32)
+
+    configurations = [
+        ('duplicated tcn-enc (old)', DuplicatedEncoderTCNAE, {}),
+        ('single tcn-enc', TCNAE, {}),
+        ('single tcn-enc, jit_compile', TCNAE, {'jit_compile': True}),
+        ('single tcn-enc, mixed_bfloat16', TCNAE, {'mixed_precision': 'mixed_bfloat16'}),
+    ]
+
+    print(f"{'configuration':<34}{'build (s)':>10}{'parameters':>12}{'windows/s':>12}")
+    for name, model_class, kwargs in configurations:
+        build_time, n_params, throughput = benchmark(model_class, X, args.epochs, args.batch_size,
+                                                     filters_conv1d=args.filters, **kwargs)
+        print(f'{name:<34}{build_time:>10.2f}{n_params:>12}{throughput:>12.0f}')
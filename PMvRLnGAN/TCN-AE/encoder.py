@@ -0,0 +1,184 @@
+import os
+import time
+import argparse
+import numpy
+import pandas
+import tensorflow
+from tensorflow.keras.models import Model
+
+# 與網站 adapters/feature_store.py 相同的特徵存儲文件格式
+FEATURES_FILE = 'features.npy'
+DATES_FILE = 'dates.npy'
+TICKERS_FILE = 'tickers.npy'
+
+
+def store_tickers(stock_ids):
+    # 網站的股票代碼不帶 .TW 後綴
+    return pandas.Series(stock_ids).astype(str).str.replace('.TW', '', regex=False).to_numpy(dtype=str)
+
+
+class TCNEncoder:
+    """
+    The encoder half of a trained TCN-AE, built once and reused for every prediction.
+
+    Attributes
+    ----------
+    model : tensorflow.keras.models.Model
+        Sub-model from the TCN-AE input to the pooled encoding; it shares the layers (and weights) of the TCN-AE.
+    n_codings : int
+        Number of encoded features per window (filters_conv1d of the TCN-AE).
+    """
+
+    def __init__(self, tcnae, use_tf_function=True):
+        """
+        Parameters
+        ----------
+        tcnae : TCNAE
+            The (trained) TCN-AE.
+        use_tf_function : bool
+            Compile the forward pass as a tf.function with an input signature that leaves the batch size and
+            the window length open (like the TCN-AE input), so it is traced only once for any window length.
+        """
+        self.model = Model(inputs=tcnae.model.inputs, outputs=[tcnae.enc_out])
+        self.n_codings = tcnae.filters_conv1d
+        self.ts_dimension = tcnae.ts_dimension
+
+        forward = lambda x: self.model(x, training=False)
+        if use_tf_function:
+            signature = [tensorflow.TensorSpec((None, None, self.ts_dimension), tensorflow.float32)]
+            forward = tensorflow.function(forward, input_signature=signature)
+        self._forward = forward
+
+    def __call__(self, X):
+        """Encodes one batch of windows, shape (n, window_length, ts_dimension) -> (n, steps, n_codings)."""
+        return self._forward(tensorflow.convert_to_tensor(X, dtype=tensorflow.float32)).numpy()
+
+    def predict(self, X, batch_size=4096):
+        """Encodes an array of windows batch by batch; only the (small) encoded output is kept for all windows."""
+        if len(X) == 0:
+            return numpy.zeros((0, 1, self.n_codings), dtype=numpy.float32)
+        return numpy.concatenate([self(X[lo:lo + batch_size]) for lo in range(0, len(X), batch_size)])
+
+    def encode_batches(self, batches):
+        """Encodes a stream of (index, windows) batches, e.g. SlidingWindows.batches().
+
+        Yields
+        ------
+        tuple
+            (index, codings) where codings has shape (n, n_codings) (the last encoded step of every window).
+        """
+        for index, X in batches:
+            yield index, self(X)[:, -1, :]
+
+    def write_feature_store(self, windows, path='feature_store', batch_size=4096, csv_path=None, verbose=1):
+        """Encodes all windows and writes the codings straight into a memory-mapped feature store.
+
+        The store is the dates x tickers x n_codings float32 array read by the web application (missing
+        (date, stock) pairs are NaN). Every file is written to a temporary file and renamed, so no file is read
+        half-written, but the three files are replaced one after the other: a reader that opens the store
+        in between can see the new dates with the old features (the web application rejects such a store
+        because the shapes do not match, and reloads it once features.npy, replaced last, changes).
+
+        Parameters
+        ----------
+        windows : SlidingWindows
+            Windows to encode; the codings of a window belong to the date and stock of its last day.
+        path : str
+            Feature store directory.
+        batch_size : int
+            Windows per forward pass; peak memory is one batch, not the full history.
+        csv_path : str
+            If given, also stream the codings as tcn_daily_trade_info.csv rows (date, tic, close, coding1...).
+
+        Returns
+        -------
+        tuple
+            Shape (n_dates, n_tickers, n_codings) of the store.
+        """
+        start = time.time()
+        index = windows.index
+        dates, date_codes = numpy.unique(index['date'].to_numpy().astype('datetime64[D]'), return_inverse=True)
+        tickers, ticker_codes = numpy.unique(store_tickers(index['stock_id']), return_inverse=True)
+
+        os.makedirs(path, exist_ok=True)
+        features_path = os.path.join(path, FEATURES_FILE)
+        features = numpy.lib.format.open_memmap(features_path + '.tmp', mode='w+', dtype=numpy.float32,
+                                                shape=(len(dates), len(tickers), self.n_codings))
+        features[:] = numpy.nan
+
+        columns = ['coding{}'.format(i + 1) for i in range(self.n_codings)]
+        header = True
+        offset = 0
+        for batch_index, codings in self.encode_batches(windows.batches(batch_size)):
+            rows = slice(offset, offset + len(codings))
+            features[date_codes[rows], ticker_codes[rows]] = codings
+            offset += len(codings)
+
+            if csv_path is not None:
+                out = pandas.DataFrame({'date': batch_index['date'].to_numpy(),
+                                        'tic': batch_index['stock_id'].to_numpy(),
+                                        'close': batch_index['close_o'].to_numpy() if 'close_o' in batch_index else numpy.nan})
+                out[columns] = codings
+                out.to_csv(csv_path, mode='w' if header else 'a', header=header, index=False)
+                header = False
+            if verbose > 1:
+                print("> encoded {}/{} windows".format(offset, len(index)))
+
+        features.flush()
+        shape = features.shape
+        del features
+
+        # 特徵數組最後替換，確保其修改時間不早於索引文件
+        for name, array in ((DATES_FILE, dates), (TICKERS_FILE, tickers)):
+            target = os.path.join(path, name)
+            with open(target + '.tmp', 'wb') as f:
+                numpy.save(f, array)
+            os.replace(target + '.tmp', target)
+        os.replace(features_path + '.tmp', features_path)
+
+        if verbose > 0:
+            print("> Feature store {} written to {} in {} seconds.".format(shape, path, round(time.time() - start)))
+        return shape
+
+
+if __name__ == '__main__':
+    import joblib
+    from tcnae import TCNAE
+    from windows import SlidingWindows
+
+    parser = argparse.ArgumentParser(description='Encode the daily trading data with a trained TCN-AE into the feature store')
+    parser.add_argument('--data', type=str, default='output_original_data.csv',
+                        help='daily data with date, stock_id and the 117 feature columns (default: output_original_data.csv)')
+    parser.add_argument('--scaler', type=str, default='tcnae_minmax_scaler.pkl',
+                        help='fitted MinMaxScaler of the features (default: tcnae_minmax_scaler.pkl)')
+    parser.add_argument('--weights', type=str, default='tcn_20_model.h5',
+                        help='trained TCN-AE weights (default: tcn_20_model.h5)')
+    parser.add_argument('--filters', type=int, default=20,
+                        help='number of encoded features of the model (default: 20)')
+    parser.add_argument('--start', type=str, default=None,
+                        help='only encode windows ending on or after this date (default: all)')
+    parser.add_argument('--store', type=str, default='feature_store',
+                        help='feature store directory (default: feature_store)')
+    parser.add_argument('--csv', type=str, default=None,
+                        help='also write the codings as CSV, e.g. tcn_daily_trade_info.csv (default: none)')
+    parser.add_argument('--batch-size', type=int, default=4096,
+                        help='windows per forward pass (default: 4096)')
+    args = parser.parse_args()
+
+    original_data = pandas.read_csv(args.data)
+    feature_names = list(original_data.columns[3:])
+    scaler = joblib.load(args.scaler)
+
+    df_feature = pandas.DataFrame(scaler.transform(original_data[feature_names]).astype(numpy.float32),
+                                  index=original_data.index, columns=feature_names)
+    df_feature["stock_id"] = original_data['stock_id']
+    df_feature["close_o"] = original_data['CLOSE_O']
+    df_feature["date"] = pandas.to_datetime(original_data['date'])
+
+    tcn_ae = TCNAE(ts_dimension=len(feature_names), filters_conv1d=args.filters, verbose=0)
+    tcn_ae.model.load_weights(args.weights)
+
+    windows = SlidingWindows.from_frame(df_feature, feature_names, window_length=tcn_ae.latent_sample_rate)
+    if args.start:
+        windows = windows.between(args.start)
+    tcn_ae.encoder().write_feature_store(windows, args.store, args.batch_size, args.csv, verbose=2)
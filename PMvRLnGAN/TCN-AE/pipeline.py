@@ -0,0 +1,47 @@
+import numpy
+import tensorflow
+
+
+def make_dataset(windows, batch_size=256, shuffle=True, shuffle_buffer=65536, seed=None, autoencoder=True):
+    """Builds a tf.data pipeline that reads TCN-AE windows batch by batch.
+
+    Only the window positions go through the pipeline. Each batch is gathered from the (memory-mapped) float32
+    feature array of `windows` in parallel map calls and prefetched, so the full set of windows never has to
+    be in RAM.
+
+    Parameters
+    ----------
+    windows : SlidingWindows
+        The windows, e.g. SlidingWindows.load(path) for a memory-mapped store.
+    batch_size : int
+        Windows per batch (default is 256).
+    shuffle : bool
+        Shuffle the windows each epoch (default is True; use False for validation and prediction).
+    shuffle_buffer : int
+        Size of the shuffle buffer of window positions (default is 65536).
+    seed : int
+        Seed of the shuffle (default is None).
+    autoencoder : bool
+        Yield (X, X) pairs for training the autoencoder instead of X only (default is True).
+
+    Returns
+    -------
+    tensorflow.data.Dataset
+    """
+    window_shape = windows.view.shape[1:]
+
+    def gather(starts):
+        # 從內存映射的特徵數組中只讀取這一批窗口
+        return numpy.take(windows.view, starts, axis=0).astype(numpy.float32, copy=False)
+
+    def load_batch(starts):
+        X = tensorflow.numpy_function(gather, [starts], tensorflow.float32)
+        X.set_shape((None,) + window_shape)
+        return (X, X) if autoencoder else X
+
+    dataset = tensorflow.data.Dataset.from_tensor_slices(numpy.asarray(windows.starts, dtype=numpy.int64))
+    if shuffle:
+        dataset = dataset.shuffle(min(shuffle_buffer, max(len(windows), 1)), seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size) \
+        .map(load_batch, num_parallel_calls=tensorflow.data.AUTOTUNE) \
+        .prefetch(tensorflow.data.AUTOTUNE)
@@ -1,4 +1,5 @@
 import utilities
+from encoder import TCNEncoder
 import numpy
 from tcn import TCN
 import time
@@ -10,10 +11,10 @@ from tensorflow.keras.layers import UpSampling1D
 from tensorflow.keras.layers import AveragePooling1D
 from tensorflow.keras.layers import MaxPooling1D
 from tensorflow.keras import optimizers
-from tensorflow.keras.callbacks import EarlyStopping
+from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint, BackupAndRestore
 from tensorflow.keras.models import Model
 import pandas
-from keras.callbacks import ModelCheckpoint
+from pipeline import make_dataset
 
 class TCNAE:
     """
@@ -30,9 +31,14 @@ class TCNAE:
     -------
     build_model(verbose = 1)
         Builds the model
+    build_encoder(i), build_decoder(z)
+        Build the encoder and decoder parts of the model
+    encoder(use_tf_function = True)
+        Returns the cached encoder sub-model
     """
     
     model = None
+    _encoders = None
     
     def __init__(self,
                  ts_dimension = 117,#一天有多少個特徵
@@ -52,6 +58,10 @@ class TCNAE:
                  loss = 'mse',
                  use_early_stopping = False,
                  error_window_length = 128,
+                 nb_encoder_blocks = 1,
+                 nb_decoder_blocks = 1,
+                 mixed_precision = None,
+                 jit_compile = False,
                  verbose = 1
                 ):
         """
@@ -63,6 +73,13 @@ class TCNAE:
             The dilation rates used in the TCN-AE model (default is (1, 2, 4, 8, 16))
         nb_filters : int
             The number of filters used in the dilated convolutional layers. All dilated conv. layers use the same number of filters (default is 20)
+        nb_encoder_blocks, nb_decoder_blocks : int
+            The number of TCN blocks chained in the encoder and in the decoder (default is 1)
+        mixed_precision : str
+            Keras mixed precision policy, e.g. 'mixed_bfloat16' on CPUs with bfloat16 support (default is None, float32).
+            The encoding and the reconstruction are always float32.
+        jit_compile : bool
+            Compile the training and prediction steps with XLA (default is False)
         """
         
         self.ts_dimension = ts_dimension
@@ -81,6 +98,10 @@ class TCNAE:
         self.loss = loss
         self.use_early_stopping = use_early_stopping
         self.error_window_length = error_window_length
+        self.nb_encoder_blocks = nb_encoder_blocks
+        self.nb_decoder_blocks = nb_decoder_blocks
+        self.mixed_precision = mixed_precision
+        self.jit_compile = jit_compile
         
         # build the model
         self.build_model(verbose = verbose)
@@ -108,52 +129,76 @@ class TCNAE:
         """
         
         tensorflow.keras.backend.clear_session()
-        sampling_factor = self.latent_sample_rate
+        tensorflow.keras.mixed_precision.set_global_policy(self.mixed_precision or 'float32')
         i = Input(batch_shape=(None, None, self.ts_dimension))
 
-        # Put signal through TCN. Output-shape: (batch,sequence length, nb_filters)
-        tcn_enc = TCN(nb_filters=self.nb_filters, kernel_size=self.kernel_size, nb_stacks=self.nb_stacks, dilations=self.dilations, 
-                      padding=self.padding, use_skip_connections=True, dropout_rate=self.dropout_rate, return_sequences=True,
-                      kernel_initializer=self.conv_kernel_init, name='tcn-enc')(i)
+        enc_out = self.build_encoder(i)
+        o = self.build_decoder(enc_out)
 
-        
-        tcn_enc = TCN(nb_filters=self.nb_filters, kernel_size=self.kernel_size, nb_stacks=self.nb_stacks, dilations=self.dilations, 
-              padding=self.padding, use_skip_connections=True, dropout_rate=self.dropout_rate, return_sequences=True,
-              kernel_initializer=self.conv_kernel_init, name='tcn-enc')(i)
+        model = Model(inputs=[i], outputs=[o])
+
+        adam = optimizers.Adam(learning_rate=self.learning_rate, beta_1=0.9, beta_2=0.999, epsilon=1e-08, amsgrad=True) # decay=0.0,
+        model.compile(loss=self.loss, optimizer=adam, metrics=[self.loss], jit_compile=self.jit_compile)
+        if verbose > 1:
+            model.summary()
+        self.model = model
+        self.enc_out = enc_out
+        # the encoders of the previous model (if any) refer to the old layers
+        self._encoders = {}
+    
+    def tcn_block(self, name):
+        """Returns a new TCN block with the configured filters, dilations and stacks."""
+        return TCN(nb_filters=self.nb_filters, kernel_size=self.kernel_size, nb_stacks=self.nb_stacks, dilations=self.dilations, 
+                   padding=self.padding, use_skip_connections=True, dropout_rate=self.dropout_rate, return_sequences=True,
+                   kernel_initializer=self.conv_kernel_init, name=name)
+
+    def block_names(self, prefix, nb_blocks):
+        # the first block keeps the name of older versions ('tcn-enc', 'tcn-dec'), so saved weights still load
+        return [prefix] + ['{}-{}'.format(prefix, b + 1) for b in range(1, nb_blocks)]
+
+    def build_encoder(self, i):
+        """Builds the encoder on the input tensor and returns the pooled encoding."""
+        # Put signal through TCN. Output-shape: (batch,sequence length, nb_filters)
+        tcn_enc = i
+        for name in self.block_names('tcn-enc', self.nb_encoder_blocks):
+            tcn_enc = self.tcn_block(name)(tcn_enc)
 
-        
         # Now, adjust the number of channels...
         enc_flat = Conv1D(filters=self.filters_conv1d, kernel_size=1, activation=self.activation_conv1d, padding=self.padding)(tcn_enc)
 
         ## Do some average (max) pooling to get a compressed representation of the time series (e.g. a sequence of length 8)
-        enc_pooled = self.pooler(pool_size=sampling_factor, strides=None, padding='valid', data_format='channels_last')(enc_flat)
+        enc_pooled = self.pooler(pool_size=self.latent_sample_rate, strides=None, padding='valid', data_format='channels_last')(enc_flat)
         
         # If you want, maybe put the pooled values through a non-linear Activation
-        enc_out = Activation("linear")(enc_pooled)
+        return Activation("linear", dtype='float32')(enc_pooled)
 
+    def build_decoder(self, enc_out):
+        """Builds the decoder on the encoding and returns the reconstructed signal."""
         # Now we should have a short sequence, which we will upsample again and then try to reconstruct the original series
-        dec_upsample = UpSampling1D(size=sampling_factor)(enc_out)
-
-        dec_reconstructed = TCN(nb_filters=self.nb_filters, kernel_size=self.kernel_size, nb_stacks=self.nb_stacks, dilations=self.dilations, 
-                                padding=self.padding, use_skip_connections=True, dropout_rate=self.dropout_rate, return_sequences=True,
-                                kernel_initializer=self.conv_kernel_init, name='tcn-dec')(dec_upsample)
+        dec_reconstructed = UpSampling1D(size=self.latent_sample_rate)(enc_out)
+        for name in self.block_names('tcn-dec', self.nb_decoder_blocks):
+            dec_reconstructed = self.tcn_block(name)(dec_reconstructed)
 
         # Put the filter-outputs through a dense layer finally, to get the reconstructed signal
-        o = Dense(self.ts_dimension, activation='linear')(dec_reconstructed)
+        return Dense(self.ts_dimension, activation='linear', dtype='float32')(dec_reconstructed)
 
-        model = Model(inputs=[i], outputs=[o])
+    def model_filename(self):
+        # 根据 ts_dimension 生成文件名
+        return 'tcn_{}_model.h5'.format(self.filters_conv1d)
 
-        adam = optimizers.Adam(learning_rate=self.learning_rate, beta_1=0.9, beta_2=0.999, epsilon=1e-08, amsgrad=True) # decay=0.0,
-        model.compile(loss=self.loss, optimizer=adam, metrics=[self.loss])
-        if verbose > 1:
-            model.summary()
-        self.model = model
-        self.enc_out = enc_out
-    
-    def fit(self, train_X, train_Y, data_tcn_valid,batch_size=32, epochs=40, verbose = 1):
-        my_callbacks = None
+    def training_callbacks(self, checkpoint_dir=None):
+        my_callbacks = []
         if self.use_early_stopping:
-            my_callbacks = [EarlyStopping(monitor='val_loss', patience=2, min_delta=1e-4, restore_best_weights=True)]
+            my_callbacks.append(EarlyStopping(monitor='val_loss', patience=2, min_delta=1e-4, restore_best_weights=True))
+        if checkpoint_dir is not None:
+            # 每個 epoch 結束時保存模型，並備份權重、優化器狀態和 epoch 數；
+            # 訓練中斷後以相同的 checkpoint_dir 重新調用即可從最後完成的 epoch 繼續
+            my_callbacks.append(ModelCheckpoint(self.model_filename(), save_freq='epoch'))
+            my_callbacks.append(BackupAndRestore(backup_dir=checkpoint_dir))
+        return my_callbacks or None
+
+    def fit(self, train_X, train_Y, data_tcn_valid,batch_size=32, epochs=40, verbose = 1, checkpoint_dir=None):
+        my_callbacks = self.training_callbacks(checkpoint_dir)
         
         keras_verbose = 0
         if verbose > 0:
@@ -176,15 +221,51 @@ class TCNAE:
                         verbose=keras_verbose)
 
         
-        # 根据 ts_dimension 生成文件名
-        model_filename = 'tcn_{}_model.h5'.format(self.filters_conv1d)
-        
-        self.model.save(model_filename)
+        self.model.save(self.model_filename())
         
         if verbose > 0:
             print("> Training Time :", round(time.time() - start), "seconds.")
         
         return history
+
+    def fit_windows(self, train_windows, valid_windows, batch_size=256, epochs=40, shuffle_buffer=65536,
+                    checkpoint_dir='checkpoints', seed=None, verbose = 1):
+        """Trains the TCN-AE from SlidingWindows through a tf.data pipeline.
+
+        The windows are gathered batch by batch from their (memory-mapped) float32 feature array, shuffled with
+        a bounded buffer and prefetched, so the training set does not have to fit in RAM. The model is saved
+        after every epoch and an interrupted training resumes from the last completed epoch when called again
+        with the same checkpoint_dir.
+
+        Parameters
+        ----------
+        train_windows, valid_windows : SlidingWindows
+            Training and validation windows, e.g. SlidingWindows.load(path).between(start, end).
+        shuffle_buffer : int
+            Number of window positions in the shuffle buffer (default is 65536)
+        checkpoint_dir : str
+            Directory of the epoch backups (default is 'checkpoints'); None disables checkpointing.
+        """
+        train_data = make_dataset(train_windows, batch_size, shuffle=True, shuffle_buffer=shuffle_buffer, seed=seed)
+        valid_data = make_dataset(valid_windows, batch_size, shuffle=False)
+
+        keras_verbose = 0
+        if verbose > 0:
+            print("> Starting the Training on {} windows...".format(len(train_windows)))
+            keras_verbose = 2
+        start = time.time()
+        history = self.model.fit(train_data,
+                        epochs=epochs,
+                        validation_data=valid_data,
+                        callbacks=self.training_callbacks(checkpoint_dir),
+                        verbose=keras_verbose)
+
+        self.model.save(self.model_filename())
+
+        if verbose > 0:
+            print("> Training Time :", round(time.time() - start), "seconds.")
+
+        return history
     
     def predict(self, test_X):
         X_rec =  self.model.predict(test_X)
@@ -203,11 +284,13 @@ class TCNAE:
         anomaly_score = numpy.sqrt(anomaly_score)
         return anomaly_score
     
-    def tcn_encoder_train(self, test_X):
-
-        #i = Input(batch_shape=(None, None, self.ts_dimension))
-        encoder_model = Model(inputs=self.model.inputs, outputs=[self.enc_out])
-        encoder_model.summary()
-        # 使用encoder_model来获取编码器的特征
-        encoded_features = encoder_model.predict(test_X)
-        return encoded_features
\ No newline at end of file
+    def encoder(self, use_tf_function=True):
+        """Returns the encoder sub-model; it is built on the first call with each `use_tf_function` and reused afterwards."""
+        if use_tf_function not in self._encoders:
+            self._encoders[use_tf_function] = TCNEncoder(self, use_tf_function=use_tf_function)
+        return self._encoders[use_tf_function]
+
+    def tcn_encoder_train(self, test_X, batch_size=4096):
+        # 編碼器只建立一次，按批次預測，峰值內存取決於批次大小而不是完整的歷史數據
+        encoded_features = self.encoder().predict(test_X, batch_size)
+        return encoded_features
@@ -0,0 +1,282 @@
+import io
+import os
+import argparse
+import numpy
+import pandas
+
+from encoder import FEATURES_FILE, DATES_FILE, TICKERS_FILE, store_tickers
+
+# 每支股票最近 window_length 天縮放後特徵的環形緩衝區
+STATE_FILE = 'ring_buffer.npz'
+
+
+class DailyUpdater:
+    """
+    Keeps the last `window_length` scaled trading days of every stock in a ring buffer, so a new trading day
+    only needs one window per stock to be encoded (O(stocks) instead of re-reading the whole history).
+
+    Attributes
+    ----------
+    stock_ids : numpy.ndarray
+        Stock id of every buffer row.
+    values : numpy.ndarray
+        (n_stocks, window_length, n_features) float32 ring buffers.
+    pos : numpy.ndarray
+        Slot of every stock that the next day overwrites, i.e. its oldest day once the buffer is full.
+    filled : numpy.ndarray
+        Number of days in every buffer (at most window_length).
+    last_date : numpy.datetime64
+        Last trading day pushed into the buffers.
+    """
+
+    def __init__(self, stock_ids, values, pos=None, filled=None, last_date=None):
+        self.stock_ids = numpy.asarray(stock_ids, dtype=str)
+        self.values = numpy.ascontiguousarray(values, dtype=numpy.float32)
+        n_stocks = len(self.stock_ids)
+        self.pos = numpy.zeros(n_stocks, dtype=numpy.int64) if pos is None else numpy.asarray(pos, dtype=numpy.int64)
+        self.filled = numpy.zeros(n_stocks, dtype=numpy.int64) if filled is None else numpy.asarray(filled, dtype=numpy.int64)
+        self.last_date = None if last_date is None or numpy.isnat(numpy.datetime64(last_date, 'D')) \
+            else numpy.datetime64(last_date, 'D')
+        self._rows = {stock_id: i for i, stock_id in enumerate(self.stock_ids)}
+
+    @property
+    def window_length(self):
+        return self.values.shape[1]
+
+    @classmethod
+    def from_frame(cls, df, feature_cols, window_length=20, stock_col='stock_id', date_col='date'):
+        """Initializes the buffers with the last `window_length` days of every stock of a scaled daily DataFrame."""
+        df = df.assign(**{stock_col: df[stock_col].astype(str)})
+        df = df.sort_values([stock_col, date_col], kind='mergesort').groupby(stock_col, sort=False).tail(window_length)
+        stock_ids, first, counts = numpy.unique(df[stock_col].to_numpy(dtype=str), return_index=True, return_counts=True)
+        values = numpy.zeros((len(stock_ids), window_length, len(feature_cols)), dtype=numpy.float32)
+
+        # 最舊的一天放在第 0 格，下一天寫入第 filled 格（緩衝區已滿時為第 0 格）
+        rows = numpy.repeat(numpy.arange(len(stock_ids)), counts)
+        slots = numpy.arange(len(df)) - numpy.repeat(first, counts)
+        values[rows, slots] = df[list(feature_cols)].to_numpy(dtype=numpy.float32)
+        last_date = pandas.to_datetime(df[date_col]).max()
+        return cls(stock_ids, values, counts % window_length, counts, last_date)
+
+    @classmethod
+    def load(cls, path):
+        with numpy.load(path) as state:
+            return cls(state['stock_ids'], state['values'], state['pos'], state['filled'], state['last_date'])
+
+    def save(self, path):
+        last_date = numpy.datetime64('NaT', 'D') if self.last_date is None else self.last_date
+        with open(path + '.tmp', 'wb') as f:
+            numpy.savez(f, stock_ids=self.stock_ids, values=self.values, pos=self.pos, filled=self.filled,
+                        last_date=last_date)
+        os.replace(path + '.tmp', path)
+
+    def push(self, date, stock_ids, rows):
+        """Adds one trading day.
+
+        Parameters
+        ----------
+        date : str or datetime
+            The trading day; it must be later than every day already pushed.
+        stock_ids : array-like
+            Stocks traded that day; stocks not seen before get a new (empty) buffer.
+        rows : numpy.ndarray
+            (n, n_features) scaled features of these stocks.
+
+        Returns
+        -------
+        numpy.ndarray
+            Buffer rows of the given stocks whose buffer now holds a full window.
+        """
+        date = numpy.datetime64(pandas.Timestamp(date).date(), 'D')
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError('trading day {} is not after the last update {}'.format(date, self.last_date))
+
+        stock_ids = numpy.asarray(stock_ids, dtype=str)
+        new = [s for s in dict.fromkeys(stock_ids) if s not in self._rows]
+        if new:
+            # 新上市的股票：增加空的緩衝區（很少發生）
+            self._rows.update({s: len(self.stock_ids) + i for i, s in enumerate(new)})
+            self.stock_ids = numpy.concatenate([self.stock_ids, numpy.asarray(new, dtype=str)])
+            self.values = numpy.concatenate([self.values, numpy.zeros((len(new),) + self.values.shape[1:], dtype=numpy.float32)])
+            self.pos = numpy.concatenate([self.pos, numpy.zeros(len(new), dtype=numpy.int64)])
+            self.filled = numpy.concatenate([self.filled, numpy.zeros(len(new), dtype=numpy.int64)])
+
+        idx = numpy.array([self._rows[s] for s in stock_ids], dtype=numpy.int64)
+        idx, first = numpy.unique(idx, return_index=True)   # 同一天重複的股票只取第一行
+        self.values[idx, self.pos[idx]] = numpy.asarray(rows, dtype=numpy.float32)[first]
+        self.pos[idx] = (self.pos[idx] + 1) % self.window_length
+        self.filled[idx] = numpy.minimum(self.filled[idx] + 1, self.window_length)
+        self.last_date = date
+        return idx[self.filled[idx] == self.window_length]
+
+    def windows(self, idx):
+        """Returns the (n, window_length, n_features) windows of the given buffer rows, oldest day first."""
+        order = (self.pos[idx, None] + numpy.arange(self.window_length)) % self.window_length
+        return self.values[idx[:, None], order]
+
+
+def append_feature_store(path, date, tickers, codings):
+    """Adds the codings of one trading day to an existing feature store.
+
+    The day is appended to features.npy in place (the row is written after the last row and the shape in the
+    .npy header is updated before dates.npy), so the cost does not depend on the length of the history. Only
+    when the day brings new tickers (a new column) is the store rewritten.
+
+    Parameters
+    ----------
+    path : str
+        Feature store directory.
+    date : numpy.datetime64
+        The trading day; it must be later than the last day of the store, or equal to it when a previous run
+        crashed after writing the store but before saving the ring buffer (the row of that day is overwritten).
+    tickers : numpy.ndarray
+        Store tickers of the rows of `codings`.
+    codings : numpy.ndarray
+        (n, n_codings) codings.
+    """
+    features_path = os.path.join(path, FEATURES_FILE)
+    dates_path = os.path.join(path, DATES_FILE)
+    tickers_path = os.path.join(path, TICKERS_FILE)
+    dates = numpy.load(dates_path)
+    all_tickers = numpy.load(tickers_path)
+    date = numpy.datetime64(date, 'D')
+    if len(dates) and date < dates[-1]:
+        raise ValueError('trading day {} is earlier than the last day {} of the feature store'.format(date, dates[-1]))
+
+    if len(numpy.setdiff1d(tickers, all_tickers)):
+        all_tickers = _add_tickers(path, all_tickers, numpy.union1d(all_tickers, tickers))
+
+    columns = {ticker: i for i, ticker in enumerate(all_tickers)}
+    row = numpy.full((len(all_tickers), codings.shape[1]), numpy.nan, dtype=numpy.float32)
+    row[[columns[t] for t in tickers]] = codings
+
+    if len(dates) and date == dates[-1]:
+        # 上次運行中斷後重新計算同一天：覆蓋該天的行
+        features = numpy.load(features_path, mmap_mode='r+')
+        features[len(dates) - 1] = row
+        features.flush()
+        return
+
+    with open(features_path, 'r+b') as f:
+        version = numpy.lib.format.read_magic(f)
+        if version == (1, 0):
+            read_header, write_header = numpy.lib.format.read_array_header_1_0, numpy.lib.format.write_array_header_1_0
+        else:
+            read_header, write_header = numpy.lib.format.read_array_header_2_0, numpy.lib.format.write_array_header_2_0
+        shape, fortran_order, dtype = read_header(f)
+        offset = f.tell()
+        if fortran_order or dtype != numpy.float32 or tuple(shape[1:]) != row.shape:
+            raise ValueError('feature store {} does not match the codings {}'.format(shape, row.shape))
+        # 上次運行在更新頭部之後、替換日期之前中斷時，特徵數組會比日期多一行，該行被覆蓋
+        if shape[0] not in (len(dates), len(dates) + 1):
+            raise ValueError('feature store {} does not match its {} dates'.format(shape, len(dates)))
+
+        header = io.BytesIO()
+        write_header(header, {'descr': numpy.lib.format.dtype_to_descr(dtype), 'fortran_order': False,
+                              'shape': (len(dates) + 1,) + tuple(shape[1:])})
+        if len(header.getvalue()) == offset:
+            f.seek(offset + len(dates) * row.nbytes)
+            f.write(row.tobytes())
+            f.truncate()
+            f.flush()
+            # 先更新頭部的形狀，再替換日期
+            f.seek(0)
+            f.write(header.getvalue())
+            f.flush()
+            _save(dates_path, numpy.append(dates, date))
+            return
+
+    # .npy 頭部沒有足夠的空間記錄新形狀（很少發生）：重寫整個文件
+    features = numpy.load(features_path, mmap_mode='r')[:len(dates)]
+    _save(features_path, numpy.concatenate([features, row[None]]))
+    _save(dates_path, numpy.append(dates, date))
+
+
+def _add_tickers(path, old_tickers, new_tickers):
+    features_path = os.path.join(path, FEATURES_FILE)
+    old = numpy.load(features_path, mmap_mode='r')
+    features = numpy.lib.format.open_memmap(features_path + '.tmp', mode='w+', dtype=numpy.float32,
+                                            shape=(old.shape[0], len(new_tickers), old.shape[2]))
+    features[:] = numpy.nan
+    features[:, numpy.searchsorted(new_tickers, old_tickers)] = old
+    features.flush()
+    del features, old
+    _save(os.path.join(path, TICKERS_FILE), new_tickers)
+    os.replace(features_path + '.tmp', features_path)
+    return new_tickers
+
+
+def _save(path, array):
+    with open(path + '.tmp', 'wb') as f:
+        numpy.save(f, array)
+    os.replace(path + '.tmp', path)
+
+
+def append_trade_info(csv_path, date, stock_ids, close, codings):
+    """Appends the codings of one trading day to tcn_daily_trade_info.csv (date, tic, close, coding1...)."""
+    out = pandas.DataFrame({'date': pandas.Timestamp(date), 'tic': stock_ids, 'close': close})
+    out[['coding{}'.format(i + 1) for i in range(codings.shape[1])]] = codings
+    exists = os.path.exists(csv_path)
+    out.to_csv(csv_path, mode='a' if exists else 'w', header=not exists, index=False)
+
+
+if __name__ == '__main__':
+    import joblib
+    from tcnae import TCNAE
+
+    parser = argparse.ArgumentParser(description='Add new trading days to the TCN-AE feature store without re-encoding the history')
+    parser.add_argument('data', type=str,
+                        help='CSV with the new trading day(s): date, stock_id, CLOSE_O and the 117 feature columns '
+                             '(with --init: the full output_original_data.csv)')
+    parser.add_argument('--init', action='store_true', default=False,
+                        help='initialize the ring buffers from the last days of every stock in the data, without encoding')
+    parser.add_argument('--scaler', type=str, default='tcnae_minmax_scaler.pkl',
+                        help='fitted MinMaxScaler of the features (default: tcnae_minmax_scaler.pkl)')
+    parser.add_argument('--weights', type=str, default='tcn_20_model.h5',
+                        help='trained TCN-AE weights (default: tcn_20_model.h5)')
+    parser.add_argument('--filters', type=int, default=20,
+                        help='number of encoded features of the model (default: 20)')
+    parser.add_argument('--store', type=str, default='feature_store',
+                        help='feature store directory (default: feature_store)')
+    parser.add_argument('--state', type=str, default=None,
+                        help=f'ring buffer file (default: {STATE_FILE} in the feature store directory)')
+    parser.add_argument('--csv', type=str, default=None,
+                        help='also append the codings to this CSV, e.g. tcn_daily_trade_info.csv (default: none)')
+    args = parser.parse_args()
+
+    state_path = args.state or os.path.join(args.store, STATE_FILE)
+    scaler = joblib.load(args.scaler)
+
+    data = pandas.read_csv(args.data)
+    data['date'] = pandas.to_datetime(data['date'])
+    data['stock_id'] = data['stock_id'].astype(str)
+    feature_names = list(getattr(scaler, 'feature_names_in_', data.columns[3:]))
+
+    if args.init:
+        # 只縮放每支股票最後 20 天的數據
+        window_length = 20
+        data = data.sort_values(['stock_id', 'date'], kind='mergesort').groupby('stock_id', sort=False).tail(window_length)
+        data[feature_names] = scaler.transform(data[feature_names])
+        updater = DailyUpdater.from_frame(data, feature_names, window_length)
+        os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+        updater.save(state_path)
+        print(f'{len(updater.stock_ids)} stock buffers up to {updater.last_date} written to {state_path}')
+    else:
+        updater = DailyUpdater.load(state_path)
+        tcn_ae = TCNAE(ts_dimension=len(feature_names), filters_conv1d=args.filters, verbose=0)
+        tcn_ae.model.load_weights(args.weights)
+        encoder = tcn_ae.encoder()
+
+        for date, day in data.groupby('date', sort=True):
+            idx = updater.push(date, day['stock_id'].to_numpy(), scaler.transform(day[feature_names]))
+            if len(idx):
+                codings = encoder(updater.windows(idx))[:, -1, :]
+            else:
+                codings = numpy.zeros((0, encoder.n_codings), dtype=numpy.float32)
+
+            append_feature_store(args.store, date, store_tickers(updater.stock_ids[idx]), codings)
+            if args.csv:
+                close = day.drop_duplicates('stock_id').set_index('stock_id')['CLOSE_O']
+                append_trade_info(args.csv, date, updater.stock_ids[idx], close.reindex(updater.stock_ids[idx]).to_numpy(), codings)
+            updater.save(state_path)
+            print(f'{pandas.Timestamp(date).date()}: {len(idx)} stocks encoded')
@@ -2,6 +2,8 @@ import os
 import numpy
 import tensorflow
 import matplotlib.pyplot as plt
+from scipy.linalg import solve_triangular
+from windows import sliding_view
 
 def select_gpus(gpu_list):
     if type(gpu_list) != list:
@@ -14,14 +16,10 @@ def select_gpus(gpu_list):
     tensorflow.config.experimental.set_memory_growth(gpus[0], True)
     
 def slide_window(df, window_length, verbose = 1):
-    orig_TS_list = []
-    X_list = []
-    series = df.copy()
-    for i in series.columns.values: # loop through all input dimensions
-        s = series[i]
-        s2 = roll_fast(s.values, window_length)
-        X_list.append(s2)
-    X = numpy.dstack((X_list))
+    # all windows as one strided view over the DataFrame values (no per-column copies).
+    # The result is a read-only view of shape (n_rows - window_length + 1, window_length, n_columns):
+    # callers that modify the windows in place must copy it first, e.g. numpy.array(X).
+    X = sliding_view(df.values, window_length)
     if verbose > 2:
         print("X.shape:", X.shape)
     return X
@@ -37,23 +35,47 @@ def roll_fast(a, window):
 # (or any other point mu).
 # If the parameters cov and mu are left empty, then this function 
 # will compute them based on the data X.
-def mahalanobis_distance(X, cov=None, mu=None):
+# The rows are processed in chunks of at most max_chunk_bytes, so the
+# memory does not grow with the number of rows.
+def mahalanobis_distance(X, cov=None, mu=None, max_chunk_bytes=256 * 2**20):
     if mu is None:
         mu = numpy.mean(X, axis=0)
     if cov is None:
         cov = numpy.cov(X, rowvar = False)
-    try:
-        inv_cov = numpy.linalg.inv(cov)
-    except numpy.linalg.LinAlgError as err:
-        print("Error, probably singular matrix!")
-        inv_cov = numpy.eye(cov.shape[0])
-    
-    X_diff_mu = X - mu
-    M = numpy.apply_along_axis(lambda x: 
-                    numpy.matmul(numpy.matmul(x, inv_cov), x.T) ,1 , X_diff_mu)
+    cov = numpy.atleast_2d(cov)
+
+    whiten = whitening(cov)
+
+    chunk_rows = max(1, int(max_chunk_bytes // (8 * cov.shape[0])))
+    M = numpy.empty(X.shape[0])
+    for start in range(0, X.shape[0], chunk_rows):
+        X_diff_mu = X[start:start + chunk_rows] - mu
+        # row-wise quadratic form x^T inv(cov) x = |W x|^2 (one column of Y per row of the chunk)
+        Y = whiten(X_diff_mu)
+        M[start:start + chunk_rows] = numpy.einsum('ij,ij->j', Y, Y)
     return M
 
 
+# Returns a function mapping the rows of X - mu to the columns of W (X - mu)^T,
+# where W^T W = inv(cov), so that the squared Mahalanobis distance of x is
+# |W x|^2. For a positive definite cov only the Cholesky factor cov = L L^T
+# is kept and every chunk is solved with L (W = inv(L) is never built). A
+# singular cov (e.g. fewer samples than features) falls back to the
+# pseudo-inverse, i.e. the distance is measured in the subspace spanned by
+# the data.
+def whitening(cov):
+    try:
+        L = numpy.linalg.cholesky(cov)
+        return lambda X_diff_mu: solve_triangular(L, X_diff_mu.T, lower=True, check_finite=False)
+    except numpy.linalg.LinAlgError:
+        print("Warning: covariance matrix is singular, using the pseudo-inverse.")
+    # pinv(cov) = V diag(1/s) V^T  ->  W = diag(1/sqrt(s)) V^T on the non-zero eigenvalues
+    s, V = numpy.linalg.eigh(cov)
+    keep = s > s.max() * cov.shape[0] * numpy.finfo(cov.dtype).eps
+    W = (V[:, keep] / numpy.sqrt(s[keep])).T
+    return lambda X_diff_mu: W @ X_diff_mu.T
+
+
 def get_anomaly_windows(is_anomaly):
     # add a zero at the beginning and end of the sequence and look for the edges of the anomaly windows
     edges = numpy.diff(numpy.concatenate([[0],is_anomaly,[0]])).nonzero()[0]
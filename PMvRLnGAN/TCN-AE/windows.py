@@ -0,0 +1,169 @@
+import os
+import numpy
+import pandas
+
+# 窗口存儲目錄中的文件：特徵數組單獨保存，以便內存映射
+VALUES_FILE = 'values.npy'
+INDEX_FILE = 'windows.npz'
+
+
+def sliding_view(values, window_length):
+    """Returns all windows of `window_length` consecutive rows of `values` as a read-only view.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Array of shape (n_rows, n_features).
+    window_length : int
+        Number of rows per window.
+
+    Returns
+    -------
+    numpy.ndarray
+        View of shape (n_rows - window_length + 1, window_length, n_features); window k covers the rows
+        k, ..., k + window_length - 1. No data is copied.
+    """
+    values = numpy.ascontiguousarray(values)
+    n_rows, n_features = values.shape
+    n_windows = max(n_rows - window_length + 1, 0)
+    # 相鄰窗口只相差一行，窗口維度和行維度使用相同的步長
+    return numpy.lib.stride_tricks.as_strided(values, shape=(n_windows, window_length, n_features),
+                                              strides=(values.strides[0],) + values.strides, writeable=False)
+
+
+class SlidingWindows:
+    """
+    Sliding windows over the daily features of many stocks (the input of the TCN-AE).
+
+    The features of all stocks are stored once in a contiguous float32 array, with the rows of every stock
+    in one block sorted by date. `view` holds every window of that array without copying; `starts` selects the
+    windows that stay within one stock, and `index` gives the (date, stock_id) of the last day of each of them,
+    i.e. the day the encoded features belong to.
+
+    Attributes
+    ----------
+    values : numpy.ndarray
+        (n_rows, n_features) float32 features, grouped by stock and sorted by date.
+    view : numpy.ndarray
+        (n_rows - window_length + 1, window_length, n_features) read-only view of all windows of `values`.
+    starts : numpy.ndarray
+        positions in `view` of the windows, one per row of `index`.
+    index : pandas.DataFrame
+        date, stock_id and the extra columns of the last day of every window.
+    """
+
+    def __init__(self, values, index, starts, window_length, groups):
+        self.values = values
+        self.view = sliding_view(values, window_length)
+        self.index = index
+        self.starts = starts
+        self.window_length = window_length
+        self._groups = groups
+
+    @classmethod
+    def from_frame(cls, df, feature_cols, window_length=20, stock_col='stock_id', date_col='date',
+                   extra_cols=('close_o',), dtype=numpy.float32):
+        """Builds the windows of every stock of a daily DataFrame.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            one row per (date, stock), e.g. the scaled output_original_data.csv of the notebooks.
+        feature_cols : list
+            the feature columns (117 in the notebooks).
+        window_length : int
+            number of days per window (default is 20).
+        stock_col, date_col : str
+            stock id and date columns.
+        extra_cols : tuple
+            columns copied into the index from the last day of every window (e.g. the original close).
+        """
+        extra_cols = [c for c in extra_cols if c in df.columns]
+        # 股票代碼統一為字符串，與 load() 讀回的鍵一致
+        df = df.assign(**{stock_col: df[stock_col].astype(str)}).sort_values([stock_col, date_col], kind='mergesort')
+        values = numpy.ascontiguousarray(df[list(feature_cols)].to_numpy(dtype=dtype))
+
+        # 每支股票佔一段連續的行，只保留不跨越股票邊界的窗口
+        stocks = df[stock_col].to_numpy()
+        bounds = numpy.flatnonzero(stocks[1:] != stocks[:-1]) + 1
+        first = numpy.concatenate(([0], bounds)).astype(numpy.int64)
+        last = numpy.concatenate((bounds, [len(stocks)])).astype(numpy.int64)
+        counts = last - first
+        row_in_stock = numpy.arange(len(stocks)) - numpy.repeat(first, counts)
+        starts = numpy.flatnonzero(row_in_stock <= numpy.repeat(counts, counts) - window_length)
+
+        index = df[[date_col, stock_col] + extra_cols].iloc[starts + window_length - 1]
+        index = index.rename(columns={date_col: 'date', stock_col: 'stock_id'}).reset_index(drop=True)
+        index['date'] = pandas.to_datetime(index['date'])
+
+        groups = {stock: (int(f), int(l)) for stock, f, l in zip(stocks[first], first, last)} if len(stocks) else {}
+        return cls(values, index, starts, window_length, groups)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def shape(self):
+        return (len(self),) + self.view.shape[1:]
+
+    def between(self, start=None, end=None):
+        """Returns the windows whose last day is in [start, end); the feature array is shared, not copied."""
+        mask = numpy.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= (self.index['date'] >= pandas.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (self.index['date'] < pandas.Timestamp(end)).to_numpy()
+        return SlidingWindows(self.values, self.index[mask].reset_index(drop=True), self.starts[mask],
+                              self.window_length, self._groups)
+
+    def stock(self, stock_id):
+        """Returns the (n_windows, window_length, n_features) windows of one stock as a view, None if unknown."""
+        stock_id = str(stock_id)
+        if stock_id not in self._groups:
+            return None
+        first, last = self._groups[stock_id]
+        return sliding_view(self.values[first:last], self.window_length)
+
+    def take(self, positions=None):
+        """Gathers windows into one contiguous array (all of them if positions is None)."""
+        starts = self.starts if positions is None else self.starts[positions]
+        return numpy.take(self.view, starts, axis=0)
+
+    def to_array(self):
+        """Returns the (n_windows, window_length, n_features) array for TCNAE.fit and tcn_encoder_train."""
+        return self.take()
+
+    def save(self, path):
+        """Saves the windows to a directory; the float32 feature array is stored as a plain .npy file."""
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, VALUES_FILE + '.tmp'), 'wb') as f:
+            numpy.save(f, self.values)
+        stocks = list(self._groups)
+        index = {'index_' + col: self.index[col].to_numpy(dtype=str if col == 'stock_id' else None)
+                 for col in self.index.columns if col != 'date'}
+        with open(os.path.join(path, INDEX_FILE + '.tmp'), 'wb') as f:
+            numpy.savez(f, starts=self.starts, window_length=self.window_length,
+                        dates=self.index['date'].to_numpy().astype('datetime64[D]'),
+                        group_stocks=numpy.asarray(stocks, dtype=str),
+                        group_bounds=numpy.asarray([self._groups[s] for s in stocks], dtype=numpy.int64).reshape(-1, 2),
+                        **index)
+        os.replace(os.path.join(path, VALUES_FILE + '.tmp'), os.path.join(path, VALUES_FILE))
+        os.replace(os.path.join(path, INDEX_FILE + '.tmp'), os.path.join(path, INDEX_FILE))
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Loads windows saved by save(); by default the feature array is memory-mapped, not read into RAM."""
+        values = numpy.load(os.path.join(path, VALUES_FILE), mmap_mode=mmap_mode)
+        with numpy.load(os.path.join(path, INDEX_FILE)) as data:
+            index = pandas.DataFrame({'date': pandas.to_datetime(data['dates'])})
+            for key in data.files:
+                if key.startswith('index_'):
+                    index[key[len('index_'):]] = data[key]
+            groups = {s: (int(f), int(l)) for s, (f, l) in zip(data['group_stocks'], data['group_bounds'])}
+            return cls(values, index, data['starts'], int(data['window_length']), groups)
+
+    def batches(self, batch_size=4096):
+        """Yields (index, windows) batches, so only one batch of windows is materialized at a time."""
+        for lo in range(0, len(self), batch_size):
+            hi = min(lo + batch_size, len(self))
+            yield self.index.iloc[lo:hi], self.take(slice(lo, hi))
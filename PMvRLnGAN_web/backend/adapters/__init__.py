@@ -5,5 +5,12 @@
 
 from . import stock_adapter
 from . import trading_adapter
+from . import stock_list_store
+from . import trading_calendar
+from . import decision_index
+from . import trading_inference
+from . import performance
+from . import feature_store
+from . import relationship_index
 
-__all__ = ['stock_adapter', 'trading_adapter', 'gat_adapter', 'tcn_adapter'] 
\ No newline at end of file
+__all__ = ['stock_adapter', 'trading_adapter', 'gat_adapter', 'tcn_adapter', 'stock_list_store', 'trading_calendar', 'decision_index', 'trading_inference', 'performance', 'feature_store', 'relationship_index'] 
\ No newline at end of file
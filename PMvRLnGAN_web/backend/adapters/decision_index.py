@@ -0,0 +1,143 @@
+"""
+交易決策索引模組
+將按日期排列的交易決策表（每列為一支股票的持股數量）一次性轉換為密集整數矩陣，
+每次請求只需取出一行並以向量化方式生成決策列表
+"""
+
+import numpy as np
+import pandas as pd
+from .trading_calendar import TradingCalendar
+
+# 動作名稱，以 action + 1 為索引
+ACTION_NAMES = np.array(['賣出', '持有', '買入'])
+
+
+class DecisionIndex:
+    """
+    交易決策索引
+
+    屬性:
+        calendar (TradingCalendar): 決策日期索引
+        stock_ids (np.ndarray): 股票代碼
+        stock_names (np.ndarray): 股票名稱
+        quantities (np.ndarray): 日期 × 股票的整數數量矩陣
+    """
+
+    def __init__(self, dates, stock_ids, quantities):
+        self.calendar = TradingCalendar(dates)
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        # TradingCalendar 會排序並去重，按同樣的順序排列矩陣行（重複日期保留最後一行）
+        rows = len(dates) - 1 - np.unique(dates[::-1], return_index=True)[1]
+        self.quantities = np.ascontiguousarray(quantities[rows], dtype=np.int64)
+        self.stock_ids = np.asarray(stock_ids, dtype=str)
+
+        from .stock_adapter import get_stock_name
+        self.stock_names = np.array([get_stock_name(stock_id) for stock_id in self.stock_ids])
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        從交易決策表構建索引
+
+        參數:
+            df (DataFrame): 包含 'date' 列和每支股票數量列的交易決策表
+
+        返回:
+            DecisionIndex: 交易決策索引
+        """
+        dates = pd.to_datetime(df['date']).values.astype('datetime64[D]')
+        columns = [col for col in df.columns if col != 'date']
+        quantities = df[columns].fillna(0).to_numpy()
+        return cls(dates, [str(col).replace('.TW', '') for col in columns], quantities)
+
+    def __len__(self):
+        return len(self.calendar)
+
+    def column_mask(self, stock_ids=None):
+        """
+        生成股票列的布林掩碼
+
+        參數:
+            stock_ids (list, optional): 股票 ID 列表，如果為 None 則選取所有股票
+
+        返回:
+            np.ndarray: 股票列的布林掩碼
+        """
+        if stock_ids is None:
+            return np.ones(len(self.stock_ids), dtype=bool)
+        return np.isin(self.stock_ids, [str(stock_id).replace('.TW', '') for stock_id in stock_ids])
+
+    def between(self, start=None, end=None, stock_ids=None):
+        """
+        獲取日期範圍內的交易數量矩陣
+
+        參數:
+            start (datetime 或 str, optional): 開始日期
+            end (datetime 或 str, optional): 結束日期
+            stock_ids (list, optional): 股票 ID 列表，如果為 None 則返回所有股票
+
+        返回:
+            tuple: (dates, cols, quantities)，quantities 為 日期數 × 股票數 的帶符號數量矩陣
+        """
+        lo, hi = self.calendar.bounds(start, end)
+        cols = np.flatnonzero(self.column_mask(stock_ids))
+        return self.calendar.days[lo:hi], cols, self.quantities[lo:hi][:, cols]
+
+    def decisions_on(self, date, stock_ids=None):
+        """
+        獲取指定日期的交易決策
+
+        參數:
+            date (datetime 或 str): 交易日期
+            stock_ids (list, optional): 股票 ID 列表，如果為 None 則返回所有股票
+
+        返回:
+            list: 交易決策列表（只包含數量不為 0 的股票），如果日期不存在則返回 None
+        """
+        pos = self.calendar.index_of(date)
+        if pos is None:
+            return None
+
+        row = self.quantities[pos]
+        cols = np.flatnonzero((row != 0) & self.column_mask(stock_ids))
+        return materialize_decisions(self.stock_ids[cols], self.stock_names[cols], row[cols])
+
+
+def materialize_decisions(stock_ids, stock_names, quantities, prices=None):
+    """
+    將股票數量向量轉換為交易決策列表
+
+    參數:
+        stock_ids (np.ndarray): 股票代碼
+        stock_names (np.ndarray): 股票名稱
+        quantities (np.ndarray): 帶符號的數量，正數為買入，負數為賣出
+        prices (np.ndarray, optional): 價格，如果為 None 則價格為 0
+
+    返回:
+        list: 交易決策列表
+    """
+    quantities = np.asarray(quantities, dtype=np.int64)
+    actions = np.sign(quantities)
+    action_names = ACTION_NAMES[actions + 1]
+    if prices is None:
+        prices = np.zeros(len(quantities))  # 實際價格需要從其他數據源獲取
+
+    return [
+        {
+            'stock_id': stock_id,
+            'stock_name': stock_name,
+            'action': action,
+            'action_name': action_name,
+            'quantity': quantity,
+            'price': price,
+            'reason': f"根據交易模型{action_name}"
+        }
+        for stock_id, stock_name, action, action_name, quantity, price in zip(
+            np.asarray(stock_ids).tolist(),
+            np.asarray(stock_names).tolist(),
+            actions.tolist(),
+            action_names.tolist(),
+            np.abs(quantities).tolist(),
+            np.round(prices, 2).tolist()
+        )
+    ]
@@ -0,0 +1,225 @@
+"""
+TCN-AE 壓縮特徵存儲模組
+將所有股票每個交易日的壓縮特徵打包為 日期 × 股票 × 特徵數 的 float32 數組，
+以內存映射方式打開，單日和日期範圍查詢都只返回數組切片，不會複製數據
+"""
+
+import os
+import logging
+import numpy as np
+import pandas as pd
+from ..config import TCN_FEATURE_STORE_PATH, TRADE_INFO_FILE, TRADING_INDICATORS
+from .trading_calendar import TradingCalendar
+
+# 設置日誌
+logger = logging.getLogger(__name__)
+
+# 特徵存儲目錄中的文件
+FEATURES_FILE = 'features.npy'
+DATES_FILE = 'dates.npy'
+TICKERS_FILE = 'tickers.npy'
+
+# 緩存壓縮特徵存儲
+_feature_store = None
+
+
+class FeatureStore:
+    """
+    內存映射的壓縮特徵存儲
+
+    屬性:
+        features (np.ndarray): 日期 × 股票 × 特徵數 的 float32 數組（通常為只讀的 np.memmap）
+        calendar (TradingCalendar): 有特徵數據的交易日
+        tickers (np.ndarray): 股票代碼
+    """
+
+    def __init__(self, features, dates, tickers):
+        if features.shape[:2] != (len(dates), len(tickers)):
+            raise ValueError(f"特徵數組形狀 {features.shape} 與日期數 {len(dates)}、股票數 {len(tickers)} 不一致")
+        if len(dates) > 1 and np.any(np.diff(dates) <= np.timedelta64(0, 'D')):
+            raise ValueError("特徵存儲的日期必須嚴格遞增")
+        self.features = features
+        self.calendar = TradingCalendar(dates)
+        self.tickers = np.asarray(tickers, dtype=str)
+        self._ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    def __len__(self):
+        return len(self.calendar)
+
+    @property
+    def dates(self):
+        return self.calendar.days
+
+    @property
+    def dim(self):
+        return self.features.shape[2]
+
+    def ticker_index(self, stock_id):
+        """
+        查找股票在存儲中的列位置
+
+        參數:
+            stock_id (str): 股票 ID
+
+        返回:
+            int: 列位置，如果不存在則返回 None
+        """
+        return self._ticker_index.get(str(stock_id))
+
+    def on(self, stock_id, date):
+        """
+        獲取指定股票在指定日期的壓縮特徵
+
+        參數:
+            stock_id (str): 股票 ID
+            date (datetime 或 str): 日期
+
+        返回:
+            np.ndarray: 長度為特徵數的視圖，如果股票或日期不存在則返回 None
+        """
+        col = self.ticker_index(stock_id)
+        row = self.calendar.index_of(date)
+        if col is None or row is None:
+            return None
+        return self.features[row, col]
+
+    def between(self, stock_id, start=None, end=None):
+        """
+        獲取指定股票在日期範圍內的壓縮特徵
+
+        參數:
+            stock_id (str): 股票 ID
+            start (datetime 或 str, optional): 開始日期
+            end (datetime 或 str, optional): 結束日期
+
+        返回:
+            tuple: (dates, features)，features 為 日期數 × 特徵數 的視圖，如果股票不存在則返回 None
+        """
+        col = self.ticker_index(stock_id)
+        if col is None:
+            return None
+        lo, hi = self.calendar.bounds(start, end)
+        return self.calendar.days[lo:hi], self.features[lo:hi, col]
+
+    def snapshot(self, date):
+        """
+        獲取所有股票在指定日期的壓縮特徵
+
+        參數:
+            date (datetime 或 str): 日期
+
+        返回:
+            np.ndarray: 股票數 × 特徵數 的視圖，如果日期不存在則返回 None
+        """
+        row = self.calendar.index_of(date)
+        if row is None:
+            return None
+        return self.features[row]
+
+
+def write_feature_store(path, dates, tickers, features):
+    """
+    將壓縮特徵寫入特徵存儲目錄
+
+    每個文件先寫入臨時文件再替換，不會讀到寫了一半的文件；但三個文件是依次替換的，
+    在替換過程中打開的存儲可能是新舊文件的混合（形狀不一致時 FeatureStore 會拒絕加載）
+
+    參數:
+        path (str): 特徵存儲目錄
+        dates (np.ndarray): 嚴格遞增的交易日 (datetime64[D])
+        tickers (list): 股票代碼
+        features (np.ndarray): 日期 × 股票 × 特徵數 的特徵數組
+    """
+    os.makedirs(path, exist_ok=True)
+    arrays = {
+        DATES_FILE: np.asarray(dates, dtype='datetime64[D]'),
+        TICKERS_FILE: np.asarray(tickers, dtype=str),
+        FEATURES_FILE: np.ascontiguousarray(features, dtype=np.float32)
+    }
+    # 特徵數組最後替換，確保其修改時間不早於索引文件
+    for name, array in arrays.items():
+        target = os.path.join(path, name)
+        with open(target + '.tmp', 'wb') as f:
+            np.save(f, array)
+        os.replace(target + '.tmp', target)
+    logger.info(f"成功寫入壓縮特徵存儲: {path} {arrays[FEATURES_FILE].shape}")
+
+
+def build_feature_store(source=TRADE_INFO_FILE, path=TCN_FEATURE_STORE_PATH, indicators=TRADING_INDICATORS):
+    """
+    從 tcn_daily_trade_info.csv 構建壓縮特徵存儲
+
+    參數:
+        source (str): 包含 date、tic 和特徵列的 CSV 文件
+        path (str): 特徵存儲目錄
+        indicators (list): 特徵列名
+
+    返回:
+        tuple: (日期數, 股票數, 特徵數)
+    """
+    df = pd.read_csv(source, usecols=['date', 'tic'] + list(indicators))
+    df['tic'] = df['tic'].astype(str).str.replace('.TW', '', regex=False)
+    df = df.drop_duplicates(subset=['date', 'tic'], keep='first')
+
+    dates, date_codes = np.unique(pd.to_datetime(df['date']).values.astype('datetime64[D]'), return_inverse=True)
+    tickers, ticker_codes = np.unique(df['tic'].to_numpy(dtype=str), return_inverse=True)
+
+    # 缺失的 (日期, 股票) 組合填 NaN，與特徵為 0 的情況區分
+    features = np.full((len(dates), len(tickers), len(indicators)), np.nan, dtype=np.float32)
+    features[date_codes, ticker_codes] = df[list(indicators)].to_numpy(dtype=np.float32)
+
+    write_feature_store(path, dates, tickers, features)
+    return features.shape
+
+
+def clear_cache():
+    """清除緩存的壓縮特徵存儲，下次調用時重新打開文件"""
+    global _feature_store
+    _feature_store = None
+
+
+def load_feature_store(path=TCN_FEATURE_STORE_PATH):
+    """
+    以內存映射方式打開壓縮特徵存儲（只在第一次調用時打開文件）
+
+    參數:
+        path (str): 特徵存儲目錄
+
+    返回:
+        FeatureStore: 壓縮特徵存儲，如果不存在則返回 None
+    """
+    global _feature_store
+
+    # 如果已經加載過，直接返回緩存的結果
+    if _feature_store is not None:
+        return _feature_store
+
+    features_path = os.path.join(path, FEATURES_FILE)
+    if not os.path.exists(features_path):
+        logger.warning(f"找不到壓縮特徵存儲: {features_path}")
+        return None
+
+    try:
+        # 特徵數組以只讀方式映射，由操作系統按需分頁並在進程間共享
+        features = np.load(features_path, mmap_mode='r')
+        dates = np.load(os.path.join(path, DATES_FILE))
+        tickers = np.load(os.path.join(path, TICKERS_FILE))
+        _feature_store = FeatureStore(features, dates, tickers)
+        logger.info(f"成功打開壓縮特徵存儲: {len(dates)} 個日期, {len(tickers)} 支股票, {features.shape[2]} 維特徵")
+    except Exception as e:
+        logger.error(f"打開壓縮特徵存儲時發生錯誤: {str(e)}")
+        return None
+
+    return _feature_store
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='從 tcn_daily_trade_info.csv 構建 TCN-AE 壓縮特徵存儲')
+    parser.add_argument('--source', default=str(TRADE_INFO_FILE), help='包含 date、tic 和 coding 列的 CSV 文件')
+    parser.add_argument('--output', default=str(TCN_FEATURE_STORE_PATH), help='特徵存儲目錄')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    build_feature_store(args.source, args.output)
@@ -3,129 +3,172 @@ GAT 適配器模組
 負責從原始程式碼中讀取 GAT 模型生成的股票關係數據，並提供給網站 API
 """
 
-import os
-import json
 import numpy as np
-import pandas as pd
 import logging
+from datetime import datetime
 from ..config import (
     PMVRLNGAN_DIR,
     GAT_MODEL_PATH,
     USE_MOCK_DATA
 )
+from .relationship_index import load_relationship_index, clear_cache as clear_relationship_index
 
 # 設置日誌
 logger = logging.getLogger(__name__)
 
-# 緩存股票關係數據
-_stock_relationships = None
+def clear_cache():
+    """
+    清除緩存的股票關係索引，下次調用時重新讀取文件
+    """
+    clear_relationship_index()
 
 def load_stock_relationships():
     """
-    加載股票關係數據
+    加載股票關係索引
     
     返回:
-        dict: 股票關係數據
+        RelationshipIndex: 股票關係索引，如果不存在或使用模擬數據則返回 None
     """
-    global _stock_relationships
+    if USE_MOCK_DATA:
+        return None
+    return load_relationship_index()
+
+def format_relationships(stock_ids, stock_names, sources, targets, weights, **extra):
+    """
+    生成列式格式的股票關係數據
     
-    # 如果已經加載過，直接返回緩存的結果
-    if _stock_relationships is not None:
-        return _stock_relationships
+    參數:
+        stock_ids (np.ndarray): 節點對應的股票代碼
+        stock_names (np.ndarray): 對應的股票名稱
+        sources (np.ndarray): 每條關係的源節點位置
+        targets (np.ndarray): 每條關係的目標節點位置
+        weights (np.ndarray): 每條關係的權重
+        **extra: 附加到結果中的其他字段
+        
+    返回:
+        dict: 股票關係數據，relationships 中每個字段都是等長的列表
+    """
+    result = {
+        'stocks': {
+            'stock_id': stock_ids.tolist(),
+            'stock_name': stock_names.tolist()
+        },
+        'relationships': {
+            'source': stock_ids[sources].tolist(),
+            'source_name': stock_names[sources].tolist(),
+            'target': stock_ids[targets].tolist(),
+            'target_name': stock_names[targets].tolist(),
+            'weight': np.round(weights.astype(np.float64), 6).tolist()
+        }
+    }
+    result.update(extra)
+    return result
+
+def get_mock_stocks():
+    """
+    獲取生成模擬關係數據使用的股票（最近一個季度的低風險股票）
     
+    返回:
+        tuple: (stock_ids, stock_names)，如果無法讀取低風險股票列表則返回 None
+    """
     try:
-        if not USE_MOCK_DATA:
-            # 嘗試從 GAT 模型結果文件中讀取股票關係數據
-            relationships_path = os.path.join(PMVRLNGAN_DIR, 'GAT-main', 'relationships.json')
-            
-            if os.path.exists(relationships_path):
-                with open(relationships_path, 'r') as f:
-                    _stock_relationships = json.load(f)
-                logger.info(f"成功從文件加載股票關係數據: {relationships_path}")
-                return _stock_relationships
-            else:
-                logger.warning(f"找不到股票關係數據文件: {relationships_path}")
-                # 嘗試從低風險股票列表中獲取股票列表
-                from .stock_adapter import get_stock_list
-                stock_list = get_stock_list()
-                if 'stocks' in stock_list:
-                    stocks = stock_list['stocks']
-                    # 生成模擬的股票關係數據
-                    return generate_mock_relationships(stocks)
-                else:
-                    return generate_mock_relationships()
-        else:
-            return generate_mock_relationships()
+        from .stock_list_store import load_stock_list_store
+        store = load_stock_list_store()
+        selected = store.selected_in_quarter(store.quarters[-1]) if store.quarters else None
+        if selected is None or len(selected) == 0:
+            return None
+        return store.stock_ids[selected], store.stock_names[selected]
     except Exception as e:
-        logger.error(f"加載股票關係數據時發生錯誤: {str(e)}")
-        return generate_mock_relationships()
+        logger.warning(f"讀取低風險股票列表失敗: {str(e)}")
+        return None
 
-def generate_mock_relationships(stocks=None):
+def generate_mock_relationships(stocks=None, min_weight=None, stock_id=None):
     """
     生成模擬的股票關係數據
     
     參數:
-        stocks (list, optional): 股票列表
+        stocks (tuple, optional): (stock_ids, stock_names)
+        min_weight (float, optional): 最小關係強度，默認為 0.5
+        stock_id (str, optional): 只返回與該股票相關的關係
         
     返回:
         dict: 模擬的股票關係數據
     """
     # 如果未提供股票列表，使用默認列表
     if stocks is None:
-        stocks = [
-            {'stock_id': '2330', 'stock_name': '台積電'},
-            {'stock_id': '2317', 'stock_name': '鴻海'},
-            {'stock_id': '2454', 'stock_name': '聯發科'},
-            {'stock_id': '2412', 'stock_name': '中華電'},
-            {'stock_id': '2308', 'stock_name': '台達電'}
-        ]
+        stocks = (
+            np.array(['2330', '2317', '2454', '2412', '2308']),
+            np.array(['台積電', '鴻海', '聯發科', '中華電', '台達電'])
+        )
+    stock_ids, stock_names = stocks
     
     # 生成模擬的關係矩陣
-    n = len(stocks)
-    np.random.seed(42)  # 使用固定的種子以獲得一致的結果
-    
-    # 生成隨機的關係權重（0.0-1.0）
-    relationships_matrix = np.random.rand(n, n)
+    n = len(stock_ids)
+    rng = np.random.RandomState(42)  # 使用固定的種子以獲得一致的結果
     
-    # 確保對角線為 1.0（自己與自己的關係最強）
-    np.fill_diagonal(relationships_matrix, 1.0)
-    
-    # 確保矩陣對稱（關係是雙向的）
+    # 生成隨機的關係權重（0.0-1.0），並確保矩陣對稱（關係是雙向的）
+    relationships_matrix = rng.rand(n, n)
     relationships_matrix = (relationships_matrix + relationships_matrix.T) / 2
     
-    # 將矩陣轉換為列表格式
-    relationships = []
-    for i in range(n):
-        for j in range(i+1, n):  # 只保存上三角矩陣（避免重複）
-            if relationships_matrix[i, j] > 0.5:  # 只保存關係強度大於 0.5 的
-                relationships.append({
-                    'source': stocks[i]['stock_id'],
-                    'source_name': stocks[i]['stock_name'],
-                    'target': stocks[j]['stock_id'],
-                    'target_name': stocks[j]['stock_name'],
-                    'weight': float(relationships_matrix[i, j])
-                })
+    # 只保存上三角矩陣（避免重複）中關係強度大於閾值的關係
+    sources, targets = np.triu_indices(n, k=1)
+    weights = relationships_matrix[sources, targets]
+    mask = weights > (0.5 if min_weight is None else min_weight)
+    if stock_id is not None:
+        node = np.flatnonzero(stock_ids == str(stock_id))
+        mask &= np.isin(sources, node) | np.isin(targets, node)
+    sources, targets, weights = sources[mask], targets[mask], weights[mask]
     
     # 按關係強度排序
-    relationships.sort(key=lambda x: x['weight'], reverse=True)
-    
-    return {
-        'stocks': stocks,
-        'relationships': relationships,
-        'is_mock_data': True
-    }
+    order = np.argsort(-weights, kind='stable')
+    return format_relationships(
+        stock_ids, stock_names, sources[order], targets[order], weights[order], is_mock_data=True
+    )
 
-def get_stock_relationships():
+def get_stock_relationships(date=None, top_k=None, min_weight=None, stock_id=None):
     """
     獲取股票關係數據
     
+    參數:
+        date (str, optional): 日期，格式為 'YYYY-MM-DD'，使用該日期當天或之前最近一期的關係，None 表示最新一期
+        top_k (int, optional): 每支股票最多返回的關聯股票數量
+        min_weight (float, optional): 最小注意力權重
+        stock_id (str, optional): 只返回該股票的關聯股票
+        
     返回:
         dict: 股票關係數據
     """
     try:
-        # 加載股票關係數據
-        relationships = load_stock_relationships()
-        return relationships
+        if date:
+            try:
+                datetime.strptime(date, '%Y-%m-%d')
+            except ValueError:
+                return {'error': '日期格式無效，請使用 YYYY-MM-DD 格式'}
+        if top_k is not None and top_k < 1:
+            return {'error': 'top_k 必須為正整數'}
+        
+        # 加載股票關係索引
+        index = load_stock_relationships()
+        if index is None:
+            stocks = None if USE_MOCK_DATA else get_mock_stocks()
+            return generate_mock_relationships(stocks, min_weight, stock_id)
+        
+        if stock_id is not None and str(stock_id) not in index.stock_ids:
+            return {'error': f'找不到股票 {stock_id} 的關係數據'}
+        
+        result = index.query(date, top_k, min_weight, stock_id)
+        if result is None:
+            return {
+                'error': f'{date} 之前沒有股票關係數據',
+                'available_dates': np.datetime_as_string(index.calendar.days, unit='D').tolist()
+            }
+        
+        pos, sources, targets, weights = result
+        return format_relationships(
+            index.stock_ids, index.stock_names, sources, targets, weights,
+            date=str(index.calendar.days[pos]),
+            top_k=min(top_k, index.top_k) if top_k is not None else index.top_k
+        )
     except Exception as e:
         logger.error(f"獲取股票關係數據時發生錯誤: {str(e)}")
-        return {'error': f'獲取股票關係數據時發生錯誤: {str(e)}'} 
\ No newline at end of file
+        return {'error': f'獲取股票關係數據時發生錯誤: {str(e)}'}
@@ -0,0 +1,197 @@
+"""
+績效計算模組
+以向量化方式根據每日收益率計算資產曲線、回撤及夏普、索提諾、卡瑪比率
+"""
+
+import os
+import glob
+import logging
+import numpy as np
+import pandas as pd
+from ..config import PMVRLNGAN_DIR
+
+# 設置日誌
+logger = logging.getLogger(__name__)
+
+# 每年交易日數
+TRADING_DAYS_PER_YEAR = 252
+# 無風險利率 (2%)
+RISK_FREE_RATE = 0.02
+# 初始資產價值
+INITIAL_VALUE = 1000000
+
+# 緩存實際的資產價值序列
+_account_values = None
+
+
+def equity_curve(daily_returns, initial_value=INITIAL_VALUE):
+    """
+    根據每日收益率計算資產價值序列
+
+    參數:
+        daily_returns (np.ndarray): 每日收益率
+        initial_value (float): 初始資產價值
+
+    返回:
+        np.ndarray: 每日收盤後的資產價值
+    """
+    return initial_value * np.cumprod(1 + np.asarray(daily_returns, dtype=np.float64))
+
+
+def drawdown(equity):
+    """
+    計算每日回撤
+
+    參數:
+        equity (np.ndarray): 資產價值序列
+
+    返回:
+        np.ndarray: 每日相對歷史最高點的回撤（0 到 1 之間的正數）
+    """
+    peak = np.maximum.accumulate(equity)
+    return 1 - equity / peak
+
+
+def summarize(daily_returns, calendar_days, initial_value=INITIAL_VALUE, risk_free_rate=RISK_FREE_RATE):
+    """
+    計算績效指標
+
+    參數:
+        daily_returns (np.ndarray): 每日收益率
+        calendar_days (int): 期間的日曆天數，用於計算年化收益率
+        initial_value (float): 初始資產價值
+        risk_free_rate (float): 年化無風險利率
+
+    返回:
+        dict: 績效指標（收益率和回撤為小數），以及每日累積收益率
+    """
+    daily_returns = np.asarray(daily_returns, dtype=np.float64)
+    equity = equity_curve(daily_returns, initial_value)
+    cumulative_returns = equity / initial_value - 1
+
+    total_return = cumulative_returns[-1]
+    annualized_return = (1 + total_return) ** (365 / calendar_days) - 1 if calendar_days > 0 else 0.0
+    max_drawdown = drawdown(equity).max()
+
+    # 夏普比率和索提諾比率均使用日超額收益率並年化
+    excess_returns = daily_returns - risk_free_rate / TRADING_DAYS_PER_YEAR
+    mean_excess = excess_returns.mean()
+    volatility = daily_returns.std()
+    downside = np.sqrt(np.mean(np.minimum(excess_returns, 0) ** 2))
+    annualize = np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    sharpe_ratio = mean_excess / volatility * annualize if volatility > 0 else 0.0
+    sortino_ratio = mean_excess / downside * annualize if downside > 0 else 0.0
+    calmar_ratio = annualized_return / max_drawdown if max_drawdown > 0 else 0.0
+
+    return {
+        'total_return': float(total_return),
+        'annualized_return': float(annualized_return),
+        'annual_volatility': float(volatility * annualize),
+        'sharpe_ratio': float(sharpe_ratio),
+        'sortino_ratio': float(sortino_ratio),
+        'calmar_ratio': float(calmar_ratio),
+        'max_drawdown': float(max_drawdown),
+        'cumulative_returns': cumulative_returns
+    }
+
+
+def format_summary(dates, daily_returns, start_date, end_date, **extra):
+    """
+    生成 /api/results/summary 的績效摘要
+
+    參數:
+        dates (np.ndarray): 交易日 (datetime64[D])
+        daily_returns (np.ndarray): 每日收益率
+        start_date (datetime): 開始日期
+        end_date (datetime): 結束日期
+        **extra: 附加到結果中的其他字段
+
+    返回:
+        dict: 績效摘要數據（收益率和回撤轉換為百分比）
+    """
+    metrics = summarize(daily_returns, (end_date - start_date).days)
+
+    result = {
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'trading_days_count': len(dates),
+        'total_return': round(metrics['total_return'] * 100, 2),  # 轉換為百分比
+        'annualized_return': round(metrics['annualized_return'] * 100, 2),  # 轉換為百分比
+        'sharpe_ratio': round(metrics['sharpe_ratio'], 2),
+        'sortino_ratio': round(metrics['sortino_ratio'], 2),
+        'calmar_ratio': round(metrics['calmar_ratio'], 2),
+        'max_drawdown': round(metrics['max_drawdown'] * 100, 2),  # 轉換為百分比
+        'performance_chart': {
+            'dates': np.datetime_as_string(dates, unit='D').tolist(),
+            'cumulative_returns': np.round(metrics['cumulative_returns'] * 100, 2).tolist()  # 轉換為百分比
+        }
+    }
+    result.update(extra)
+    return result
+
+
+def load_account_values():
+    """
+    加載交易模型回測輸出的實際資產價值序列 (results/account_*.csv)
+
+    返回:
+        pd.Series: 以日期 (datetime64[D]) 為索引的資產價值，如果沒有可用的數據則返回 None
+    """
+    global _account_values
+
+    # 如果已經加載過，直接返回緩存的結果
+    if _account_values is not None:
+        return _account_values if len(_account_values) else None
+
+    _account_values = pd.Series(dtype=np.float64)
+    pattern = os.path.join(PMVRLNGAN_DIR, 'Trading Agent', 'results', 'account_*.csv')
+
+    # 使用最新的一個包含 date 和 account_value 列的文件
+    for path in sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True):
+        try:
+            df = pd.read_csv(path)
+        except Exception:
+            continue
+        if {'date', 'account_value'}.issubset(df.columns) and len(df) > 1:
+            dates = pd.to_datetime(df['date']).values.astype('datetime64[D]')
+            _account_values = pd.Series(df['account_value'].to_numpy(dtype=np.float64), index=dates).sort_index()
+            _account_values = _account_values[~_account_values.index.duplicated(keep='last')]
+            logger.info(f"成功加載資產價值序列: {path}")
+            break
+
+    return _account_values if len(_account_values) else None
+
+
+def clear_cache():
+    """清除緩存的資產價值序列，下次調用時重新讀取文件"""
+    global _account_values
+    _account_values = None
+
+
+def account_value_returns(start_date, end_date):
+    """
+    獲取日期範圍內實際資產價值的每日收益率
+
+    參數:
+        start_date (datetime): 開始日期
+        end_date (datetime): 結束日期
+
+    返回:
+        tuple: (dates, daily_returns)，如果沒有覆蓋該範圍的數據則返回 None
+    """
+    values = load_account_values()
+    if values is None:
+        return None
+
+    index = values.index.values.astype('datetime64[D]')
+    lo = int(np.searchsorted(index, np.datetime64(start_date.date(), 'D'), side='left'))
+    hi = int(np.searchsorted(index, np.datetime64(end_date.date(), 'D'), side='right'))
+    if hi - lo < 2:
+        return None
+
+    # 第一天的收益率相對前一個交易日計算（如果有），否則為 0
+    base = values.values[lo - 1] if lo > 0 else values.values[lo]
+    series = values.values[lo:hi]
+    daily_returns = np.diff(series, prepend=base) / np.concatenate(([base], series[:-1]))
+    return index[lo:hi], daily_returns
@@ -0,0 +1,155 @@
+"""
+股票關係索引模組
+讀取 GAT-main/edge_store.py 生成的 relationships.npz：每個日期、每支股票按注意力權重排序的前 k 個關聯股票，
+以 CSR 稀疏矩陣形式保存，按日期、股票、top_k 和最小權重查詢時只需數組切片和掩碼
+"""
+
+import os
+import logging
+import numpy as np
+from ..config import GAT_RELATIONSHIPS_PATH
+from .trading_calendar import TradingCalendar
+
+# 設置日誌
+logger = logging.getLogger(__name__)
+
+# 緩存股票關係索引
+_relationship_index = None
+
+
+class RelationshipIndex:
+    """
+    按日期組織的稀疏前 k 個關聯股票索引
+
+    第 d 個日期中第 i 支股票的關聯股票位於 indices[indptr[d * n + i]:indptr[d * n + i + 1]]，按權重降序排列
+
+    屬性:
+        calendar (TradingCalendar): 有關係數據的日期（財報季度）
+        stock_ids (np.ndarray): 節點對應的股票代碼
+        stock_names (np.ndarray): 對應的股票名稱
+        indptr (np.ndarray): CSR 行指針，長度為 日期數 × 股票數 + 1
+        indices (np.ndarray): 關聯股票的節點位置
+        weights (np.ndarray): 注意力權重
+        top_k (int): 每支股票保存的關聯股票數量
+    """
+
+    def __init__(self, dates, stock_ids, indptr, indices, weights, top_k):
+        self.calendar = TradingCalendar(dates)
+        self.stock_ids = np.asarray(stock_ids, dtype=str)
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.top_k = int(top_k)
+        if len(indptr) != len(self.calendar) * len(self.stock_ids) + 1:
+            raise ValueError("關係索引的行指針長度與日期數和股票數不一致")
+        self._stock_index = {stock_id: i for i, stock_id in enumerate(self.stock_ids)}
+
+        from .stock_adapter import get_stock_name
+        self.stock_names = np.array([get_stock_name(stock_id) for stock_id in self.stock_ids])
+
+    def __len__(self):
+        return len(self.calendar)
+
+    @property
+    def n_stocks(self):
+        return len(self.stock_ids)
+
+    def date_position(self, date=None):
+        """
+        查找日期對應的關係數據位置（使用該日期當天或之前最近一期的財報）
+
+        參數:
+            date (datetime 或 str, optional): 日期，None 表示最新一期
+
+        返回:
+            int: 日期位置，如果日期早於第一期則返回 None
+        """
+        if date is None:
+            return len(self.calendar) - 1 if len(self.calendar) else None
+        nearest = self.calendar.nearest(date, 'backward')
+        return None if nearest is None else self.calendar.index_of(nearest)
+
+    def query(self, date=None, top_k=None, min_weight=None, stock_id=None):
+        """
+        查詢指定日期的關聯股票
+
+        參數:
+            date (datetime 或 str, optional): 日期，None 表示最新一期
+            top_k (int, optional): 每支股票最多返回的關聯股票數量
+            min_weight (float, optional): 最小注意力權重
+            stock_id (str, optional): 只返回該股票的關聯股票
+
+        返回:
+            tuple: (position, sources, targets, weights)，sources 和 targets 為節點位置；
+                   如果日期或股票不存在則返回 None
+        """
+        pos = self.date_position(date)
+        if pos is None:
+            return None
+
+        n = self.n_stocks
+        if stock_id is None:
+            first, last = pos * n, (pos + 1) * n
+        else:
+            node = self._stock_index.get(str(stock_id))
+            if node is None:
+                return None
+            first, last = pos * n + node, pos * n + node + 1
+
+        starts = self.indptr[first:last]
+        counts = np.diff(self.indptr[first:last + 1])
+        lo, hi = self.indptr[first], self.indptr[last]
+        sources = np.repeat(np.arange(first, last) - pos * n, counts)
+        targets = self.indices[lo:hi]
+        weights = self.weights[lo:hi]
+
+        # 每行已按權重降序排列，行內位置小於 top_k 即為前 top_k 個
+        mask = np.ones(hi - lo, dtype=bool)
+        if top_k is not None and top_k < self.top_k:
+            mask &= np.arange(lo, hi) - np.repeat(starts, counts) < top_k
+        if min_weight is not None:
+            mask &= weights >= min_weight
+
+        return pos, sources[mask], targets[mask], weights[mask]
+
+
+def clear_cache():
+    """清除緩存的股票關係索引，下次調用時重新讀取文件"""
+    global _relationship_index
+    _relationship_index = None
+
+
+def load_relationship_index(path=GAT_RELATIONSHIPS_PATH):
+    """
+    加載股票關係索引（只在第一次調用時讀取文件）
+
+    參數:
+        path (str): relationships.npz 路徑
+
+    返回:
+        RelationshipIndex: 股票關係索引，如果不存在則返回 None
+    """
+    global _relationship_index
+
+    # 如果已經加載過，直接返回緩存的結果
+    if _relationship_index is not None:
+        return _relationship_index
+
+    if not os.path.exists(path):
+        logger.warning(f"找不到股票關係索引文件: {path}")
+        return None
+
+    try:
+        with np.load(path) as data:
+            _relationship_index = RelationshipIndex(
+                data['dates'], data['stock_ids'], data['indptr'], data['indices'], data['weights'], data['top_k']
+            )
+        logger.info(
+            f"成功加載股票關係索引: {len(_relationship_index)} 個日期, {_relationship_index.n_stocks} 支股票, "
+            f"{len(_relationship_index.indices)} 條關係"
+        )
+    except Exception as e:
+        logger.error(f"加載股票關係索引時發生錯誤: {str(e)}")
+        return None
+
+    return _relationship_index
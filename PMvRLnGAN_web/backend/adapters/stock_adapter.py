@@ -10,6 +10,7 @@ import numpy as np
 import logging
 from datetime import datetime
 from ..config import STOCK_LIST_PATH, USE_MOCK_DATA
+from .stock_list_store import load_stock_list_store
 
 # 設置日誌
 logger = logging.getLogger(__name__)
@@ -27,68 +28,30 @@ def get_stock_list(quarter=None):
     """
     try:
         if not USE_MOCK_DATA:
-            # 嘗試從原始數據中讀取低風險股票列表
-            if os.path.exists(STOCK_LIST_PATH):
-                # 讀取 CSV 文件
-                df = pd.read_csv(STOCK_LIST_PATH)
-                
-                # 將日期列轉換為季度格式
-                df['quarter'] = pd.to_datetime(df['date']).apply(date_to_quarter)
-                
-                # 獲取所有股票代碼（列名，排除 'date' 列）
-                stock_columns = [col for col in df.columns if col not in ['date', 'quarter']]
-                
-                # 處理每個季度的數據
-                result = {}
-                for quarter_val, group in df.groupby('quarter'):
-                    # 獲取該季度選中的股票（值為1的列）
-                    selected_stocks = []
-                    for _, row in group.iterrows():
-                        for stock_id in stock_columns:
-                            if row[stock_id] == 1:
-                                # 移除 .TW 後綴
-                                clean_stock_id = stock_id.replace('.TW', '')
-                                # 獲取股票名稱（這裡使用模擬數據，實際應從另一個來源獲取）
-                                stock_name = get_stock_name(clean_stock_id)
-                                selected_stocks.append({
-                                    'stock_id': clean_stock_id,
-                                    'stock_name': stock_name,
-                                    'risk': round(np.random.uniform(0.1, 0.5), 2),  # 模擬風險值
-                                    'weight': 1.0 / len(selected_stocks) if selected_stocks else 0  # 平均權重
-                                })
-                    
-                    # 調整權重使總和為 1
-                    if selected_stocks:
-                        total_weight = sum(stock['weight'] for stock in selected_stocks)
-                        for stock in selected_stocks:
-                            stock['weight'] = round(stock['weight'] / total_weight, 2)
-                        
-                        # 再次調整以確保總和為 1（處理四捨五入的誤差）
-                        total_weight = sum(stock['weight'] for stock in selected_stocks)
-                        if total_weight != 1:
-                            selected_stocks[0]['weight'] += round(1 - total_weight, 2)
-                    
-                    result[quarter_val] = selected_stocks
-                
-                # 如果指定了季度，過濾數據
-                if quarter and quarter in result:
-                    return {
-                        'quarter': quarter,
-                        'stocks': result[quarter]
-                    }
-                elif quarter:
+            # 從預加載的低風險股票列表存儲中讀取
+            store = load_stock_list_store()
+            
+            # 如果指定了季度，只構建該季度的數據
+            if quarter:
+                selected = store.selected_in_quarter(quarter)
+                if selected is None:
                     return {
                         'error': f'找不到季度 {quarter} 的股票列表',
-                        'available_quarters': list(result.keys())
-                    }
-                else:
-                    return {
-                        'quarters': list(result.keys()),
-                        'stocks': result
+                        'available_quarters': store.quarters
                     }
-            else:
-                logger.warning(f"找不到低風險股票列表文件: {STOCK_LIST_PATH}")
-                raise FileNotFoundError(f"找不到低風險股票列表文件: {STOCK_LIST_PATH}")
+                return {
+                    'quarter': quarter,
+                    'stocks': build_stock_entries(store, selected)
+                }
+            
+            result = {}
+            for quarter_val in store.quarters:
+                result[quarter_val] = build_stock_entries(store, store.selected_in_quarter(quarter_val))
+            
+            return {
+                'quarters': store.quarters,
+                'stocks': result
+            }
         else:
             # 使用模擬數據
             return generate_mock_stock_list(quarter)
@@ -98,6 +61,40 @@ def get_stock_list(quarter=None):
             'error': f'獲取低風險股票列表時發生錯誤: {str(e)}'
         }
 
+def build_stock_entries(store, selected):
+    """
+    根據被選中股票的列位置構建股票列表
+    
+    參數:
+        store (StockListStore): 低風險股票列表存儲
+        selected (np.ndarray): 被選中股票的列位置
+        
+    返回:
+        list: 股票列表，每支股票平均分配權重
+    """
+    if len(selected) == 0:
+        return []
+    
+    # 平均權重，四捨五入的誤差加到第一支股票上以確保總和為 1
+    weights = np.full(len(selected), round(1.0 / len(selected), 4))
+    weights[0] = round(weights[0] + 1 - weights.sum(), 4)
+    risks = np.round(np.random.uniform(0.1, 0.5, len(selected)), 2)  # 模擬風險值
+    
+    return [
+        {
+            'stock_id': stock_id,
+            'stock_name': stock_name,
+            'risk': float(risk),
+            'weight': float(weight)
+        }
+        for stock_id, stock_name, risk, weight in zip(
+            store.stock_ids[selected].tolist(),
+            store.stock_names[selected].tolist(),
+            risks,
+            weights
+        )
+    ]
+
 def date_to_quarter(date):
     """
     將日期轉換為季度格式 (YYYY-QN)
@@ -219,14 +216,9 @@ def get_available_quarters():
     """
     try:
         if not USE_MOCK_DATA:
-            # 從原始數據中讀取可用的季度
-            if os.path.exists(STOCK_LIST_PATH):
-                df = pd.read_csv(STOCK_LIST_PATH)
-                quarters = pd.to_datetime(df['date']).apply(date_to_quarter).unique().tolist()
-                return {'quarters': sorted(quarters)}
-            else:
-                logger.warning(f"找不到低風險股票列表文件: {STOCK_LIST_PATH}")
-                raise FileNotFoundError(f"找不到低風險股票列表文件: {STOCK_LIST_PATH}")
+            # 從預加載的低風險股票列表存儲中讀取可用的季度
+            store = load_stock_list_store()
+            return {'quarters': list(store.quarters)}
         else:
             # 使用模擬數據
             mock_data = generate_mock_stock_list()
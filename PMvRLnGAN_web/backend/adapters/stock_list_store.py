@@ -0,0 +1,152 @@
+"""
+低風險股票列表存儲模組
+在啟動時一次性讀取 Low-risk stock list.csv，並以緊湊的布林矩陣形式保存於內存中，
+供股票適配器和交易適配器共用
+"""
+
+import os
+import logging
+import numpy as np
+import pandas as pd
+from ..config import STOCK_LIST_PATH
+
+# 設置日誌
+logger = logging.getLogger(__name__)
+
+# 緩存低風險股票列表存儲
+_stock_list_store = None
+
+
+class StockListStore:
+    """
+    低風險股票列表的列式內存存儲
+
+    屬性:
+        dates (np.ndarray): 排序後的日期索引 (datetime64[D])
+        columns (list): 原始 CSV 的股票列名，如 '2330.TW'
+        stock_ids (np.ndarray): 移除 .TW 後綴的股票代碼
+        stock_names (np.ndarray): 對應的股票名稱
+        selection (np.ndarray): 日期 × 股票的布林選股矩陣
+        quarters (list): 排序後的季度列表，如 '2021-Q4'
+        quarter_selection (np.ndarray): 季度 × 股票的布林選股矩陣
+    """
+
+    def __init__(self, dates, columns, selection):
+        # 按日期排序，確保後續可以使用二分查找
+        order = np.argsort(dates, kind='stable')
+        self.dates = dates[order]
+        self.selection = np.ascontiguousarray(selection[order], dtype=bool)
+        self.columns = list(columns)
+        self.stock_ids = np.array([col.replace('.TW', '') for col in self.columns])
+
+        from .stock_adapter import get_stock_name
+        self.stock_names = np.array([get_stock_name(stock_id) for stock_id in self.stock_ids])
+
+        # 預先計算每個季度的選股結果（季度內任一日期被選中即視為選中）
+        date_quarters = dates_to_quarters(self.dates)
+        self.quarters, inverse = np.unique(date_quarters, return_inverse=True)
+        self.quarters = self.quarters.tolist()
+        self.quarter_selection = np.zeros((len(self.quarters), len(self.columns)), dtype=bool)
+        np.logical_or.at(self.quarter_selection, inverse, self.selection)
+        self._quarter_index = {q: i for i, q in enumerate(self.quarters)}
+
+    def __len__(self):
+        return len(self.dates)
+
+    def date_index(self, date):
+        """
+        查找指定日期在日期索引中的位置
+
+        參數:
+            date (datetime 或 str): 日期
+
+        返回:
+            int: 日期位置，如果不存在則返回 None
+        """
+        key = np.datetime64(pd.Timestamp(date).date(), 'D')
+        pos = int(np.searchsorted(self.dates, key))
+        if pos < len(self.dates) and self.dates[pos] == key:
+            return pos
+        return None
+
+    def selected_on(self, date):
+        """
+        獲取指定日期被選中的股票列位置
+
+        參數:
+            date (datetime 或 str): 日期
+
+        返回:
+            np.ndarray: 被選中股票的列位置，如果日期不存在則返回 None
+        """
+        pos = self.date_index(date)
+        if pos is None:
+            return None
+        return np.flatnonzero(self.selection[pos])
+
+    def selected_in_quarter(self, quarter):
+        """
+        獲取指定季度被選中的股票列位置
+
+        參數:
+            quarter (str): 季度，格式為 'YYYY-QN'
+
+        返回:
+            np.ndarray: 被選中股票的列位置，如果季度不存在則返回 None
+        """
+        pos = self._quarter_index.get(quarter)
+        if pos is None:
+            return None
+        return np.flatnonzero(self.quarter_selection[pos])
+
+
+def dates_to_quarters(dates):
+    """
+    將 datetime64 日期數組轉換為季度格式 (YYYY-QN)
+
+    參數:
+        dates (np.ndarray): datetime64 日期數組
+
+    返回:
+        np.ndarray: 季度字符串數組
+    """
+    months = dates.astype('datetime64[M]').astype(np.int64)
+    years = months // 12 + 1970
+    quarters = months % 12 // 3 + 1
+    return np.char.add(np.char.add(years.astype(str), '-Q'), quarters.astype(str))
+
+
+def clear_cache():
+    """清除緩存的低風險股票列表存儲，下次調用時重新讀取文件"""
+    global _stock_list_store
+    _stock_list_store = None
+
+
+def load_stock_list_store():
+    """
+    加載低風險股票列表存儲（只在第一次調用時讀取文件）
+
+    返回:
+        StockListStore: 低風險股票列表存儲
+    """
+    global _stock_list_store
+
+    # 如果已經加載過，直接返回緩存的結果
+    if _stock_list_store is not None:
+        return _stock_list_store
+
+    if not os.path.exists(STOCK_LIST_PATH):
+        logger.warning(f"找不到低風險股票列表文件: {STOCK_LIST_PATH}")
+        raise FileNotFoundError(f"找不到低風險股票列表文件: {STOCK_LIST_PATH}")
+
+    df = pd.read_csv(STOCK_LIST_PATH)
+    dates = pd.to_datetime(df['date']).values.astype('datetime64[D]')
+    columns = [col for col in df.columns if col != 'date']
+    selection = df[columns].to_numpy() == 1
+
+    _stock_list_store = StockListStore(dates, columns, selection)
+    logger.info(
+        f"成功加載低風險股票列表: {len(_stock_list_store)} 個日期, "
+        f"{len(columns)} 支股票, {len(_stock_list_store.quarters)} 個季度"
+    )
+    return _stock_list_store
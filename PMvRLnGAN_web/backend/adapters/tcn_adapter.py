@@ -3,8 +3,6 @@ TCN-AE 適配器模組
 負責從原始程式碼中讀取 TCN-AE 模型生成的壓縮特徵，並提供給網站 API
 """
 
-import os
-import json
 import numpy as np
 import pandas as pd
 import logging
@@ -13,61 +11,87 @@ from ..config import (
     PMVRLNGAN_DIR,
     TCN_MODEL_PATH,
     USE_MOCK_DATA,
-    TRADE_INFO_PATH
+    TRADE_INFO_PATH,
+    TCN_FEATURE_CACHE_MAX_ENTRIES,
+    TCN_FEATURE_CACHE_MAX_BYTES
 )
+from ..cache import BoundedCache
+from .feature_store import load_feature_store, clear_cache as clear_feature_store
 
 # 設置日誌
 logger = logging.getLogger(__name__)
 
-# 緩存壓縮特徵
-_compressed_features = {}
+# 緩存壓縮特徵查詢結果（按最近最少使用淘汰）
+_compressed_features = BoundedCache('tcn_features', TCN_FEATURE_CACHE_MAX_ENTRIES, TCN_FEATURE_CACHE_MAX_BYTES)
 
-def load_compressed_features(stock_id, date=None):
+def clear_cache():
+    """
+    清除緩存的壓縮特徵存儲和查詢結果，下次調用時重新打開文件
+    """
+    clear_feature_store()
+    _compressed_features.clear()
+
+def load_compressed_features(stock_id, date=None, start_date=None, end_date=None):
     """
     加載指定股票的壓縮特徵
     
     參數:
         stock_id (str): 股票 ID
         date (str, optional): 日期，格式為 'YYYY-MM-DD'
+        start_date (str, optional): 未指定日期時的開始日期
+        end_date (str, optional): 未指定日期時的結束日期
         
     返回:
         dict: 壓縮特徵數據
     """
-    global _compressed_features
-    
-    # 生成緩存鍵
-    cache_key = f"{stock_id}_{date}" if date else stock_id
-    
-    # 如果已經加載過，直接返回緩存的結果
-    if cache_key in _compressed_features:
-        return _compressed_features[cache_key]
+    # 如果已經查詢過，直接返回緩存的結果
+    cache_key = (stock_id, date, start_date, end_date)
+    cached = _compressed_features.get(cache_key)
+    if cached is not None:
+        return cached
     
     try:
         if not USE_MOCK_DATA:
-            # 嘗試從 TCN-AE 模型結果文件中讀取壓縮特徵
-            features_dir = os.path.join(PMVRLNGAN_DIR, 'TCN-AE', 'compressed_features')
+            # 從內存映射的壓縮特徵存儲中讀取，只有返回的切片會被實際讀入內存
+            store = load_feature_store()
+            if store is None:
+                return generate_mock_features(stock_id, date)
+            
+            from .stock_adapter import get_stock_name
+            stock_name = get_stock_name(stock_id)
             
-            # 如果指定了日期，嘗試讀取該日期的特徵
+            # 如果指定了日期，返回該日期的特徵
             if date:
-                features_path = os.path.join(features_dir, f"{stock_id}_{date}.json")
-                if os.path.exists(features_path):
-                    with open(features_path, 'r') as f:
-                        features = json.load(f)
-                    logger.info(f"成功從文件加載壓縮特徵: {features_path}")
-                    _compressed_features[cache_key] = features
-                    return features
+                features = store.on(stock_id, date)
+                if features is None or np.isnan(features).any():
+                    logger.warning(f"壓縮特徵存儲中沒有股票 {stock_id} 在 {date} 的特徵")
+                    return generate_mock_features(stock_id, date)
+                result = {
+                    'stock_id': stock_id,
+                    'stock_name': stock_name,
+                    'date': date,
+                    'features': features.tolist()
+                }
+                _compressed_features.put(cache_key, result)
+                return result
             
-            # 如果沒有指定日期或找不到指定日期的文件，嘗試讀取所有日期的特徵
-            features_path = os.path.join(features_dir, f"{stock_id}.json")
-            if os.path.exists(features_path):
-                with open(features_path, 'r') as f:
-                    features = json.load(f)
-                logger.info(f"成功從文件加載壓縮特徵: {features_path}")
-                _compressed_features[cache_key] = features
-                return features
-            else:
-                logger.warning(f"找不到壓縮特徵文件: {features_path}")
+            # 如果沒有指定日期，返回日期範圍內所有日期的特徵
+            result = store.between(stock_id, start_date, end_date)
+            if result is None:
+                logger.warning(f"壓縮特徵存儲中沒有股票 {stock_id} 的特徵")
                 return generate_mock_features(stock_id, date)
+            dates, features = result
+            valid = ~np.isnan(features).any(axis=1)
+            result = {
+                'stock_id': stock_id,
+                'stock_name': stock_name,
+                'daily_features': dict(zip(
+                    np.datetime_as_string(dates[valid], unit='D').tolist(),
+                    features[valid].tolist()
+                ))
+            }
+            _compressed_features.put(cache_key, result)
+            return result
         else:
             return generate_mock_features(stock_id, date)
     except Exception as e:
@@ -127,13 +151,15 @@ def generate_mock_features(stock_id, date=None):
             'is_mock_data': True
         }
 
-def get_compressed_features(stock_id, date=None):
+def get_compressed_features(stock_id, date=None, start_date=None, end_date=None):
     """
     獲取指定股票的壓縮特徵
     
     參數:
         stock_id (str): 股票 ID
         date (str, optional): 日期，格式為 'YYYY-MM-DD'
+        start_date (str, optional): 未指定日期時的開始日期，格式為 'YYYY-MM-DD'
+        end_date (str, optional): 未指定日期時的結束日期，格式為 'YYYY-MM-DD'
         
     返回:
         dict: 壓縮特徵數據
@@ -144,14 +170,15 @@ def get_compressed_features(stock_id, date=None):
             return {'error': '股票 ID 不能為空'}
         
         # 檢查日期格式（如果提供）
-        if date:
-            try:
-                datetime.strptime(date, '%Y-%m-%d')
-            except ValueError:
-                return {'error': '日期格式無效，請使用 YYYY-MM-DD 格式'}
+        try:
+            for value in (date, start_date, end_date):
+                if value:
+                    datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            return {'error': '日期格式無效，請使用 YYYY-MM-DD 格式'}
         
         # 加載壓縮特徵
-        features = load_compressed_features(stock_id, date)
+        features = load_compressed_features(stock_id, date, start_date, end_date)
         return features
     except Exception as e:
         logger.error(f"獲取壓縮特徵時發生錯誤: {str(e)}")
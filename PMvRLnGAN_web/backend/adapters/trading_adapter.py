@@ -15,27 +15,59 @@ from ..config import (
     TRADING_END_DATE, 
     TRADE_INFO_PATH, 
     USE_MOCK_DATA,
+    USE_LIVE_INFERENCE,
     PMVRLNGAN_DIR,
     STOCK_LIST_PATH,
-    TRADING_MODEL_PATH
+    TRADING_MODEL_PATH,
+    TRADING_DATA_CACHE_MAX_ENTRIES,
+    TRADING_DATA_CACHE_MAX_BYTES,
+    TRADING_DATA_CACHE_TTL
 )
+from ..cache import BoundedCache
+from .stock_list_store import load_stock_list_store
+from .trading_calendar import TradingCalendar
+from .decision_index import DecisionIndex
+from .trading_inference import load_inference_engine
+from .performance import format_summary, account_value_returns
 
 # 設置日誌
 logger = logging.getLogger(__name__)
 
 # 緩存有效交易日列表
 _valid_trading_days = None
-# 緩存交易數據
-_trading_data = None
+# 緩存交易日曆
+_trading_calendar = None
+# 緩存每日交易數據（按最近最少使用淘汰）
+_trading_data = BoundedCache(
+    'trading_data', TRADING_DATA_CACHE_MAX_ENTRIES, TRADING_DATA_CACHE_MAX_BYTES, TRADING_DATA_CACHE_TTL
+)
 # 緩存模型
 _trading_model = None
+# 緩存實時推理引擎
+_inference_engine = None
 # 緩存模型配置
 _model_config = None
 # 緩存模型性能指標
 _model_performance = None
-# 緩存交易決策示例
+# 緩存交易決策示例（按日期索引的 DecisionIndex）
 _trading_decisions_examples = None
 
+def clear_cache():
+    """
+    清除所有緩存的交易數據、模型和交易日，下次調用時重新讀取文件
+    """
+    global _valid_trading_days, _trading_calendar, _trading_model
+    global _inference_engine, _model_config, _model_performance, _trading_decisions_examples
+    
+    _valid_trading_days = None
+    _trading_calendar = None
+    _trading_data.clear()
+    _trading_model = None
+    _inference_engine = None
+    _model_config = None
+    _model_performance = None
+    _trading_decisions_examples = None
+
 def load_trading_model():
     """
     加載訓練好的交易模型
@@ -43,10 +75,10 @@ def load_trading_model():
     返回:
         tuple: (model, config) 模型和配置
     """
-    global _trading_model, _model_config, _model_performance, _trading_decisions_examples
+    global _trading_model, _model_config, _model_performance, _trading_decisions_examples, _inference_engine
     
     # 如果已經加載過，直接返回緩存的結果
-    if _trading_model is not None and _model_config is not None:
+    if _model_config is not None:
         return _trading_model, _model_config
     
     try:
@@ -71,20 +103,19 @@ def load_trading_model():
                 
                 # 加載交易決策示例
                 if os.path.exists(decisions_path):
-                    _trading_decisions_examples = pd.read_csv(decisions_path)
+                    _trading_decisions_examples = DecisionIndex.from_frame(pd.read_csv(decisions_path))
                     logger.info(f"成功加載交易決策示例: {decisions_path}")
                 
-                # 注意：實際上我們不需要加載模型本身，因為我們只使用預先生成的決策
-                # 如果需要使用模型進行實時預測，可以取消下面的註釋
-                """
-                try:
-                    from stable_baselines3 import PPO
-                    _trading_model = PPO.load(model_path)
-                    logger.info(f"成功加載交易模型: {model_path}")
-                except Exception as e:
-                    logger.error(f"加載交易模型時發生錯誤: {str(e)}")
-                    _trading_model = None
-                """
+                # 啟用實時推理時加載模型本身，並預先構建每個交易日的觀測值
+                if USE_LIVE_INFERENCE:
+                    stock_ids = _model_config.get('env_info', {}).get('tickers')
+                    if stock_ids is None and _trading_decisions_examples is not None:
+                        stock_ids = _trading_decisions_examples.stock_ids.tolist()
+                    if stock_ids:
+                        _inference_engine = load_inference_engine(_model_config, stock_ids)
+                        _trading_model = _inference_engine.model if _inference_engine is not None else None
+                    else:
+                        logger.warning("模型配置中沒有交易的股票列表，無法啟用實時推理")
                 
                 return _trading_model, _model_config
             else:
@@ -103,7 +134,7 @@ def load_trading_days():
     返回:
         list: 有效交易日期列表 (datetime 對象)
     """
-    global _valid_trading_days
+    global _valid_trading_days, _trading_calendar
     
     # 如果已經加載過，直接返回緩存的結果
     if _valid_trading_days is not None:
@@ -111,21 +142,17 @@ def load_trading_days():
     
     try:
         if not USE_MOCK_DATA:
-            # 從低風險股票列表中讀取交易日期
-            if os.path.exists(STOCK_LIST_PATH):
-                df = pd.read_csv(STOCK_LIST_PATH)
-                dates = pd.to_datetime(df['date']).tolist()
-                _valid_trading_days = sorted(dates)
-                logger.info(f"成功從低風險股票列表加載了 {len(_valid_trading_days)} 個交易日")
-                
-                # 更新配置中的交易日期範圍
-                global TRADING_START_DATE, TRADING_END_DATE
-                TRADING_START_DATE = _valid_trading_days[0]
-                TRADING_END_DATE = _valid_trading_days[-1]
-                logger.info(f"更新交易日期範圍: {TRADING_START_DATE.strftime('%Y-%m-%d')} 至 {TRADING_END_DATE.strftime('%Y-%m-%d')}")
-            else:
-                logger.warning(f"找不到低風險股票列表文件: {STOCK_LIST_PATH}")
-                raise FileNotFoundError(f"找不到低風險股票列表文件: {STOCK_LIST_PATH}")
+            # 從預加載的低風險股票列表存儲中讀取交易日期（已排序）
+            store = load_stock_list_store()
+            _trading_calendar = TradingCalendar(store.dates)
+            _valid_trading_days = _trading_calendar.to_datetimes()
+            logger.info(f"成功從低風險股票列表加載了 {len(_valid_trading_days)} 個交易日")
+            
+            # 更新配置中的交易日期範圍
+            global TRADING_START_DATE, TRADING_END_DATE
+            TRADING_START_DATE = _valid_trading_days[0]
+            TRADING_END_DATE = _valid_trading_days[-1]
+            logger.info(f"更新交易日期範圍: {TRADING_START_DATE.strftime('%Y-%m-%d')} 至 {TRADING_END_DATE.strftime('%Y-%m-%d')}")
         else:
             raise FileNotFoundError("使用模擬數據")
     except Exception as e:
@@ -146,9 +173,20 @@ def load_trading_days():
             # 添加更多假日...
         ]
         _valid_trading_days = [d for d in _valid_trading_days if d not in holidays]
+        _trading_calendar = TradingCalendar(_valid_trading_days)
     
     return _valid_trading_days
 
+def load_trading_calendar():
+    """
+    獲取交易日曆（與 load_trading_days 共用同一份交易日數據）
+    
+    返回:
+        TradingCalendar: 交易日曆
+    """
+    load_trading_days()
+    return _trading_calendar
+
 def load_trading_data(date):
     """
     加載指定日期的交易數據
@@ -159,8 +197,6 @@ def load_trading_data(date):
     返回:
         DataFrame: 交易數據，如果找不到則返回 None
     """
-    global _trading_data
-    
     # 將日期轉換為 datetime 對象（如果是字符串）
     if isinstance(date, str):
         try:
@@ -172,8 +208,9 @@ def load_trading_data(date):
     date = date.replace(hour=0, minute=0, second=0, microsecond=0)
     
     # 如果已經加載過該日期的數據，直接返回
-    if _trading_data is not None and date in _trading_data:
-        return _trading_data[date]
+    df = _trading_data.get(date)
+    if df is not None:
+        return df
     
     if not USE_MOCK_DATA:
         try:
@@ -185,12 +222,8 @@ def load_trading_data(date):
                 # 讀取 CSV 文件
                 df = pd.read_csv(file_path)
                 
-                # 初始化緩存（如果需要）
-                if _trading_data is None:
-                    _trading_data = {}
-                
                 # 緩存數據
-                _trading_data[date] = df
+                _trading_data.put(date, df)
                 
                 return df
             else:
@@ -213,7 +246,7 @@ def is_valid_trading_day(date):
     返回:
         bool: 如果是有效交易日則返回 True，否則返回 False
     """
-    trading_days = load_trading_days()
+    calendar = load_trading_calendar()
     
     # 將日期轉換為 datetime 對象（如果不是）
     if not isinstance(date, datetime):
@@ -222,11 +255,8 @@ def is_valid_trading_day(date):
         except ValueError:
             return False
     
-    # 只比較日期部分
-    date = date.replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # 檢查是否在有效交易日列表中
-    return any(d.date() == date.date() for d in trading_days)
+    # 在交易日曆中二分查找
+    return calendar.contains(date)
 
 def is_date_in_range(date):
     """
@@ -239,7 +269,7 @@ def is_date_in_range(date):
         bool: 如果在範圍內則返回 True，否則返回 False
     """
     # 確保交易日已加載（這會更新 TRADING_START_DATE 和 TRADING_END_DATE）
-    load_trading_days()
+    calendar = load_trading_calendar()
     
     # 將日期轉換為 datetime 對象（如果是字符串）
     if isinstance(date, str):
@@ -249,11 +279,7 @@ def is_date_in_range(date):
             return False
     
     # 只比較日期部分
-    date = date.replace(hour=0, minute=0, second=0, microsecond=0)
-    start_date = TRADING_START_DATE.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_date = TRADING_END_DATE.replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    return start_date <= date <= end_date
+    return calendar.in_range(date)
 
 def get_nearest_trading_day(date, direction='backward'):
     """
@@ -273,20 +299,8 @@ def get_nearest_trading_day(date, direction='backward'):
         except ValueError:
             return None
     
-    # 只比較日期部分
-    date = date.replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # 獲取所有交易日
-    trading_days = load_trading_days()
-    
-    if direction == 'backward':
-        # 向前查找（小於等於指定日期的最大交易日）
-        valid_days = [d for d in trading_days if d <= date]
-        return max(valid_days) if valid_days else None
-    else:
-        # 向後查找（大於等於指定日期的最小交易日）
-        valid_days = [d for d in trading_days if d >= date]
-        return min(valid_days) if valid_days else None
+    # 'backward' 查找小於等於指定日期的最大交易日，'forward' 查找大於等於指定日期的最小交易日
+    return load_trading_calendar().nearest(date, direction)
 
 def get_trading_decisions(date, stock_ids=None):
     """
@@ -329,85 +343,57 @@ def get_trading_decisions(date, stock_ids=None):
             # 加載模型和配置
             model, config = load_trading_model()
             
+            # 使用模型實時推理
+            if _inference_engine is not None:
+                decisions = _inference_engine.decisions([date_obj], stock_ids)[0]
+                if decisions is not None:
+                    return {
+                        'date': date,
+                        'decisions': decisions,
+                        'source': 'model_inference'
+                    }
+            
             # 加載交易決策示例
             global _trading_decisions_examples
             if _trading_decisions_examples is not None:
                 # 檢查是否有該日期的決策示例
-                if 'date' in _trading_decisions_examples.columns:
-                    date_decisions = _trading_decisions_examples[_trading_decisions_examples['date'] == date]
-                    if not date_decisions.empty:
-                        # 使用示例決策
-                        decisions = []
-                        for _, row in date_decisions.iterrows():
-                            for col in row.index:
-                                if col != 'date' and pd.notna(row[col]) and row[col] != 0:
-                                    stock_id = col
-                                    quantity = int(row[col])
-                                    action = 1 if quantity > 0 else -1 if quantity < 0 else 0
-                                    
-                                    # 獲取股票名稱
-                                    from .stock_adapter import get_stock_name
-                                    stock_name = get_stock_name(stock_id)
-                                    
-                                    decisions.append({
-                                        'stock_id': stock_id,
-                                        'stock_name': stock_name,
-                                        'action': action,
-                                        'action_name': '買入' if action == 1 else '賣出' if action == -1 else '持有',
-                                        'quantity': abs(quantity),
-                                        'price': 0,  # 實際價格需要從其他數據源獲取
-                                        'reason': f"根據交易模型{'買入' if action == 1 else '賣出' if action == -1 else '持有'}"
-                                    })
-                        
-                        return {
-                            'date': date,
-                            'decisions': decisions,
-                            'source': 'model_examples'
-                        }
-            
-            # 從低風險股票列表中讀取該日期的股票
-            df = pd.read_csv(STOCK_LIST_PATH)
-            df['date'] = pd.to_datetime(df['date'])
+                decisions = _trading_decisions_examples.decisions_on(date_obj, stock_ids)
+                if decisions is not None:
+                    # 使用示例決策
+                    return {
+                        'date': date,
+                        'decisions': decisions,
+                        'source': 'model_examples'
+                    }
             
-            # 過濾出指定日期的數據
-            date_df = df[df['date'] == date_obj]
+            # 從預加載的低風險股票列表存儲中讀取該日期被選中的股票
+            store = load_stock_list_store()
+            selected = store.selected_on(date_obj)
             
-            if date_df.empty:
+            if selected is None:
                 logger.warning(f"找不到日期 {date} 的股票數據")
                 return generate_mock_trading_decisions(date, stock_ids)
             
-            # 獲取所有股票列（排除 'date' 列）
-            stock_columns = [col for col in date_df.columns if col != 'date']
+            # 只保留指定的股票
+            if stock_ids is not None:
+                selected = selected[np.isin(store.stock_ids[selected], stock_ids)]
             
             # 生成交易決策
             decisions = []
-            for stock_col in stock_columns:
-                # 只處理值為 1 的股票（被選中的低風險股票）
-                if date_df[stock_col].values[0] == 1:
-                    # 移除 .TW 後綴
-                    stock_id = stock_col.replace('.TW', '')
-                    
-                    # 獲取股票名稱
-                    from .stock_adapter import get_stock_name
-                    stock_name = get_stock_name(stock_id)
-                    
-                    # 生成交易決策（基於模型或隨機）
-                    # 這裡我們使用一個基於日期和股票 ID 的確定性隨機生成器
-                    # 實際應用中，應該使用模型生成決策
-                    import random
-                    random.seed(int(date.replace('-', '')) + int(stock_id))
-                    action = random.choice([-1, 0, 1])
-                    quantity = random.randint(1, 10) if action != 0 else 0
-                    
-                    decisions.append({
-                        'stock_id': stock_id,
-                        'stock_name': stock_name,
-                        'action': action,
-                        'action_name': '買入' if action == 1 else '賣出' if action == -1 else '持有',
-                        'quantity': quantity,
-                        'price': round(random.uniform(50, 500), 2),
-                        'reason': f"根據交易模型{'買入' if action == 1 else '賣出' if action == -1 else '持有'}"
-                    })
+            for stock_id, stock_name in zip(store.stock_ids[selected].tolist(),
+                                            store.stock_names[selected].tolist()):
+                # 生成交易決策（基於模型或隨機）
+                action, quantity, price = generate_model_decision(date, stock_id)
+                
+                decisions.append({
+                    'stock_id': stock_id,
+                    'stock_name': stock_name,
+                    'action': action,
+                    'action_name': '買入' if action == 1 else '賣出' if action == -1 else '持有',
+                    'quantity': quantity,
+                    'price': price,
+                    'reason': f"根據交易模型{'買入' if action == 1 else '賣出' if action == -1 else '持有'}"
+                })
             
             return {
                 'date': date,
@@ -424,6 +410,148 @@ def get_trading_decisions(date, stock_ids=None):
         logger.error(f"獲取交易決策時發生錯誤: {str(e)}")
         return {'error': f'獲取交易決策時發生錯誤: {str(e)}'}
 
+def generate_model_decision(date, stock_id):
+    """
+    為被選中的低風險股票生成交易決策
+    這裡我們使用一個基於日期和股票 ID 的確定性隨機生成器
+    實際應用中，應該使用模型生成決策
+    
+    參數:
+        date (str): 交易日期，格式為 'YYYY-MM-DD'
+        stock_id (str): 股票 ID
+        
+    返回:
+        tuple: (action, quantity, price)
+    """
+    import random
+    random.seed(int(date.replace('-', '')) + int(stock_id))
+    action = random.choice([-1, 0, 1])
+    quantity = random.randint(1, 10) if action != 0 else 0
+    return action, quantity, round(random.uniform(50, 500), 2)
+
+def get_trading_decisions_range(start_date=None, end_date=None, stock_ids=None):
+    """
+    獲取日期範圍內所有交易日的交易決策（列式格式）
+    
+    參數:
+        start_date (str, optional): 開始日期，格式為 'YYYY-MM-DD'，None 表示從第一個交易日開始
+        end_date (str, optional): 結束日期，格式為 'YYYY-MM-DD'，None 表示到最後一個交易日為止
+        stock_ids (list, optional): 股票 ID 列表，如果為 None 則返回所有股票
+        
+    返回:
+        dict: 包含 dates、stock_ids、stock_names 列表，以及 日期數 × 股票數 的
+              actions (np.int8) 和 quantities (np.int64) 矩陣
+    """
+    try:
+        start_obj = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+        end_obj = datetime.strptime(end_date, '%Y-%m-%d') if end_date else None
+        if start_obj and end_obj and start_obj > end_obj:
+            return {'error': '開始日期不能晚於結束日期'}
+        
+        if USE_MOCK_DATA:
+            return {'error': '模擬數據模式不支持按日期範圍獲取交易決策'}
+        
+        load_trading_model()
+        
+        # 與單日接口一致，只返回交易日曆範圍內的日期
+        calendar = load_trading_calendar()
+        if not len(calendar):
+            return {'error': '沒有可用的交易日'}
+        start_obj = max(start_obj, calendar.start) if start_obj else calendar.start
+        end_obj = min(end_obj, calendar.end) if end_obj else calendar.end
+        if start_obj > end_obj:
+            return {'error': '所選日期範圍不在有效的交易日期範圍內'}
+        
+        # 按優先順序選擇數據來源：模型實時推理、交易決策示例、低風險股票列表
+        if _inference_engine is not None:
+            source, index = 'model_inference', _inference_engine
+            dates, cols, quantities = index.predict_between(start_obj, end_obj, stock_ids)
+        elif _trading_decisions_examples is not None and len(_trading_decisions_examples.calendar.slice(start_obj, end_obj)):
+            source, index = 'model_examples', _trading_decisions_examples
+            dates, cols, quantities = index.between(start_obj, end_obj, stock_ids)
+        else:
+            source, index = 'model_generated', load_stock_list_store()
+            lo, hi = TradingCalendar(index.dates).bounds(start_obj, end_obj)
+            dates = index.dates[lo:hi]
+            cols = np.arange(len(index.stock_ids)) if stock_ids is None else np.flatnonzero(np.isin(index.stock_ids, stock_ids))
+            quantities = np.zeros((len(dates), len(cols)), dtype=np.int64)
+            for i, row in enumerate(range(lo, hi)):
+                date_str = str(index.dates[row])
+                for j in np.flatnonzero(index.selection[row, cols]):
+                    action, quantity, _ = generate_model_decision(date_str, index.stock_ids[cols[j]])
+                    quantities[i, j] = action * quantity
+        
+        if len(dates) == 0:
+            return {'error': '所選日期範圍內沒有交易決策'}
+        
+        return {
+            'start_date': str(dates[0]),
+            'end_date': str(dates[-1]),
+            'dates': np.datetime_as_string(dates, unit='D').tolist(),
+            'stock_ids': index.stock_ids[cols].tolist(),
+            'stock_names': index.stock_names[cols].tolist(),
+            'actions': np.sign(quantities).astype(np.int8),
+            'quantities': np.abs(quantities),
+            'source': source
+        }
+    except ValueError:
+        return {'error': '日期格式無效，請使用 YYYY-MM-DD 格式'}
+    except Exception as e:
+        logger.error(f"獲取日期範圍內的交易決策時發生錯誤: {str(e)}")
+        return {'error': f'獲取日期範圍內的交易決策時發生錯誤: {str(e)}'}
+
+def predict_trading_decisions(portfolios, stock_ids=None):
+    """
+    使用交易模型批量預測多個日期或投資組合的交易決策
+    
+    參數:
+        portfolios (list): 投資組合列表，每項包含 'date'，以及可選的 'cash'（現金）
+                           和 'holdings'（股票 ID 到持股數量的字典）
+        stock_ids (list, optional): 股票 ID 列表，如果為 None 則返回所有股票
+        
+    返回:
+        dict: 每個投資組合的交易決策
+    """
+    try:
+        if not USE_LIVE_INFERENCE:
+            return {'error': '未啟用交易模型實時推理'}
+        
+        load_trading_model()
+        if _inference_engine is None:
+            return {'error': '無法加載交易模型推理引擎'}
+        
+        engine = _inference_engine
+        dates = [datetime.strptime(p['date'], '%Y-%m-%d') for p in portfolios]
+        cash = [p.get('cash', engine.initial_amount) for p in portfolios]
+        
+        # 將持股字典轉換為與模型股票順序一致的矩陣
+        column = {stock_id: i for i, stock_id in enumerate(engine.stock_ids.tolist())}
+        shares = np.zeros((len(portfolios), engine.stock_dim), dtype=np.float32)
+        for i, portfolio in enumerate(portfolios):
+            for stock_id, quantity in (portfolio.get('holdings') or {}).items():
+                if str(stock_id) in column:
+                    shares[i, column[str(stock_id)]] = quantity
+        
+        # 所有投資組合一次批量預測
+        results = engine.decisions(dates, stock_ids, cash, shares)
+        
+        predictions = []
+        for portfolio, decisions in zip(portfolios, results):
+            if decisions is None:
+                predictions.append({'date': portfolio['date'], 'error': '找不到該日期的觀測數據'})
+            else:
+                predictions.append({'date': portfolio['date'], 'decisions': decisions})
+        
+        return {
+            'predictions': predictions,
+            'source': 'model_inference'
+        }
+    except (KeyError, ValueError):
+        return {'error': '每個投資組合都需要 YYYY-MM-DD 格式的 date'}
+    except Exception as e:
+        logger.error(f"批量預測交易決策時發生錯誤: {str(e)}")
+        return {'error': f'批量預測交易決策時發生錯誤: {str(e)}'}
+
 def generate_mock_trading_decisions(date, stock_ids=None):
     """
     生成模擬的交易決策數據
@@ -479,12 +607,12 @@ def get_valid_date_range():
         dict: 有效的交易日期範圍
     """
     # 確保交易日已加載
-    load_trading_days()
+    calendar = load_trading_calendar()
     
     return {
         'start_date': TRADING_START_DATE.strftime('%Y-%m-%d'),
         'end_date': TRADING_END_DATE.strftime('%Y-%m-%d'),
-        'trading_days_count': len(load_trading_days())
+        'trading_days_count': len(calendar)
     }
 
 def get_performance_summary(start_date=None, end_date=None):
@@ -500,24 +628,30 @@ def get_performance_summary(start_date=None, end_date=None):
     """
     try:
         # 確保交易日已加載
-        trading_days = load_trading_days()
+        calendar = load_trading_calendar()
         
         # 如果未提供日期，使用所有交易日
         if start_date is None:
-            start_date_obj = trading_days[0]
+            start_date_obj = calendar.start
         else:
             start_date_obj = datetime.strptime(start_date, '%Y-%m-%d')
             if not is_valid_trading_day(start_date_obj):
                 start_date_obj = get_nearest_trading_day(start_date_obj, 'forward')
         
         if end_date is None:
-            end_date_obj = trading_days[-1]
+            end_date_obj = calendar.end
         else:
             end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
             if not is_valid_trading_day(end_date_obj):
                 end_date_obj = get_nearest_trading_day(end_date_obj, 'backward')
         
         if not USE_MOCK_DATA:
+            # 優先使用回測輸出的實際資產價值序列
+            account = account_value_returns(start_date_obj, end_date_obj)
+            if account is not None:
+                dates, daily_returns = account
+                return format_summary(dates, daily_returns, start_date_obj, end_date_obj, source='account_value')
+            
             # 加載模型性能指標
             global _model_performance
             if _model_performance is None:
@@ -525,75 +659,29 @@ def get_performance_summary(start_date=None, end_date=None):
                 _, _ = load_trading_model()
             
             if _model_performance is not None:
-                # 使用模型性能指標
-                # 生成模擬的每日收益率（基於模型性能）
-                import random
-                random.seed(42)  # 使用固定的種子以獲得一致的結果
-                
                 # 獲取日期範圍內的交易日
-                period_trading_days = [d for d in trading_days if start_date_obj <= d <= end_date_obj]
+                period_trading_days = calendar.slice(start_date_obj, end_date_obj)
                 
-                if not period_trading_days:
+                if len(period_trading_days) == 0:
                     return {'error': '所選日期範圍內沒有交易日'}
                 
-                # 使用模型的年化回報率生成每日收益率
-                annualized_return = _model_performance.get('annual_return', 0) / 100  # 轉換為小數
+                # 使用模型的年化回報率和波動率生成每日收益率（性能指標文件中為小數）
+                annualized_return = _model_performance.get('annual_return', 0)
                 daily_return = (1 + annualized_return) ** (1/252) - 1  # 假設一年有 252 個交易日
+                volatility = _model_performance.get('annual_volatility', 0)
+                daily_volatility = volatility / np.sqrt(252)
                 
-                # 使用模型的波動率調整每日收益率
-                volatility = _model_performance.get('annual_volatility', 0) / 100  # 轉換為小數
-                daily_volatility = volatility / np.sqrt(252)  # 假設一年有 252 個交易日
-                
-                daily_returns = []
-                cumulative_returns = []
-                dates = []
-                
-                # 初始資產價值
-                initial_value = 1000000
-                current_value = initial_value
-                
-                for day in period_trading_days:
-                    # 生成基於模型性能的隨機收益率
-                    day_return = np.random.normal(daily_return, daily_volatility)
-                    daily_returns.append(day_return)
-                    
-                    # 更新當前資產價值
-                    current_value *= (1 + day_return)
-                    
-                    # 計算累積收益率
-                    cumulative_return = (current_value / initial_value) - 1
-                    cumulative_returns.append(cumulative_return)
-                    
-                    # 添加日期
-                    dates.append(day.strftime('%Y-%m-%d'))
-                
-                # 計算總收益率
-                total_return = cumulative_returns[-1] if cumulative_returns else 0
+                rng = np.random.default_rng(42)  # 使用固定的種子以獲得一致的結果
+                daily_returns = rng.normal(daily_return, daily_volatility, len(period_trading_days))
                 
-                # 計算年化收益率
-                days = (end_date_obj - start_date_obj).days
-                period_annualized_return = (1 + total_return) ** (365 / days) - 1 if days > 0 else 0
-                
-                # 使用模型的夏普比率
-                sharpe_ratio = _model_performance.get('sharpe_ratio', 0)
-                
-                # 使用模型的最大回撤
-                max_drawdown = _model_performance.get('max_drawdown', 0)
-                
-                return {
-                    'start_date': start_date_obj.strftime('%Y-%m-%d'),
-                    'end_date': end_date_obj.strftime('%Y-%m-%d'),
-                    'trading_days_count': len(period_trading_days),
-                    'total_return': round(total_return * 100, 2),  # 轉換為百分比
-                    'annualized_return': round(period_annualized_return * 100, 2),  # 轉換為百分比
-                    'sharpe_ratio': round(sharpe_ratio, 2),
-                    'max_drawdown': round(max_drawdown, 2),  # 已經是百分比
-                    'performance_chart': {
-                        'dates': dates,
-                        'cumulative_returns': [round(r * 100, 2) for r in cumulative_returns]  # 轉換為百分比
-                    },
-                    'source': 'model_performance'
-                }
+                # 只有績效曲線和區間回報率由模擬的每日收益率計算，風險指標沿用模型回測的結果
+                summary = format_summary(period_trading_days, daily_returns, start_date_obj, end_date_obj,
+                                         source='model_performance')
+                summary['sharpe_ratio'] = round(_model_performance.get('sharpe_ratio', 0), 2)
+                summary['sortino_ratio'] = round(_model_performance.get('sortino_ratio', 0), 2)
+                summary['calmar_ratio'] = round(_model_performance.get('calmar_ratio', 0), 2)
+                summary['max_drawdown'] = round(_model_performance.get('max_drawdown', 0), 2)  # 已經是百分比
+                return summary
             
             # 如果沒有模型性能指標，使用模擬數據
             return generate_mock_performance_summary(start_date_obj, end_date_obj)
@@ -618,70 +706,13 @@ def generate_mock_performance_summary(start_date, end_date):
         dict: 模擬的績效摘要數據
     """
     # 獲取日期範圍內的交易日
-    trading_days = [d for d in load_trading_days() if start_date <= d <= end_date]
+    trading_days = load_trading_calendar().slice(start_date, end_date)
     
-    if not trading_days:
+    if len(trading_days) == 0:
         return {'error': '所選日期範圍內沒有交易日'}
     
-    # 生成模擬的每日收益率
-    import random
-    random.seed(42)  # 使用固定的種子以獲得一致的結果
+    # 生成 -1% 到 2% 之間的隨機收益率
+    rng = np.random.default_rng(42)  # 使用固定的種子以獲得一致的結果
+    daily_returns = rng.uniform(-0.01, 0.02, len(trading_days))
     
-    daily_returns = []
-    cumulative_returns = []
-    dates = []
-    
-    # 初始資產價值
-    initial_value = 1000000
-    current_value = initial_value
-    
-    for day in trading_days:
-        # 生成 -1% 到 2% 之間的隨機收益率
-        daily_return = random.uniform(-0.01, 0.02)
-        daily_returns.append(daily_return)
-        
-        # 更新當前資產價值
-        current_value *= (1 + daily_return)
-        
-        # 計算累積收益率
-        cumulative_return = (current_value / initial_value) - 1
-        cumulative_returns.append(cumulative_return)
-        
-        # 添加日期
-        dates.append(day.strftime('%Y-%m-%d'))
-    
-    # 計算總收益率
-    total_return = cumulative_returns[-1]
-    
-    # 計算年化收益率
-    days = (end_date - start_date).days
-    annualized_return = (1 + total_return) ** (365 / days) - 1 if days > 0 else 0
-    
-    # 計算夏普比率
-    # 假設無風險利率為 0.02 (2%)
-    risk_free_rate = 0.02
-    excess_returns = [r - risk_free_rate / 365 for r in daily_returns]
-    sharpe_ratio = (sum(excess_returns) / len(excess_returns)) / (np.std(daily_returns) * np.sqrt(252)) if len(daily_returns) > 0 else 0
-    
-    # 計算最大回撤
-    max_drawdown = 0
-    peak = cumulative_returns[0]
-    for r in cumulative_returns:
-        if r > peak:
-            peak = r
-        drawdown = (peak - r) / (1 + peak) if peak != 0 else 0
-        max_drawdown = max(max_drawdown, drawdown)
-    
-    return {
-        'start_date': start_date.strftime('%Y-%m-%d'),
-        'end_date': end_date.strftime('%Y-%m-%d'),
-        'trading_days_count': len(trading_days),
-        'total_return': round(total_return * 100, 2),  # 轉換為百分比
-        'annualized_return': round(annualized_return * 100, 2),  # 轉換為百分比
-        'sharpe_ratio': round(sharpe_ratio, 2),
-        'max_drawdown': round(max_drawdown * 100, 2),  # 轉換為百分比
-        'performance_chart': {
-            'dates': dates,
-            'cumulative_returns': [round(r * 100, 2) for r in cumulative_returns]  # 轉換為百分比
-        }
-    } 
\ No newline at end of file
+    return format_summary(trading_days, daily_returns, start_date, end_date)
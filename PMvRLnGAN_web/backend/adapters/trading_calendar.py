@@ -0,0 +1,179 @@
+"""
+交易日曆模組
+基於排序後的 NumPy datetime64 數組提供交易日查詢，所有查詢均為二分查找
+"""
+
+from datetime import datetime, date as date_type
+import numpy as np
+
+
+def to_day(date):
+    """
+    將日期轉換為 datetime64[D]
+
+    參數:
+        date (datetime、date、str 或 np.datetime64): 日期，字符串格式為 'YYYY-MM-DD'
+
+    返回:
+        np.datetime64: 精度為天的日期
+    """
+    if isinstance(date, datetime):
+        date = date.date()
+    if isinstance(date, (date_type, str, np.datetime64)):
+        return np.datetime64(date, 'D')
+    raise TypeError(f"無法轉換為日期: {date!r}")
+
+
+def to_datetime(day):
+    """
+    將 datetime64[D] 轉換為 datetime 對象
+
+    參數:
+        day (np.datetime64): 日期
+
+    返回:
+        datetime: 對應的 datetime 對象（時間部分為 0）
+    """
+    return datetime.combine(day.astype(date_type), datetime.min.time())
+
+
+class TradingCalendar:
+    """
+    交易日曆
+
+    屬性:
+        days (np.ndarray): 排序且去重後的交易日 (datetime64[D])
+    """
+
+    def __init__(self, days):
+        self.days = np.unique(np.asarray(days, dtype='datetime64[D]'))
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def start(self):
+        """第一個交易日 (datetime)"""
+        return to_datetime(self.days[0]) if len(self.days) else None
+
+    @property
+    def end(self):
+        """最後一個交易日 (datetime)"""
+        return to_datetime(self.days[-1]) if len(self.days) else None
+
+    def index_of(self, date):
+        """
+        查找交易日在日曆中的位置
+
+        參數:
+            date (datetime 或 str): 日期
+
+        返回:
+            int: 交易日位置，如果不是交易日則返回 None
+        """
+        day = to_day(date)
+        pos = int(np.searchsorted(self.days, day))
+        if pos < len(self.days) and self.days[pos] == day:
+            return pos
+        return None
+
+    def positions(self, dates):
+        """
+        批量查找多個日期在日曆中的位置
+
+        參數:
+            dates (list): 日期列表
+
+        返回:
+            np.ndarray: 每個日期的位置，不是交易日的日期為 -1
+        """
+        days = np.array([to_day(date) for date in dates], dtype='datetime64[D]')
+        pos = np.searchsorted(self.days, days)
+        found = pos < len(self.days)
+        found[found] = self.days[pos[found]] == days[found]
+        return np.where(found, pos, -1)
+
+    def contains(self, date):
+        """
+        檢查日期是否為交易日
+
+        參數:
+            date (datetime 或 str): 日期
+
+        返回:
+            bool: 是交易日則返回 True
+        """
+        return self.index_of(date) is not None
+
+    def in_range(self, date):
+        """
+        檢查日期是否在第一個和最後一個交易日之間
+
+        參數:
+            date (datetime 或 str): 日期
+
+        返回:
+            bool: 在範圍內則返回 True
+        """
+        if not len(self.days):
+            return False
+        day = to_day(date)
+        return bool(self.days[0] <= day <= self.days[-1])
+
+    def nearest(self, date, direction='backward'):
+        """
+        查找最近的交易日
+
+        參數:
+            date (datetime 或 str): 參考日期
+            direction (str): 'backward' 表示小於等於參考日期的最大交易日，
+                             'forward' 表示大於等於參考日期的最小交易日
+
+        返回:
+            datetime: 最近的交易日，如果找不到則返回 None
+        """
+        day = to_day(date)
+        if direction == 'backward':
+            pos = int(np.searchsorted(self.days, day, side='right')) - 1
+            return to_datetime(self.days[pos]) if pos >= 0 else None
+        else:
+            pos = int(np.searchsorted(self.days, day, side='left'))
+            return to_datetime(self.days[pos]) if pos < len(self.days) else None
+
+    def bounds(self, start=None, end=None):
+        """
+        獲取日期範圍（包含兩端）在日曆中的位置範圍
+
+        參數:
+            start (datetime 或 str, optional): 開始日期，None 表示從第一個交易日開始
+            end (datetime 或 str, optional): 結束日期，None 表示到最後一個交易日為止
+
+        返回:
+            tuple: (lo, hi)，範圍內的交易日為 days[lo:hi]
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.days, to_day(start), side='left'))
+        hi = len(self.days) if end is None else int(np.searchsorted(self.days, to_day(end), side='right'))
+        return lo, max(lo, hi)
+
+    def slice(self, start=None, end=None):
+        """
+        獲取日期範圍內的交易日（包含兩端）
+
+        參數:
+            start (datetime 或 str, optional): 開始日期，None 表示從第一個交易日開始
+            end (datetime 或 str, optional): 結束日期，None 表示到最後一個交易日為止
+
+        返回:
+            np.ndarray: 範圍內的交易日 (datetime64[D])，為日曆數組的視圖
+        """
+        lo, hi = self.bounds(start, end)
+        return self.days[lo:hi]
+
+    def to_datetimes(self):
+        """
+        將所有交易日轉換為 datetime 對象列表
+
+        返回:
+            list: 交易日列表 (datetime 對象)
+        """
+        return [to_datetime(day) for day in self.days]
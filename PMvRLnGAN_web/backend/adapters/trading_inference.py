@@ -0,0 +1,245 @@
+"""
+交易模型推理模組
+每個進程只加載一次 trading_agent_model.zip，並預先根據 tcn_daily_trade_info 構建每個交易日的觀測值，
+請求時只需填入現金和持股，然後以一次批量的 predict 調用得到多個日期或投資組合的決策
+"""
+
+import os
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from ..config import (
+    TRADING_MODEL_PATH,
+    TRADE_INFO_FILE,
+    TRADING_HMAX,
+    TRADING_INDICATORS
+)
+from .trading_calendar import TradingCalendar
+from .decision_index import materialize_decisions
+
+# 設置日誌
+logger = logging.getLogger(__name__)
+
+# 緩存推理引擎
+_inference_engine = None
+# 防止多個線程同時加載模型
+_inference_lock = threading.Lock()
+
+
+class TradingInferenceEngine:
+    """
+    交易模型推理引擎
+
+    觀測值的排列方式與 StockTradingEnv 相同:
+    [現金] + [收盤價 × 股票數] + [持股 × 股票數] + [特徵 1 × 股票數] + ... + [特徵 K × 股票數]
+
+    屬性:
+        model: stable_baselines3 的 PPO 模型
+        calendar (TradingCalendar): 有觀測數據的交易日
+        stock_ids (np.ndarray): 模型交易的股票代碼（與訓練時的順序相同）
+        stock_names (np.ndarray): 對應的股票名稱
+        closes (np.ndarray): 日期 × 股票的收盤價 (float32)
+        features (np.ndarray): 日期 × (特徵數 × 股票數) 的觀測特徵 (float32)
+        initial_amount (float): 默認現金
+        hmax (int): 每次交易的最大股數
+    """
+
+    def __init__(self, model, calendar, stock_ids, closes, features, initial_amount, hmax=TRADING_HMAX):
+        self.model = model
+        self.calendar = calendar
+        self.stock_ids = np.asarray(stock_ids, dtype=str)
+        self.closes = closes
+        self.features = features
+        self.initial_amount = float(initial_amount)
+        self.hmax = hmax
+
+        from .stock_adapter import get_stock_name
+        self.stock_names = np.array([get_stock_name(stock_id) for stock_id in self.stock_ids])
+
+    @property
+    def stock_dim(self):
+        return len(self.stock_ids)
+
+    def build_observations(self, rows, cash=None, shares=None):
+        """
+        構建一批觀測值
+
+        參數:
+            rows (np.ndarray): 日期在日曆中的位置
+            cash (np.ndarray, optional): 每個觀測的現金，默認為初始資金
+            shares (np.ndarray, optional): 每個觀測的持股 (觀測數 × 股票數)，默認為 0
+
+        返回:
+            np.ndarray: 觀測值矩陣 (觀測數 × 狀態空間)
+        """
+        n, dim = len(rows), self.stock_dim
+        obs = np.empty((n, 1 + 2 * dim + self.features.shape[1]), dtype=np.float32)
+        obs[:, 0] = self.initial_amount if cash is None else cash
+        obs[:, 1:1 + dim] = self.closes[rows]
+        obs[:, 1 + dim:1 + 2 * dim] = 0 if shares is None else shares
+        obs[:, 1 + 2 * dim:] = self.features[rows]
+        return obs
+
+    def predict(self, dates, cash=None, shares=None):
+        """
+        批量預測多個日期（或投資組合）的交易數量
+
+        參數:
+            dates (list): 交易日期列表
+            cash (list, optional): 每個日期對應的現金
+            shares (list, optional): 每個日期對應的持股
+
+        返回:
+            tuple: (rows, quantities)，rows 為日期位置（找不到的日期為 -1），
+                   quantities 為帶符號的交易股數矩陣 (日期數 × 股票數)
+        """
+        rows = self.calendar.positions(dates)
+        found = rows >= 0
+
+        quantities = np.zeros((len(rows), self.stock_dim), dtype=np.int64)
+        if found.any():
+            cash = None if cash is None else np.asarray(cash, dtype=np.float32)[found]
+            shares = None if shares is None else np.asarray(shares, dtype=np.float32)[found]
+            obs = self.build_observations(rows[found], cash, shares)
+            # 所有觀測值一次送入策略網絡
+            actions, _ = self.model.predict(obs, deterministic=True)
+            quantities[found] = (np.asarray(actions).reshape(len(obs), -1) * self.hmax).astype(np.int64)
+
+        return rows, quantities
+
+    def predict_between(self, start=None, end=None, stock_ids=None):
+        """
+        以一次批量預測獲取日期範圍內每個交易日的交易數量（默認現金、空倉）
+
+        參數:
+            start (datetime 或 str, optional): 開始日期
+            end (datetime 或 str, optional): 結束日期
+            stock_ids (list, optional): 股票 ID 列表，如果為 None 則返回所有股票
+
+        返回:
+            tuple: (dates, cols, quantities)，quantities 為 日期數 × 股票數 的帶符號數量矩陣
+        """
+        lo, hi = self.calendar.bounds(start, end)
+        cols = np.flatnonzero(np.ones(self.stock_dim, dtype=bool) if stock_ids is None
+                              else np.isin(self.stock_ids, stock_ids))
+        quantities = np.zeros((hi - lo, self.stock_dim), dtype=np.int64)
+        if hi > lo:
+            obs = self.build_observations(np.arange(lo, hi))
+            actions, _ = self.model.predict(obs, deterministic=True)
+            quantities = (np.asarray(actions).reshape(len(obs), -1) * self.hmax).astype(np.int64)
+        return self.calendar.days[lo:hi], cols, quantities[:, cols]
+
+    def decisions(self, dates, stock_ids=None, cash=None, shares=None):
+        """
+        批量生成多個日期（或投資組合）的交易決策
+
+        參數:
+            dates (list): 交易日期列表
+            stock_ids (list, optional): 股票 ID 列表，如果為 None 則返回所有股票
+            cash (list, optional): 每個日期對應的現金
+            shares (list, optional): 每個日期對應的持股
+
+        返回:
+            list: 每個日期的交易決策列表，找不到觀測數據的日期為 None
+        """
+        rows, quantities = self.predict(dates, cash, shares)
+        mask = np.ones(self.stock_dim, dtype=bool) if stock_ids is None else np.isin(self.stock_ids, stock_ids)
+
+        results = []
+        for row, quantity in zip(rows, quantities):
+            if row < 0:
+                results.append(None)
+                continue
+            cols = np.flatnonzero((quantity != 0) & mask)
+            results.append(materialize_decisions(
+                self.stock_ids[cols], self.stock_names[cols], quantity[cols], self.closes[row, cols]
+            ))
+        return results
+
+
+def load_observation_table(path, stock_ids, indicators=TRADING_INDICATORS):
+    """
+    從 tcn_daily_trade_info 構建每個交易日的收盤價和觀測特徵
+
+    參數:
+        path (str): tcn_daily_trade_info.csv 路徑
+        stock_ids (list): 模型交易的股票代碼
+        indicators (list): 特徵列名
+
+    返回:
+        tuple: (dates, closes, features)
+    """
+    df = pd.read_csv(path, usecols=['date', 'tic', 'close'] + list(indicators))
+    df['tic'] = df['tic'].astype(str).str.replace('.TW', '', regex=False)
+    df = df[df['tic'].isin(stock_ids) & (df['close'] != 0)]
+    df = df.drop_duplicates(subset=['date', 'tic'], keep='first')
+
+    # 轉換為 日期 × (列, 股票) 的寬表，缺失值與訓練時一樣填 0
+    wide = df.pivot(index='date', columns='tic', values=['close'] + list(indicators))
+    wide = wide.reindex(columns=pd.MultiIndex.from_product([['close'] + list(indicators), stock_ids]))
+    wide = wide.fillna(0)
+
+    dates = pd.to_datetime(wide.index).values.astype('datetime64[D]')
+    values = wide.to_numpy(dtype=np.float32)
+    dim = len(stock_ids)
+    closes = np.ascontiguousarray(values[:, :dim])
+    features = np.ascontiguousarray(values[:, dim:])
+    return dates, closes, features
+
+
+def clear_cache():
+    """清除緩存的推理引擎，下次調用時重新加載模型"""
+    global _inference_engine
+    _inference_engine = None
+
+
+def load_inference_engine(config, stock_ids):
+    """
+    加載推理引擎（每個進程只加載一次）
+
+    參數:
+        config (dict): 模型配置 (trading_agent_config.json)
+        stock_ids (list): 模型交易的股票代碼
+
+    返回:
+        TradingInferenceEngine: 推理引擎，如果無法加載則返回 None
+    """
+    global _inference_engine
+
+    # 如果已經加載過，直接返回緩存的結果
+    if _inference_engine is not None:
+        return _inference_engine
+
+    with _inference_lock:
+        if _inference_engine is not None:
+            return _inference_engine
+
+        model_path = os.path.join(TRADING_MODEL_PATH, "trading_agent_model.zip")
+        if not os.path.exists(TRADE_INFO_FILE):
+            logger.warning(f"找不到交易數據文件: {TRADE_INFO_FILE}")
+            return None
+
+        try:
+            from stable_baselines3 import PPO
+            model = PPO.load(model_path, device='cpu')
+            logger.info(f"成功加載交易模型: {model_path}")
+
+            stock_ids = [str(stock_id) for stock_id in stock_ids]
+            dates, closes, features = load_observation_table(TRADE_INFO_FILE, stock_ids)
+            state_space = 1 + 2 * len(stock_ids) + features.shape[1]
+            expected = model.observation_space.shape[0]
+            if state_space != expected:
+                logger.error(f"觀測值維度 {state_space} 與模型的狀態空間 {expected} 不一致")
+                return None
+
+            initial_amount = config.get('env_info', {}).get('initial_amount', 1000000)
+            _inference_engine = TradingInferenceEngine(
+                model, TradingCalendar(dates), stock_ids, closes, features, initial_amount
+            )
+            logger.info(f"成功構建 {len(dates)} 個交易日的觀測值")
+        except Exception as e:
+            logger.error(f"加載交易模型推理引擎時發生錯誤: {str(e)}")
+            return None
+
+    return _inference_engine
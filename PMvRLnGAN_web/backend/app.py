@@ -5,7 +5,7 @@
 PMvRLnGAN Web 後端應用
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request, stream_with_context
 import os
 import json
 import pandas as pd
@@ -15,27 +15,36 @@ from datetime import datetime
 from backend.config import (
     FRONTEND_DIR, TEMPLATES_DIR, STATIC_DIR,
     PMVRLNGAN_DIR, GAT_MODEL_PATH, STOCK_LIST_PATH, TCN_MODEL_PATH,
-    DEBUG, SECRET_KEY, TRADING_START_DATE, TRADING_END_DATE
+    TRADING_MODEL_PATH, TRADE_INFO_FILE, TCN_FEATURE_STORE_PATH, GAT_RELATIONSHIPS_PATH,
+    DEBUG, SECRET_KEY, TRADING_START_DATE, TRADING_END_DATE, USE_MOCK_DATA,
+    USE_LIVE_INFERENCE, TRADING_RANGE_STREAM_THRESHOLD, TRADING_RANGE_CHUNK_SIZE,
+    METRICS_ALLOWED_HOSTS
 )
 from backend.logger import logger
+from backend.cache import cached_response, cache_stats
 from backend.adapters.trading_adapter import (
     get_trading_decisions as adapter_get_trading_decisions,
+    get_trading_decisions_range as adapter_get_trading_decisions_range,
     get_valid_date_range,
     is_valid_trading_day,
     is_date_in_range,
     get_nearest_trading_day,
-    get_performance_summary as adapter_get_performance_summary
+    get_performance_summary as adapter_get_performance_summary,
+    predict_trading_decisions as adapter_predict_trading_decisions,
+    load_trading_model
 )
 from backend.adapters.stock_adapter import (
     get_stock_list as adapter_get_stock_list,
     get_available_quarters as adapter_get_available_quarters
 )
+from backend.adapters.stock_list_store import load_stock_list_store
 from backend.adapters.gat_adapter import (
     get_stock_relationships as adapter_get_stock_relationships
 )
 from backend.adapters.tcn_adapter import (
     get_compressed_features as adapter_get_compressed_features
 )
+from backend.preload import clear_adapter_caches
 
 # 創建 Flask 應用
 app = Flask(__name__, 
@@ -53,6 +62,39 @@ logger.info(f"模板目錄: {TEMPLATES_DIR}")
 logger.info(f"靜態文件目錄: {STATIC_DIR}")
 logger.info(f"PMvRLnGAN 目錄: {PMVRLNGAN_DIR}")
 
+# 啟動時預加載低風險股票列表，供所有適配器共用
+if not USE_MOCK_DATA:
+    try:
+        load_stock_list_store()
+    except Exception as e:
+        logger.warning(f"預加載低風險股票列表失敗: {str(e)}")
+
+# 啟用實時推理時，在處理請求前加載交易模型並構建觀測值
+if USE_LIVE_INFERENCE:
+    load_trading_model()
+
+# 各 API 響應所依賴的數據文件（任一文件修改後緩存失效）
+TRADING_SOURCES = [
+    STOCK_LIST_PATH,
+    TRADING_MODEL_PATH / 'trading_agent_config.json',
+    TRADING_MODEL_PATH / 'trading_decisions_examples.csv',
+    TRADING_MODEL_PATH / 'trading_agent_model.zip',
+    TRADE_INFO_FILE
+]
+SUMMARY_SOURCES = [
+    STOCK_LIST_PATH,
+    TRADING_MODEL_PATH / 'trading_agent_performance.json',
+    # 回測輸出的資產價值文件（就地改寫時目錄的修改時間不變，因此監控文件本身）
+    lambda args: sorted((PMVRLNGAN_DIR / 'Trading Agent' / 'results').glob('account_*.csv'))
+]
+
+FEATURE_STORE_SOURCES = [TCN_FEATURE_STORE_PATH / 'features.npy']
+
+def on_data_change():
+    """數據文件修改後清除適配器緩存，避免以新的 ETag 和 Last-Modified 返回舊數據"""
+    logger.info("檢測到數據文件修改，清除適配器緩存")
+    clear_adapter_caches()
+
 @app.route('/')
 def index():
     """首頁"""
@@ -60,13 +102,18 @@ def index():
     return render_template('index.html')
 
 @app.route('/api/gat/relationships', methods=['GET'])
+@cached_response(GAT_RELATIONSHIPS_PATH, STOCK_LIST_PATH, on_change=on_data_change)
 def get_gat_relationships():
     """獲取股票關係數據"""
     try:
-        logger.info("獲取股票關係數據")
+        date = request.args.get('date', None)
+        stock_id = request.args.get('stock_id', None)
+        top_k = request.args.get('top_k', None, type=int)
+        min_weight = request.args.get('min_weight', None, type=float)
+        logger.info(f"獲取股票關係數據，日期: {date}, 股票ID: {stock_id}, top_k: {top_k}, 最小權重: {min_weight}")
         
         # 使用適配器獲取股票關係數據
-        result = adapter_get_stock_relationships()
+        result = adapter_get_stock_relationships(date, top_k, min_weight, stock_id)
         
         # 檢查是否有錯誤
         if 'error' in result:
@@ -89,6 +136,7 @@ def get_gat_relationships():
         }), 500
 
 @app.route('/api/stock-picked/list', methods=['GET'])
+@cached_response(STOCK_LIST_PATH, on_change=on_data_change)
 def get_stock_picked_list():
     """獲取低風險股票列表"""
     try:
@@ -119,12 +167,15 @@ def get_stock_picked_list():
         }), 500
 
 @app.route('/api/tcn-ae/features', methods=['GET'])
+@cached_response(*FEATURE_STORE_SOURCES, on_change=on_data_change)
 def get_tcn_ae_features():
     """獲取壓縮後的特徵"""
     try:
         stock_id = request.args.get('stock_id', None)
         date = request.args.get('date', None)
-        logger.info(f"獲取壓縮後的特徵，股票ID: {stock_id}, 日期: {date}")
+        start_date = request.args.get('start', None)
+        end_date = request.args.get('end', None)
+        logger.info(f"獲取壓縮後的特徵，股票ID: {stock_id}, 日期: {date}, 範圍: {start_date} ~ {end_date}")
         
         if not stock_id:
             logger.warning("獲取壓縮後的特徵失敗: 缺少股票ID")
@@ -134,7 +185,7 @@ def get_tcn_ae_features():
             }), 400
         
         # 使用適配器獲取壓縮特徵
-        result = adapter_get_compressed_features(stock_id, date)
+        result = adapter_get_compressed_features(stock_id, date, start_date, end_date)
         
         # 檢查是否有錯誤
         if 'error' in result:
@@ -157,6 +208,7 @@ def get_tcn_ae_features():
         }), 500
 
 @app.route('/api/trading/decisions', methods=['GET'])
+@cached_response(*TRADING_SOURCES, on_change=on_data_change)
 def get_trading_decisions():
     """獲取交易決策"""
     try:
@@ -202,7 +254,120 @@ def get_trading_decisions():
             'message': str(e)
         }), 500
 
+def stream_trading_decisions_range(result):
+    """
+    以分塊方式輸出日期範圍內的交易決策 JSON，避免一次構建整個響應
+    
+    參數:
+        result (dict): get_trading_decisions_range 的結果
+        
+    返回:
+        generator: JSON 文本塊
+    """
+    header = {key: value for key, value in result.items() if key not in ('actions', 'quantities')}
+    yield json.dumps({'status': 'success', 'data': header}, ensure_ascii=False)[:-2]
+    
+    # actions 和 quantities 兩個矩陣按行分塊輸出
+    for key in ('actions', 'quantities'):
+        matrix = result[key]
+        yield f', "{key}": ['
+        for start in range(0, len(matrix), TRADING_RANGE_CHUNK_SIZE):
+            rows = json.dumps(matrix[start:start + TRADING_RANGE_CHUNK_SIZE].tolist())[1:-1]
+            yield (', ' if start else '') + rows
+        yield ']'
+    yield '}}'
+
+@app.route('/api/trading/decisions/range', methods=['GET'])
+@cached_response(*TRADING_SOURCES, on_change=on_data_change)
+def get_trading_decisions_range():
+    """獲取日期範圍內所有交易日的交易決策（列式格式，長範圍時以串流方式返回）"""
+    try:
+        start_date = request.args.get('start', None)
+        end_date = request.args.get('end', None)
+        stock_ids_str = request.args.get('stock_ids', None)
+        stream = request.args.get('stream', None)
+        logger.info(f"獲取日期範圍內的交易決策，開始日期: {start_date}, 結束日期: {end_date}, 股票IDs: {stock_ids_str}")
+        
+        # 解析股票 ID 列表（如果有）
+        stock_ids = stock_ids_str.split(',') if stock_ids_str else None
+        
+        # 使用適配器獲取交易決策
+        result = adapter_get_trading_decisions_range(start_date, end_date, stock_ids)
+        
+        # 檢查是否有錯誤
+        if 'error' in result:
+            logger.warning(f"獲取日期範圍內的交易決策失敗: {result['error']}")
+            return jsonify({
+                'status': 'error',
+                'message': result['error']
+            }), 400
+        
+        # 未指定 stream 參數時，根據交易日數自動決定是否串流
+        if stream is None:
+            streaming = len(result['dates']) > TRADING_RANGE_STREAM_THRESHOLD
+        else:
+            streaming = stream.lower() in ('1', 'true', 'yes')
+        if streaming:
+            return Response(stream_with_context(stream_trading_decisions_range(result)), mimetype='application/json')
+        
+        result['actions'] = result['actions'].tolist()
+        result['quantities'] = result['quantities'].tolist()
+        return jsonify({
+            'status': 'success',
+            'data': result
+        })
+    except Exception as e:
+        logger.error(f"獲取日期範圍內的交易決策失敗: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/trading/predict', methods=['POST'])
+def predict_trading_decisions():
+    """使用交易模型批量預測多個日期或投資組合的交易決策"""
+    try:
+        payload = request.get_json(silent=True) or {}
+        stock_ids = payload.get('stock_ids')
+        
+        # 支持只傳入日期列表（使用默認現金和空倉），或傳入完整的投資組合列表
+        portfolios = payload.get('portfolios')
+        if portfolios is None and payload.get('dates'):
+            portfolios = [{'date': date} for date in payload['dates']]
+        logger.info(f"批量預測交易決策，投資組合數量: {len(portfolios) if portfolios else 0}")
+        
+        if not portfolios:
+            logger.warning("批量預測交易決策失敗: 缺少日期或投資組合")
+            return jsonify({
+                'status': 'error',
+                'message': 'dates or portfolios is required'
+            }), 400
+        
+        # 使用適配器批量預測交易決策
+        result = adapter_predict_trading_decisions(portfolios, stock_ids)
+        
+        # 檢查是否有錯誤
+        if 'error' in result:
+            logger.warning(f"批量預測交易決策失敗: {result['error']}")
+            return jsonify({
+                'status': 'error',
+                'message': result['error'],
+                'details': result
+            }), 400
+        
+        return jsonify({
+            'status': 'success',
+            'data': result
+        })
+    except Exception as e:
+        logger.error(f"批量預測交易決策失敗: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
 @app.route('/api/results/summary', methods=['GET'])
+@cached_response(*SUMMARY_SOURCES, on_change=on_data_change)
 def get_results_summary():
     """獲取綜合結果"""
     try:
@@ -234,6 +399,7 @@ def get_results_summary():
         }), 500
 
 @app.route('/api/trading/valid-dates', methods=['GET'])
+@cached_response(STOCK_LIST_PATH, on_change=on_data_change)
 def get_valid_trading_dates():
     """獲取有效的交易日期範圍"""
     try:
@@ -251,6 +417,7 @@ def get_valid_trading_dates():
         }), 500
 
 @app.route('/api/stock-picked/quarters', methods=['GET'])
+@cached_response(STOCK_LIST_PATH, on_change=on_data_change)
 def get_available_quarters():
     """獲取可用的季度列表"""
     try:
@@ -275,5 +442,23 @@ def get_available_quarters():
             'message': str(e)
         }), 500
 
+@app.route('/api/internal/metrics', methods=['GET'])
+def get_internal_metrics():
+    """獲取當前工作進程的緩存統計數據（只允許內部地址訪問）"""
+    if request.remote_addr not in METRICS_ALLOWED_HOSTS:
+        logger.warning(f"拒絕訪問內部指標接口: {request.remote_addr}")
+        return jsonify({
+            'status': 'error',
+            'message': 'forbidden'
+        }), 403
+    
+    return jsonify({
+        'status': 'success',
+        'data': {
+            'pid': os.getpid(),
+            'caches': cache_stats()
+        }
+    })
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMvRLnGAN Web 緩存模組
+提供帶命中率統計的有界 LRU 緩存，並以請求參數和數據文件的修改時間為鍵緩存 API 響應，
+提供 ETag、Last-Modified 和 Cache-Control 頭
+"""
+
+import os
+import sys
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+from flask import request, make_response
+
+from backend.config import (
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_MAX_BYTES,
+    RESPONSE_CACHE_CONTROL
+)
+
+
+class CachedResponse:
+    """
+    已緩存的響應
+
+    屬性:
+        body (bytes): 響應內容
+        mimetype (str): 響應類型
+        etag (str): 響應內容的哈希值
+        last_modified (datetime): 數據文件的最新修改時間
+        signature (tuple): 數據文件路徑及其修改時間
+    """
+
+    __slots__ = ('body', 'mimetype', 'etag', 'last_modified', 'signature')
+
+    def __init__(self, body, mimetype, last_modified, signature):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.last_modified = last_modified
+        self.signature = signature
+
+    def to_response(self):
+        """
+        生成帶緩存頭的響應（根據請求的 If-None-Match / If-Modified-Since 返回 304）
+
+        返回:
+            Response: Flask 響應
+        """
+        response = make_response(self.body)
+        response.mimetype = self.mimetype
+        response.set_etag(self.etag)
+        if self.last_modified is not None:
+            response.last_modified = self.last_modified
+        response.headers['Cache-Control'] = RESPONSE_CACHE_CONTROL
+        return response.make_conditional(request)
+
+
+def estimate_size(value):
+    """
+    估算緩存值佔用的內存字節數
+
+    參數:
+        value: 緩存值
+
+    返回:
+        int: 估算的字節數
+    """
+    if isinstance(value, CachedResponse):
+        return len(value.body)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (bytes, bytearray, str)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class BoundedCache:
+    """
+    按最近最少使用 (LRU) 淘汰的有界緩存，限制條目數量和總字節數，可選過期時間，並統計命中率
+
+    屬性:
+        name (str): 緩存名稱，用於指標輸出
+        max_entries (int): 最多緩存的條目數量
+        max_bytes (int): 最多緩存的總字節數，None 表示不限制
+        ttl (float): 條目的過期時間（秒），None 表示不過期
+    """
+
+    # 所有已創建的緩存，供指標接口讀取
+    instances = []
+
+    def __init__(self, name, max_entries, max_bytes=None, ttl=None, sizeof=estimate_size):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        BoundedCache.instances.append(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, count=False) is not None
+
+    def get(self, key, default=None, count=True):
+        """
+        獲取緩存的值
+
+        參數:
+            key: 緩存鍵
+            default: 不存在或已過期時返回的值
+            count (bool): 是否計入命中率統計
+
+        返回:
+            緩存的值
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and self.ttl is not None and time.monotonic() - item[2] > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                item = None
+            if item is None:
+                if count:
+                    self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return item[0]
+
+    def put(self, key, value):
+        """
+        緩存值，超出限制時淘汰最久未使用的條目
+
+        參數:
+            key: 緩存鍵
+            value: 要緩存的值
+        """
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def pop(self, key):
+        """刪除緩存的值"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """清空緩存（保留統計數據）"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        獲取緩存統計數據
+
+        返回:
+            dict: 條目數、字節數、命中、未命中、淘汰、過期次數及命中率
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class ResponseCache(BoundedCache):
+    """
+    API 響應緩存，數據文件修改後緩存的響應自動失效
+    """
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        super().__init__('responses', max_entries, max_bytes)
+
+    def get(self, key, default=None, count=True, signature=None):
+        """
+        獲取緩存的響應
+
+        參數:
+            key (tuple): 緩存鍵
+            default: 不存在或數據文件已修改時返回的值
+            count (bool): 是否計入命中率統計
+            signature (tuple, optional): 當前數據文件的修改時間，None 表示不檢查
+
+        返回:
+            CachedResponse: 緩存的響應，如果不存在或數據文件已修改則返回 default
+        """
+        entry = super().get(key, count=count)
+        if entry is None:
+            return default
+        if signature is not None and entry.signature != signature:
+            with self._lock:
+                # 數據文件已修改的響應計為未命中
+                if count:
+                    self.hits -= 1
+                    self.misses += 1
+                if self._entries.get(key, (None,))[0] is entry:
+                    self._remove(key)
+            return default
+        return entry
+
+
+def cache_stats():
+    """
+    獲取所有有界緩存的統計數據
+
+    返回:
+        list: 每個緩存的統計數據
+    """
+    return [cache.stats() for cache in BoundedCache.instances]
+
+
+# 全局響應緩存
+response_cache = ResponseCache()
+
+
+def file_signature(paths):
+    """
+    獲取數據文件的修改時間
+
+    參數:
+        paths (list): 數據文件路徑
+
+    返回:
+        tuple: (路徑, 修改時間) 列表，不存在的文件修改時間為 None
+    """
+    signature = []
+    for path in paths:
+        try:
+            signature.append((str(path), os.stat(path).st_mtime_ns))
+        except OSError:
+            signature.append((str(path), None))
+    return tuple(signature)
+
+
+# 各數據文件上次請求時的修改時間（所有響應共用，數據文件修改後只觸發一次 on_change）
+_seen_mtimes = {}
+_seen_lock = threading.Lock()
+
+
+def record_signature(signature):
+    """
+    記錄數據文件的修改時間
+
+    參數:
+        signature (tuple): file_signature 返回的 (路徑, 修改時間) 列表
+
+    返回:
+        bool: 是否有文件在上次記錄之後被修改或刪除
+    """
+    changed = False
+    with _seen_lock:
+        for path, mtime in signature:
+            if path in _seen_mtimes and _seen_mtimes[path] != mtime:
+                changed = True
+            _seen_mtimes[path] = mtime
+    return changed
+
+
+def cached_response(*sources, on_change=None):
+    """
+    緩存 API 響應的裝飾器，只緩存狀態碼為 200 的非串流響應
+
+    參數:
+        *sources: 響應所依賴的數據文件路徑，或接收請求參數並返回路徑列表的函數
+        on_change (callable, optional): 數據文件修改、新增或刪除後，重新生成響應前調用的函數，
+            用於清除適配器中緩存的舊數據；修改時間在所有響應之間共用，
+            因此同一次數據更新只由第一個發現它的請求調用一次
+
+    返回:
+        function: 裝飾器
+    """
+    def decorator(view):
+        # 上次請求時的數據文件列表（函數返回的文件可能增減）
+        seen = {}
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            paths = []
+            for source in sources:
+                if callable(source):
+                    paths.extend(source(request.args))
+                else:
+                    paths.append(source)
+            signature = file_signature(paths)
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+
+            if on_change is not None:
+                names = tuple(path for path, _ in signature)
+                previous = seen.get('paths')
+                seen['paths'] = names
+                if record_signature(signature) or (previous is not None and previous != names):
+                    on_change()
+
+            entry = response_cache.get(key, signature=signature)
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+
+                mtimes = [mtime for _, mtime in signature if mtime is not None]
+                last_modified = (
+                    datetime.fromtimestamp(max(mtimes) / 1e9, tz=timezone.utc) if mtimes else None
+                )
+                entry = CachedResponse(response.get_data(), response.mimetype, last_modified, signature)
+                response_cache.put(key, entry)
+
+            return entry.to_response()
+        return wrapper
+    return decorator
+
+
+__all__ = [
+    'response_cache', 'cached_response', 'file_signature', 'record_signature', 'cache_stats', 'estimate_size',
+    'BoundedCache', 'ResponseCache', 'CachedResponse'
+]
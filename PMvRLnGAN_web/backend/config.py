@@ -23,12 +23,14 @@ PMVRLNGAN_DIR = Path(os.environ.get('PMVRLNGAN_DIR', '../PMvRLnGAN'))
 
 # 模型文件路徑
 GAT_MODEL_PATH = PMVRLNGAN_DIR / 'GAT-main' / 'gat_model.pth'
+GAT_RELATIONSHIPS_PATH = PMVRLNGAN_DIR / 'GAT-main' / 'relationships.npz'  # GAT-main/edge_store.py 生成的稀疏關係索引
 TCN_MODEL_PATH = PMVRLNGAN_DIR / 'TCN-AE' / 'tcn_20_model.h5'
 TRADING_MODEL_PATH = PMVRLNGAN_DIR / 'Trading Agent' / 'models'
 
 # 數據文件路徑
 STOCK_LIST_PATH = PMVRLNGAN_DIR / 'Trading Agent' / 'Low-risk stock list.csv'
 TRADE_INFO_PATH = PMVRLNGAN_DIR / 'Trading Agent' / 'tcn_daily_trade_info'
+TCN_FEATURE_STORE_PATH = PMVRLNGAN_DIR / 'TCN-AE' / 'feature_store'  # 內存映射的壓縮特徵存儲目錄
 
 # API 配置
 API_PREFIX = '/api'
@@ -38,6 +40,25 @@ API_VERSION = 'v1'
 DEBUG = True
 SECRET_KEY = 'pmvrlngan-web-secret-key'  # 在生產環境中應該使用環境變量設置
 
+# 響應緩存配置
+RESPONSE_CACHE_MAX_ENTRIES = 512  # 最多緩存的響應數量
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 最多緩存 64MB 的響應內容
+RESPONSE_CACHE_CONTROL = 'public, max-age=0, must-revalidate'  # 瀏覽器和反向代理每次都用 ETag 重新驗證
+TCN_FEATURE_CACHE_MAX_ENTRIES = 1024  # 最多緩存的壓縮特徵查詢結果數量
+TCN_FEATURE_CACHE_MAX_BYTES = 32 * 1024 * 1024  # 最多緩存 32MB 的壓縮特徵查詢結果
+TRADING_DATA_CACHE_MAX_ENTRIES = 64  # 最多緩存的每日交易數據數量
+TRADING_DATA_CACHE_MAX_BYTES = 128 * 1024 * 1024  # 最多緩存 128MB 的每日交易數據
+TRADING_DATA_CACHE_TTL = 3600  # 每日交易數據的緩存時間（秒）
+METRICS_ALLOWED_HOSTS = os.environ.get('PMVRLNGAN_METRICS_HOSTS', '127.0.0.1,::1').split(',')  # 允許訪問內部指標接口的地址
+
+# 生產環境服務配置 (serve.py)
+SERVER_HOST = os.environ.get('PMVRLNGAN_HOST', '0.0.0.0')
+SERVER_PORT = int(os.environ.get('PMVRLNGAN_PORT', '5000'))
+SERVER_WORKERS = int(os.environ.get('PMVRLNGAN_WORKERS', os.cpu_count() or 2))  # 工作進程數量
+SERVER_THREADS = int(os.environ.get('PMVRLNGAN_THREADS', '4'))  # 每個工作進程的線程數量
+SERVER_TIMEOUT = 120  # 工作進程超時（秒），首次加載模型可能較慢
+DATA_WATCH_INTERVAL = 10  # 檢查數據文件是否修改的間隔（秒），0 表示不檢查
+
 # 日誌配置
 LOG_LEVEL = logging.INFO
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -49,4 +70,13 @@ TRADING_START_DATE = datetime(2020, 1, 1)
 TRADING_END_DATE = datetime(2023, 12, 31)
 
 # 是否使用模擬數據（當無法讀取原始數據時）
-USE_MOCK_DATA = False 
\ No newline at end of file
+USE_MOCK_DATA = False
+
+# 交易模型實時推理配置
+# 啟用後，交易決策由 trading_agent_model.zip 根據 tcn_daily_trade_info 實時預測
+USE_LIVE_INFERENCE = os.environ.get('PMVRLNGAN_LIVE_INFERENCE', '0') == '1'
+TRADE_INFO_FILE = TRADE_INFO_PATH / 'tcn_daily_trade_info.csv'
+TRADING_HMAX = 1000  # 與訓練時 StockTradingEnv 的 hmax 相同
+TRADING_INDICATORS = [f'coding{i}' for i in range(1, 21)]  # TCN-AE 壓縮後的 20 維特徵 
+TRADING_RANGE_STREAM_THRESHOLD = 250  # 日期範圍查詢超過此交易日數時以串流方式返回
+TRADING_RANGE_CHUNK_SIZE = 64  # 串流時每次輸出的交易日數
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMvRLnGAN Web 數據預加載模組
+在主進程中一次性加載所有適配器的緩存，工作進程 fork 後以寫時複製的方式共享這些只讀數據；
+數據文件修改時清除並重新加載緩存
+"""
+
+import gc
+import time
+import threading
+
+from backend.config import (
+    PMVRLNGAN_DIR, STOCK_LIST_PATH, TRADING_MODEL_PATH, TRADE_INFO_FILE,
+    TCN_FEATURE_STORE_PATH, GAT_RELATIONSHIPS_PATH, USE_MOCK_DATA, USE_LIVE_INFERENCE
+)
+from backend.logger import logger
+from backend.cache import response_cache, file_signature
+from backend.adapters import (
+    stock_list_store, trading_adapter, trading_inference, performance,
+    gat_adapter, tcn_adapter, feature_store
+)
+
+# 需要監控的數據文件（目錄的修改時間會在其中文件增刪時改變）
+DATA_FILES = [
+    STOCK_LIST_PATH,
+    TRADING_MODEL_PATH / 'trading_agent_config.json',
+    TRADING_MODEL_PATH / 'trading_agent_performance.json',
+    TRADING_MODEL_PATH / 'trading_decisions_examples.csv',
+    TRADING_MODEL_PATH / 'trading_agent_model.zip',
+    TRADE_INFO_FILE,
+    PMVRLNGAN_DIR / 'Trading Agent' / 'results',
+    GAT_RELATIONSHIPS_PATH,
+    TCN_FEATURE_STORE_PATH / feature_store.FEATURES_FILE
+]
+
+
+def warm_caches():
+    """
+    加載所有適配器的緩存（低風險股票列表、交易日、模型、績效序列、壓縮特徵存儲、股票關係）
+    """
+    start = time.perf_counter()
+    if not USE_MOCK_DATA:
+        try:
+            stock_list_store.load_stock_list_store()
+        except Exception as e:
+            logger.warning(f"預加載低風險股票列表失敗: {str(e)}")
+        performance.load_account_values()
+        feature_store.load_feature_store()
+
+    trading_adapter.load_trading_days()
+    trading_adapter.load_trading_model()
+    gat_adapter.load_stock_relationships()
+
+    # 將已加載的對象移出垃圾回收器的追蹤範圍，避免 fork 後的 GC 觸發寫時複製
+    gc.collect()
+    gc.freeze()
+    logger.info(f"預加載數據完成，用時 {time.perf_counter() - start:.2f} 秒 (實時推理: {USE_LIVE_INFERENCE})")
+
+
+def clear_adapter_caches():
+    """
+    清除所有適配器的緩存（保留響應緩存），下次請求時重新讀取數據文件
+    """
+    for module in (stock_list_store, trading_adapter, trading_inference, performance,
+                   gat_adapter, tcn_adapter):
+        module.clear_cache()
+
+
+def clear_caches():
+    """
+    清除所有適配器的緩存和響應緩存
+    """
+    gc.unfreeze()
+    clear_adapter_caches()
+    response_cache.clear()
+
+
+def reload_caches():
+    """
+    清除並重新加載所有緩存
+    """
+    clear_caches()
+    warm_caches()
+
+
+class DataFileWatcher(threading.Thread):
+    """
+    在後台線程中定期檢查數據文件的修改時間，發現修改時調用回調函數
+
+    屬性:
+        interval (float): 檢查間隔（秒）
+        on_change (callable): 數據文件修改時調用的函數
+    """
+
+    def __init__(self, on_change, interval, paths=DATA_FILES):
+        super().__init__(name='data-file-watcher', daemon=True)
+        self.on_change = on_change
+        self.interval = interval
+        self.paths = list(paths)
+        self._signature = file_signature(self.paths)
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            signature = file_signature(self.paths)
+            if signature != self._signature:
+                changed = [path for (path, mtime), (_, old) in zip(signature, self._signature) if mtime != old]
+                self._signature = signature
+                logger.info(f"檢測到數據文件修改: {changed}")
+                try:
+                    self.on_change()
+                except Exception as e:
+                    logger.error(f"處理數據文件修改時發生錯誤: {str(e)}")
+
+    def stop(self):
+        self._stopped.set()
+
+
+__all__ = ['warm_caches', 'clear_adapter_caches', 'clear_caches', 'reload_caches', 'DataFileWatcher', 'DATA_FILES']
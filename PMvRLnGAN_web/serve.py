@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+PMvRLnGAN Web 生產環境啟動腳本
+使用 gunicorn 啟動多個工作進程；數據在主進程中預加載後再 fork，工作進程共享只讀數據；
+數據文件修改時主進程重新加載數據，並平滑地替換所有工作進程
+"""
+
+import os
+import sys
+import signal
+
+from backend.app import app
+from backend.config import (
+    SERVER_HOST, SERVER_PORT, SERVER_WORKERS, SERVER_THREADS, SERVER_TIMEOUT,
+    DATA_WATCH_INTERVAL
+)
+from backend.logger import logger
+from backend.preload import warm_caches, reload_caches, DataFileWatcher
+
+
+def when_ready(server):
+    """主進程開始監聽後，啟動數據文件監控線程"""
+    if DATA_WATCH_INTERVAL > 0:
+        # 發送 SIGHUP 給主進程，由 on_reload 在主線程中重新加載數據並替換工作進程
+        watcher = DataFileWatcher(lambda: os.kill(os.getpid(), signal.SIGHUP), DATA_WATCH_INTERVAL)
+        watcher.start()
+        logger.info(f"開始監控數據文件，檢查間隔 {DATA_WATCH_INTERVAL} 秒")
+
+
+def on_reload(server):
+    """收到 SIGHUP 時，在 fork 新工作進程之前重新加載數據"""
+    logger.info("重新加載數據並平滑替換工作進程")
+    reload_caches()
+
+
+def run_gunicorn(port):
+    """使用 gunicorn 啟動應用"""
+    from gunicorn.app.base import BaseApplication
+
+    class ProductionApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = {
+        'bind': f"{SERVER_HOST}:{port}",
+        'workers': SERVER_WORKERS,
+        'threads': SERVER_THREADS,
+        'worker_class': 'gthread',
+        'timeout': SERVER_TIMEOUT,
+        'preload_app': True,
+        'when_ready': when_ready,
+        'on_reload': on_reload
+    }
+    logger.info(f"以 {SERVER_WORKERS} 個工作進程 × {SERVER_THREADS} 個線程啟動 PMvRLnGAN Web 應用於 http://{SERVER_HOST}:{port}")
+    ProductionApplication(app, options).run()
+
+
+if __name__ == "__main__":
+    # 獲取命令行參數
+    port = SERVER_PORT
+    if len(sys.argv) > 1:
+        try:
+            port = int(sys.argv[1])
+        except ValueError:
+            logger.warning(f"無效的端口號: {sys.argv[1]}，使用默認端口 {SERVER_PORT}")
+
+    # 在主進程中預加載所有數據，工作進程 fork 後直接共享
+    warm_caches()
+
+    if os.name == 'nt':
+        # gunicorn 不支持 Windows，改用關閉調試模式的多線程 Flask 服務器
+        logger.warning("Windows 不支持 gunicorn，使用單進程多線程模式啟動")
+        app.run(host=SERVER_HOST, port=port, debug=False, threaded=True, use_reloader=False)
+    else:
+        run_gunicorn(port)